@@ -0,0 +1,244 @@
+import asyncio
+import random
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+import numpy as np
+
+from deep_mcts.game import Action, GameManager, State
+from deep_mcts.mcts import (
+    MCTS,
+    BatchStateEvaluator,
+    Node,
+    RolloutPolicy,
+    SimulationStats,
+    UNPROVEN,
+)
+from deep_mcts.tournament import AsyncAgent
+
+_S = TypeVar("_S", bound=State)
+AsyncStateEvaluator = Callable[[_S], Awaitable[Tuple[float, Sequence[float]]]]
+
+
+class BatchingStateEvaluator(Generic[_S]):
+    # Collects the states awaited by all coroutines running on the event loop
+    # and evaluates them together with a single call to the batch state
+    # evaluator, once every coroutine that can make progress has queued its
+    # state, or once max_batch_size states are waiting.
+    batch_state_evaluator: BatchStateEvaluator[_S]
+    max_batch_size: int
+    pending: List[Tuple[_S, "asyncio.Future[Tuple[float, Sequence[float]]]"]]
+    flush_scheduled: bool
+    batch_sizes: List[int]
+
+    def __init__(
+        self, batch_state_evaluator: BatchStateEvaluator[_S], max_batch_size: int = 256
+    ) -> None:
+        self.batch_state_evaluator = batch_state_evaluator
+        self.max_batch_size = max_batch_size
+        self.pending = []
+        self.flush_scheduled = False
+        self.batch_sizes = []
+
+    async def __call__(self, state: _S) -> Tuple[float, Sequence[float]]:
+        loop = asyncio.get_event_loop()
+        future: "asyncio.Future[Tuple[float, Sequence[float]]]" = loop.create_future()
+        self.pending.append((state, future))
+        if len(self.pending) >= self.max_batch_size:
+            self.flush()
+        elif not self.flush_scheduled:
+            # Callbacks scheduled now run after the coroutines that are
+            # already ready to run, so they get to add their states first
+            loop.call_soon(self.flush)
+            self.flush_scheduled = True
+        return await future
+
+    def flush(self) -> None:
+        self.flush_scheduled = False
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+        self.batch_sizes.append(len(pending))
+        try:
+            evaluations = self.batch_state_evaluator([state for state, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        for (_, future), evaluation in zip(pending, evaluations):
+            future.set_result(evaluation)
+
+
+def unsupported_state_evaluator(state: State) -> Tuple[float, Sequence[float]]:
+    raise TypeError("AsyncMCTS only evaluates states asynchronously")
+
+
+class AsyncMCTS(MCTS[_S]):
+    # MCTS driven by an event loop, so that many searches can share one
+    # process and have their evaluations batched by a BatchingStateEvaluator.
+    # leaf_batch_size is the number of simulations each search runs
+    # concurrently, using virtual losses like the multithreaded search. No
+    # locking is needed, as the tree is only changed between awaits.
+    async_state_evaluator: Optional[AsyncStateEvaluator[_S]]
+
+    def __init__(
+        self,
+        game_manager: GameManager[_S],
+        num_simulations: int,
+        rollout_policy: Optional[RolloutPolicy[_S]],
+        async_state_evaluator: Optional[AsyncStateEvaluator[_S]],
+        **kwargs: Any,
+    ) -> None:
+        # The synchronous evaluator only tells MCTS that states are evaluated,
+        # every evaluation is passed to evaluate_leaf explicitly
+        super().__init__(
+            game_manager,
+            num_simulations,
+            rollout_policy,
+            unsupported_state_evaluator if async_state_evaluator is not None else None,
+            **kwargs,
+        )
+        if self.num_threads > 1:
+            raise ValueError("AsyncMCTS does not support num_threads")
+        self.async_state_evaluator = async_state_evaluator
+
+    async def self_play(  # type: ignore[override]
+        self,
+    ) -> AsyncIterator[Tuple[_S, _S, Action, Sequence[float]]]:
+        i = 0
+        while not self.game_manager.is_final_state(self.state):
+            action_probabilities, _ = await self.step()
+            if i < self.sample_move_cutoff:
+                action = np.random.choice(
+                    len(action_probabilities), p=action_probabilities
+                )
+            else:
+                action = np.argmax(action_probabilities)
+            old_state = self.state
+            self.make_move(action)
+            i += 1
+            yield old_state, self.state, action, action_probabilities
+
+    async def step(  # type: ignore[override]
+        self,
+    ) -> Tuple[List[float], SimulationStats]:
+        if not self.root.children:
+            if not self.find_transposition(self.root, self.state):
+                state = self.state
+                self.expand_node(self.root, state, await self.evaluate_state(state))
+                self.root.visits += 1
+            self.root.proven = UNPROVEN
+        self.add_dirichlet_noise(self.root)
+        simulation_stats = await self.run_simulations()
+        visits = self.policy_visits()
+        action_probabilities = np.zeros(self.game_manager.num_actions)
+        action_probabilities[self.root.child_actions] = visits / visits.sum()
+        return action_probabilities.tolist(), simulation_stats
+
+    async def run_simulations(self) -> SimulationStats:  # type: ignore[override]
+        pending_leaves: Dict[Node, asyncio.Event] = {}
+        # Simulations with and without expansion, and saved by early stopping
+        simulation_counts = [0, 0, 0]
+        started_simulations = 0
+        now = time.perf_counter()
+
+        async def worker() -> None:
+            nonlocal started_simulations
+            while True:
+                if started_simulations >= self.num_simulations or (
+                    time.perf_counter() - now >= self.time_per_move
+                ):
+                    return
+                if self.is_solved():
+                    remaining = self.remaining_simulations(started_simulations, now)
+                    simulation_counts[2] = max(simulation_counts[2], remaining)
+                    return
+                if self.early_stopping and started_simulations > 0:
+                    remaining = self.remaining_simulations(started_simulations, now)
+                    if self.is_decided(remaining):
+                        simulation_counts[2] = max(simulation_counts[2], remaining)
+                        return
+                started_simulations += 1
+                is_terminal = await self.simulation(pending_leaves)
+                simulation_counts[int(is_terminal)] += 1
+
+        await asyncio.gather(*(worker() for _ in range(self.leaf_batch_size)))
+        return simulation_counts[0], simulation_counts[1], simulation_counts[2]
+
+    async def simulation(  # type: ignore[override]
+        self, pending_leaves: Dict[Node, asyncio.Event]
+    ) -> bool:
+        while True:
+            path, state = self.tree_search()
+            leaf_node = path[-1]
+            terminal_value = self.terminal_value(state)
+            if terminal_value is not None or leaf_node not in pending_leaves:
+                break
+            # Another simulation is evaluating this leaf, so wait for it to be
+            # expanded instead of evaluating it twice
+            await pending_leaves[leaf_node].wait()
+        if terminal_value is not None:
+            evaluation = self.evaluate_leaf(leaf_node, state, terminal_value)
+            self.backpropagate(path, evaluation)
+            return True
+        # The virtual loss steers the other simulations away from this path
+        self.apply_virtual_loss(path)
+        expanded = asyncio.Event()
+        pending_leaves[leaf_node] = expanded
+        try:
+            evaluation = await self.evaluate_state(state)
+        finally:
+            self.revert_virtual_loss(path)
+            del pending_leaves[leaf_node]
+            expanded.set()
+        self.backpropagate(path, self.evaluate_leaf(leaf_node, state, None, evaluation))
+        return False
+
+    async def evaluate_state(
+        self, state: _S
+    ) -> Optional[Tuple[float, Sequence[float]]]:
+        if self.async_state_evaluator is None:
+            return None
+        return await self.async_state_evaluator(state)
+
+
+class AsyncMCTSAgent(AsyncAgent[_S]):
+    mcts: AsyncMCTS[_S]
+    epsilon: float
+    current_game_simulation_stats: List[SimulationStats]
+    simulation_stats: List[List[SimulationStats]]
+
+    def __init__(self, mcts: AsyncMCTS[_S], epsilon: float = 0.0) -> None:
+        self.mcts = mcts
+        self.epsilon = epsilon
+        self.current_game_simulation_stats = []
+        self.simulation_stats = [self.current_game_simulation_stats]
+
+    async def play(self, state: _S) -> Action:
+        self.mcts.set_state(state)
+        action_probabilities, simulations = await self.mcts.step()
+        self.current_game_simulation_stats.append(simulations)
+        action: Action
+        if self.epsilon > 0 and random.random() < self.epsilon:
+            action = np.random.choice(len(action_probabilities), p=action_probabilities)
+        else:
+            action = np.argmax(action_probabilities)
+        self.mcts.make_move(action)
+        return action
+
+    def reset(self) -> None:
+        self.mcts.reset()
+        self.current_game_simulation_stats = []
+        self.simulation_stats.append(self.current_game_simulation_stats)
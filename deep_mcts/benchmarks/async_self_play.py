@@ -0,0 +1,84 @@
+import asyncio
+import time
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import torch
+
+from deep_mcts.async_mcts import AsyncMCTS, BatchingStateEvaluator
+from deep_mcts.hex.convolutionalnet import ConvolutionalHexNet
+from deep_mcts.hex.game import HexState
+from deep_mcts.mcts import MCTS
+
+
+def sequential_self_play(
+    game_net: ConvolutionalHexNet, num_games: int, num_simulations: int
+) -> float:
+    # The network is evaluated without a cache so that every simulation
+    # performs a forward pass
+    def state_evaluator(state: HexState) -> Tuple[float, List[float]]:
+        value, probabilities = game_net.evaluate(state)
+        return value, probabilities.tolist()
+
+    start = time.perf_counter()
+    for _ in range(num_games):
+        mcts = MCTS(
+            game_net.manager,
+            num_simulations,
+            None,
+            state_evaluator,
+            sample_move_cutoff=10,
+            dirichlet_alpha=0.3,
+        )
+        for _ in mcts.self_play():
+            pass
+    return num_games / (time.perf_counter() - start)
+
+
+async def concurrent_self_play(
+    game_net: ConvolutionalHexNet, num_games: int, num_simulations: int
+) -> Tuple[float, float]:
+    def batch_state_evaluator(
+        states: Sequence[HexState],
+    ) -> List[Tuple[float, List[float]]]:
+        return [
+            (value, probabilities.tolist())
+            for value, probabilities in game_net.evaluate_states(states)
+        ]
+
+    state_evaluator = BatchingStateEvaluator(batch_state_evaluator)
+
+    async def play_game() -> None:
+        mcts = AsyncMCTS(
+            game_net.manager,
+            num_simulations,
+            None,
+            state_evaluator,
+            sample_move_cutoff=10,
+            dirichlet_alpha=0.3,
+        )
+        async for _ in mcts.self_play():
+            pass
+
+    start = time.perf_counter()
+    await asyncio.gather(*(play_game() for _ in range(num_games)))
+    return (
+        num_games / (time.perf_counter() - start),
+        float(np.mean(state_evaluator.batch_sizes)),
+    )
+
+
+if __name__ == "__main__":
+    torch.set_num_threads(1)
+    game_net = ConvolutionalHexNet(7)
+    games_per_second = sequential_self_play(game_net, 2, 50)
+    print(f"Sequential: {games_per_second * 60:.1f} games/min")
+    loop = asyncio.get_event_loop()
+    for num_games in [4, 16, 32]:
+        games_per_second, mean_batch_size = loop.run_until_complete(
+            concurrent_self_play(game_net, num_games, 50)
+        )
+        print(
+            f"{num_games} concurrent games: {games_per_second * 60:.1f} games/min, "
+            f"mean batch size {mean_batch_size:.1f}"
+        )
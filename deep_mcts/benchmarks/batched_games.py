@@ -0,0 +1,113 @@
+import time
+from typing import Any, List
+
+import numpy as np
+
+from deep_mcts.game import GameManager, StateBatch
+from deep_mcts.hex.bitboard import BitboardHexManager
+from deep_mcts.hex.game import HexManager
+from deep_mcts.hex_with_swap.game import HexWithSwapManager
+from deep_mcts.othello.bitboard import BitboardOthelloManager
+from deep_mcts.othello.game import OthelloManager
+from deep_mcts.tictactoe.game import TicTacToeManager
+
+
+def random_actions(masks: np.ndarray) -> np.ndarray:
+    # A uniformly random legal action for every row of the masks
+    return np.argmax(np.random.random(masks.shape) * masks, axis=1)
+
+
+def check_random_games(manager: GameManager[Any], num_games: int) -> None:
+    # Play random games with the batched methods and compare every batch with
+    # the single state methods
+    states = manager.initial_game_states(num_games)
+    assert manager.unstack_states(states) == [manager.initial_game_state()] * len(
+        states
+    )
+    while len(states) > 0:
+        single_states = manager.unstack_states(states)
+        assert manager.unstack_states(manager.stack_states(single_states)) == (
+            single_states
+        )
+        masks = manager.legal_action_masks(states)
+        for state, mask in zip(single_states, masks):
+            assert sorted(manager.legal_actions(state)) == np.flatnonzero(mask).tolist()
+        final = manager.are_final(states)
+        outcomes = manager.evaluate_final_states(states)
+        for state, is_final, outcome in zip(single_states, final, outcomes):
+            assert manager.is_final_state(state) == is_final
+            if is_final:
+                assert manager.evaluate_final_state(state).value == outcome
+        states = StateBatch(states.players[~final], states.grids[~final])
+        single_states = [
+            state for state, is_final in zip(single_states, final) if not is_final
+        ]
+        actions = random_actions(masks[~final])
+        states = manager.generate_child_states(states, actions)
+        assert manager.unstack_states(states) == [
+            manager.generate_child_state(state, action)
+            for state, action in zip(single_states, actions)
+        ]
+
+
+def batched_rollouts(manager: GameManager[Any], num_games: int) -> np.ndarray:
+    states = manager.initial_game_states(num_games)
+    outcomes = np.empty(num_games)
+    games = np.arange(num_games)
+    while len(games) > 0:
+        final = manager.are_final(states)
+        outcomes[games[final]] = manager.evaluate_final_states(
+            StateBatch(states.players[final], states.grids[final])
+        )
+        states = StateBatch(states.players[~final], states.grids[~final])
+        games = games[~final]
+        states = manager.generate_child_states(
+            states, random_actions(manager.legal_action_masks(states))
+        )
+    return outcomes
+
+
+def single_rollouts(manager: GameManager[Any], num_games: int) -> List[float]:
+    outcomes = []
+    for _ in range(num_games):
+        state = manager.initial_game_state()
+        while not manager.is_final_state(state):
+            actions = manager.legal_actions(state)
+            state = manager.generate_child_state(
+                state, actions[np.random.randint(len(actions))]
+            )
+        outcomes.append(manager.evaluate_final_state(state).value)
+    return outcomes
+
+
+if __name__ == "__main__":
+    np.random.seed(0)
+    managers: List[GameManager[Any]] = [
+        TicTacToeManager(),
+        HexManager(5),
+        HexWithSwapManager(5),
+        BitboardHexManager(7),
+        OthelloManager(6),
+        BitboardOthelloManager(6),
+    ]
+    for manager in managers:
+        check_random_games(manager, num_games=200)
+        print(f"{type(manager).__name__}: batched methods match")
+
+    for manager, num_games in [
+        (TicTacToeManager(), 4096),
+        (HexManager(7), 1024),
+        (OthelloManager(6), 512),
+    ]:
+        start = time.perf_counter()
+        single_outcomes = single_rollouts(manager, num_games)
+        single_speed = num_games / (time.perf_counter() - start)
+        start = time.perf_counter()
+        batched_outcomes = batched_rollouts(manager, num_games)
+        batched_speed = num_games / (time.perf_counter() - start)
+        print(
+            f"{type(manager).__name__} random rollouts: "
+            f"single {single_speed:.0f}/s, batched {batched_speed:.0f}/s, "
+            f"mean outcome {np.mean(single_outcomes):.3f} vs "
+            f"{np.mean(batched_outcomes):.3f}"
+        )
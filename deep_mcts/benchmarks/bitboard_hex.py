@@ -0,0 +1,104 @@
+import pickle
+import random
+import time
+from typing import Tuple
+
+from deep_mcts.game import GameManager
+from deep_mcts.hex.bitboard import BitboardHexManager
+from deep_mcts.hex.game import HexManager, HexState
+
+
+def check_random_games(grid_size: int, num_games: int) -> None:
+    # Play the same random games with both managers and compare every state
+    manager = HexManager(grid_size)
+    bitboard_manager = BitboardHexManager(grid_size)
+    for _ in range(num_games):
+        state = manager.initial_game_state()
+        bitboard_state = bitboard_manager.initial_game_state()
+        while True:
+            assert bitboard_state.player == state.player
+            assert bitboard_state.grid == state.grid
+            assert str(bitboard_state) == str(state)
+            assert bitboard_manager.legal_actions(
+                bitboard_state
+            ) == manager.legal_actions(state)
+            assert bitboard_manager.is_final_state(
+                bitboard_state
+            ) == manager.is_final_state(state)
+            assert bitboard_manager.evaluate_final_state(
+                bitboard_state
+            ) == manager.evaluate_final_state(state)
+            assert bitboard_state.empty_cells == state.empty_cells
+            assert bitboard_state.num_moves == state.num_moves
+            # Setting the grid in from_hex_state rebuilds the outcome
+            replayed_state = bitboard_manager.from_hex_state(state)
+            assert replayed_state == bitboard_state
+            assert replayed_state.outcome == bitboard_state.outcome
+            assert replayed_state.num_moves == bitboard_state.num_moves
+            unpickled_state = pickle.loads(pickle.dumps(bitboard_state))
+            assert unpickled_state.empty_cells == bitboard_state.empty_cells
+            # HexManager only stops at a win, but the bitboard outcome must
+            # also hold up after the board is filled past it
+            if not manager.legal_actions(state):
+                break
+            action = random.choice(manager.legal_actions(state))
+            state = manager.generate_child_state(state, action)
+            bitboard_state = bitboard_manager.generate_child_state(
+                bitboard_state, action
+            )
+
+
+def random_rollout(manager: GameManager[HexState]) -> Tuple[int, float]:
+    state = manager.initial_game_state()
+    length = 0
+    while not manager.is_final_state(state):
+        state = manager.generate_child_state(
+            state, random.choice(manager.legal_actions(state))
+        )
+        length += 1
+    return length, manager.evaluate_final_state(state).value
+
+
+def time_rollouts(manager: GameManager[HexState], num_rollouts: int) -> float:
+    start = time.perf_counter()
+    for _ in range(num_rollouts):
+        random_rollout(manager)
+    return num_rollouts / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    for grid_size in [1, 2, 3, 4, 5, 7, 13, 19]:
+        check_random_games(grid_size, num_games=200 if grid_size < 13 else 20)
+        print(f"{grid_size}x{grid_size}: identical to HexManager")
+
+    try:
+        import torch  # noqa: F401
+    except ImportError:
+        print("torch not installed, skipping states_to_tensor check")
+    else:
+        from deep_mcts.hex.convolutionalnet import ConvolutionalHexNet
+
+        manager = HexManager(5)
+        bitboard_manager = BitboardHexManager(5)
+        net = ConvolutionalHexNet(5, manager=bitboard_manager)
+        states = [manager.initial_game_state()]
+        bitboard_states = [bitboard_manager.initial_game_state()]
+        for action in [12, 3, 7, 20]:
+            states.append(manager.generate_child_state(states[-1], action))
+            bitboard_states.append(
+                bitboard_manager.generate_child_state(bitboard_states[-1], action)
+            )
+        assert net.states_to_tensor(states).equal(net.states_to_tensor(bitboard_states))
+        print("ConvolutionalHexNet.states_to_tensor: identical tensors")
+
+    for grid_size, num_rollouts in [(7, 500), (13, 100), (19, 30)]:
+        # Use fresh managers, so their caches start empty
+        hex_speed = time_rollouts(HexManager(grid_size), num_rollouts)
+        bitboard_speed = time_rollouts(BitboardHexManager(grid_size), num_rollouts)
+        print(
+            f"{grid_size}x{grid_size} random rollouts: "
+            f"HexManager {hex_speed:.1f}/s, "
+            f"BitboardHexManager {bitboard_speed:.1f}/s "
+            f"({bitboard_speed / hex_speed:.1f}x)"
+        )
@@ -0,0 +1,88 @@
+import random
+import time
+
+from deep_mcts.game import GameManager
+from deep_mcts.othello.bitboard import BitboardOthelloManager
+from deep_mcts.othello.game import OthelloManager, OthelloState
+
+
+def check_random_games(grid_size: int, num_games: int) -> None:
+    # Play the same random games with both managers and compare every state
+    manager = OthelloManager(grid_size)
+    bitboard_manager = BitboardOthelloManager(grid_size)
+    for _ in range(num_games):
+        state = manager.initial_game_state()
+        bitboard_state = bitboard_manager.initial_game_state()
+        while True:
+            assert bitboard_state.player == state.player
+            assert bitboard_state.grid == state.grid
+            assert str(bitboard_state) == str(state)
+            legal_actions = manager.legal_actions(state)
+            # OthelloManager returns the actions in set order
+            assert bitboard_manager.legal_actions(bitboard_state) == sorted(
+                legal_actions
+            )
+            assert bitboard_manager.is_final_state(
+                bitboard_state
+            ) == manager.is_final_state(state)
+            if manager.is_final_state(state):
+                assert bitboard_manager.evaluate_final_state(
+                    bitboard_state
+                ) == manager.evaluate_final_state(state)
+                break
+            action = random.choice(legal_actions)
+            state = manager.generate_child_state(state, action)
+            bitboard_state = bitboard_manager.generate_child_state(
+                bitboard_state, action
+            )
+
+
+def time_rollouts(manager: GameManager[OthelloState], num_rollouts: int) -> float:
+    start = time.perf_counter()
+    for _ in range(num_rollouts):
+        state = manager.initial_game_state()
+        while not manager.is_final_state(state):
+            state = manager.generate_child_state(
+                state, random.choice(manager.legal_actions(state))
+            )
+        manager.evaluate_final_state(state)
+    return num_rollouts / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    for grid_size in [4, 6, 8, 10]:
+        check_random_games(grid_size, num_games=300 if grid_size < 8 else 50)
+        print(f"{grid_size}x{grid_size}: identical to OthelloManager")
+
+    try:
+        import torch  # noqa: F401
+    except ImportError:
+        print("torch not installed, skipping states_to_tensor check")
+    else:
+        from deep_mcts.othello.convolutionalnet import ConvolutionalOthelloNet
+
+        manager = OthelloManager(6)
+        bitboard_manager = BitboardOthelloManager(6)
+        net = ConvolutionalOthelloNet(6, manager=bitboard_manager)
+        states = [manager.initial_game_state()]
+        bitboard_states = [bitboard_manager.initial_game_state()]
+        for _ in range(8):
+            action = random.choice(manager.legal_actions(states[-1]))
+            states.append(manager.generate_child_state(states[-1], action))
+            bitboard_states.append(
+                bitboard_manager.generate_child_state(bitboard_states[-1], action)
+            )
+        assert net.states_to_tensor(states).equal(net.states_to_tensor(bitboard_states))
+        print("ConvolutionalOthelloNet.states_to_tensor: identical tensors")
+
+    for grid_size, num_rollouts in [(6, 300), (8, 100)]:
+        # Use fresh managers, so their caches start empty
+        othello_speed = time_rollouts(OthelloManager(grid_size), num_rollouts)
+        bitboard_speed = time_rollouts(BitboardOthelloManager(grid_size), num_rollouts)
+        print(
+            f"{grid_size}x{grid_size} random rollouts: "
+            f"OthelloManager {othello_speed:.1f}/s, "
+            f"BitboardOthelloManager {bitboard_speed:.1f}/s "
+            f"({bitboard_speed / othello_speed:.1f}x)"
+        )
@@ -0,0 +1,71 @@
+import time
+from typing import Tuple, Type
+
+import numpy as np
+
+from deep_mcts.benchmarks.common import uniform_state_evaluator
+from deep_mcts.game import Action
+from deep_mcts.mcts import MCTS
+from deep_mcts.othello.game import OthelloManager, OthelloState
+
+
+class CountingOthelloManager(OthelloManager):
+    num_generated_states = 0
+
+    def generate_child_state(self, state: OthelloState, action: Action) -> OthelloState:
+        self.num_generated_states += 1
+        return super().generate_child_state(state, action)
+
+
+class UncachedOthelloManager(CountingOthelloManager):
+    # Shows the cost of selection without the caches of the game manager
+    def generate_child_state(self, state: OthelloState, action: Action) -> OthelloState:
+        self.num_generated_states += 1
+        return OthelloManager.generate_child_state.__wrapped__(  # type: ignore[attr-defined, no-any-return]
+            self, state, action
+        )
+
+
+def run_search(
+    manager_class: Type[CountingOthelloManager],
+    cache_states: bool,
+    grid_size: int,
+    num_simulations: int,
+    num_moves: int,
+) -> Tuple[float, int]:
+    manager = manager_class(grid_size)
+
+    mcts = MCTS(
+        manager,
+        num_simulations,
+        None,
+        uniform_state_evaluator(manager),
+        cache_states=cache_states,
+    )
+    start = time.perf_counter()
+    for _ in range(num_moves):
+        action_probabilities, _ = mcts.step()
+        mcts.make_move(int(np.argmax(action_probabilities)))
+    elapsed = time.perf_counter() - start
+    return num_simulations * num_moves / elapsed, manager.num_generated_states
+
+
+if __name__ == "__main__":
+    manager_class: Type[CountingOthelloManager]
+    for name, manager_class in [
+        ("manager cache", CountingOthelloManager),
+        ("no cache", UncachedOthelloManager),
+    ]:
+        for cache_states in [False, True]:
+            simulations_per_second, calls = run_search(
+                manager_class,
+                cache_states,
+                grid_size=6,
+                num_simulations=2000,
+                num_moves=10,
+            )
+            print(
+                f"{name}, cache_states={cache_states}: "
+                f"{simulations_per_second:.0f} simulations/s, "
+                f"{calls} generate_child_state calls"
+            )
@@ -0,0 +1,136 @@
+import random
+import time
+from typing import Any, List, Sequence, Tuple
+
+import numpy as np
+import torch
+
+from deep_mcts.benchmarks.common import random_states
+from deep_mcts.game import GameManager, State
+from deep_mcts.gamenet import GameNet
+from deep_mcts.hex.bitboard import BitboardHexManager
+from deep_mcts.hex.convolutionalnet import ConvolutionalHexNet
+from deep_mcts.hex.game import HexManager
+from deep_mcts.hex_with_swap.game import HexWithSwapManager
+from deep_mcts.mcts import MCTS
+from deep_mcts.othello.bitboard import BitboardOthelloManager
+from deep_mcts.othello.convolutionalnet import ConvolutionalOthelloNet
+from deep_mcts.othello.game import OthelloManager
+from deep_mcts.tictactoe.fullyconnectednet import FullyConnectedTicTacToeNet
+from deep_mcts.tictactoe.game import TicTacToeManager
+from deep_mcts.train import cached_state_evaluator
+
+
+def check_symmetries(manager: GameManager[Any], states: Sequence[State]) -> None:
+    for state in states:
+        canonical_state, transform = manager.canonical_state(state)
+        assert manager.canonical_state(canonical_state) == (canonical_state, 0)
+        for other_transform in range(len(manager.symmetries())):
+            transformed = manager.transform_state(state, other_transform)
+            assert type(transformed) is type(canonical_state)
+            # Every symmetry of a state has the same canonical state
+            assert manager.canonical_state(transformed)[0] == canonical_state
+            # and the same legal moves and outcome, once mapped back
+            mask = manager.legal_action_mask(transformed).astype(float)
+            assert np.array_equal(
+                manager.inverse_transform_probabilities(mask, other_transform),
+                manager.legal_action_mask(state),
+            )
+            assert manager.is_final_state(transformed) == manager.is_final_state(state)
+            if manager.is_final_state(state):
+                assert manager.evaluate_final_state(
+                    transformed
+                ) == manager.evaluate_final_state(state)
+
+
+class CountingEvaluator:
+    # Counts the states the network evaluates
+    def __init__(self, game_net: GameNet[Any]) -> None:
+        self.game_net = game_net.to_inference()
+        self.manager = game_net.manager
+        self.evaluations = 0
+
+    def evaluate(self, state: State) -> Tuple[float, np.ndarray]:
+        self.evaluations += 1
+        return self.game_net.evaluate(state)
+
+
+def self_play(
+    game_net: GameNet[Any], num_games: int, num_simulations: int, canonicalize: bool
+) -> Tuple[float, float]:
+    # The share of the evaluations of the games answered by the cache, and
+    # the seconds per game. Like a self-play process, all games share the
+    # cache.
+    random.seed(0)
+    np.random.seed(0)
+    evaluator = CountingEvaluator(game_net)
+    state_evaluator = cached_state_evaluator(
+        evaluator, canonicalize  # type: ignore[arg-type]
+    )
+    calls = 0
+
+    def counting_state_evaluator(state: State) -> Tuple[float, Sequence[float]]:
+        nonlocal calls
+        calls += 1
+        return state_evaluator(state)
+
+    start = time.perf_counter()
+    for _ in range(num_games):
+        mcts = MCTS(
+            game_net.manager,
+            num_simulations,
+            None,
+            counting_state_evaluator,
+            sample_move_cutoff=8,
+            dirichlet_alpha=1.0,
+        )
+        for _ in mcts.self_play():
+            pass
+    duration = time.perf_counter() - start
+    return 1 - evaluator.evaluations / calls, duration / num_games
+
+
+def positions_after_swap(manager: HexWithSwapManager) -> List[State]:
+    states: List[State] = []
+    for action in range(manager.grid_size ** 2):
+        state = manager.generate_child_state(manager.initial_game_state(), action)
+        state = manager.generate_child_state(state, manager.swap_move)
+        states.append(state)
+        states.append(
+            manager.generate_child_state(
+                state, random.choice(manager.legal_actions(state))
+            )
+        )
+    return states
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    torch.manual_seed(0)
+    torch.set_num_threads(1)
+    swap_manager = HexWithSwapManager(4)
+    for manager, extra_states in [
+        (HexManager(5), []),
+        (BitboardHexManager(5), []),
+        (swap_manager, positions_after_swap(swap_manager)),
+        (OthelloManager(6), []),
+        (BitboardOthelloManager(6), []),
+        (TicTacToeManager(), []),
+    ]:
+        check_symmetries(manager, random_states(manager, 300) + extra_states)
+        print(f"{type(manager).__name__}: symmetries keep the moves and outcomes")
+
+    for name, game_net, num_games, num_simulations in [
+        ("Hex 5x5", ConvolutionalHexNet(5), 10, 100),
+        ("Othello 6x6", ConvolutionalOthelloNet(6), 10, 100),
+        ("Tic-tac-toe", FullyConnectedTicTacToeNet(), 50, 100),
+    ]:
+        results = [
+            self_play(game_net, num_games, num_simulations, canonicalize)
+            for canonicalize in [False, True]
+        ]
+        print(
+            f"{name}, {num_games} self-play games with {num_simulations} "
+            f"simulations per move: cache hit rate {results[0][0]:.1%} -> "
+            f"{results[1][0]:.1%}, {results[0][1]:.2f} -> {results[1][1]:.2f} s/game"
+        )
@@ -0,0 +1,50 @@
+import random
+from typing import List, Tuple, TypeVar
+
+from deep_mcts.game import GameManager, State
+from deep_mcts.mcts import StateEvaluator
+
+_S = TypeVar("_S", bound=State)
+
+
+def uniform_state_evaluator(manager: GameManager[_S]) -> StateEvaluator[_S]:
+    # A free stand-in for the network, so the time measured is the search:
+    # every state is a draw with the same probability for each legal action
+    def state_evaluator(state: _S) -> Tuple[float, List[float]]:
+        legal_actions = set(manager.legal_actions(state))
+        return (
+            0.5,
+            [
+                1 / len(legal_actions) if action in legal_actions else 0.0
+                for action in range(manager.num_actions)
+            ],
+        )
+
+    return state_evaluator
+
+
+def random_states(manager: GameManager[_S], n: int) -> List[_S]:
+    # n states from random games, starting a new game when one ends
+    states: List[_S] = []
+    while len(states) < n:
+        state = manager.initial_game_state()
+        while not manager.is_final_state(state) and len(states) < n:
+            states.append(state)
+            state = manager.generate_child_state(
+                state, random.choice(manager.legal_actions(state))
+            )
+    return states
+
+
+def random_games(manager: GameManager[_S], num_games: int) -> List[_S]:
+    # Every state of num_games random games, final states included
+    states: List[_S] = []
+    for _ in range(num_games):
+        state = manager.initial_game_state()
+        states.append(state)
+        while not manager.is_final_state(state):
+            state = manager.generate_child_state(
+                state, random.choice(manager.legal_actions(state))
+            )
+            states.append(state)
+    return states
@@ -0,0 +1,60 @@
+import time
+from typing import List, Tuple, Type
+
+import torch
+
+from deep_mcts.game import Action, State
+from deep_mcts.gamenet import GameNet
+from deep_mcts.hex.convolutionalnet import ConvolutionalHexNet
+from deep_mcts.mcts import MCTS
+from deep_mcts.othello.convolutionalnet import ConvolutionalOthelloNet
+from deep_mcts.train import cached_state_evaluator
+
+
+def self_play(
+    game_net: GameNet[State], num_simulations: int, early_stopping: bool
+) -> Tuple[List[Action], float, int]:
+    # Without Dirichlet noise or sampling the search is deterministic, so
+    # both runs have to choose the same moves
+    mcts = MCTS(
+        game_net.manager,
+        num_simulations,
+        rollout_policy=None,
+        state_evaluator=cached_state_evaluator(game_net),
+        early_stopping=early_stopping,
+    )
+    actions = []
+    simulations = 0
+    start = time.perf_counter()
+    while not game_net.manager.is_final_state(mcts.state):
+        action_probabilities, (
+            with_expansion,
+            without_expansion,
+            _,
+        ) = mcts.step()
+        simulations += with_expansion + without_expansion
+        action = max(
+            range(len(action_probabilities)), key=action_probabilities.__getitem__
+        )
+        actions.append(action)
+        mcts.make_move(action)
+    return actions, time.perf_counter() - start, simulations
+
+
+if __name__ == "__main__":
+    torch.manual_seed(0)
+    net_class: Type[GameNet[State]]
+    for name, net_class, grid_size in [
+        ("Hex", ConvolutionalHexNet, 7),
+        ("Othello", ConvolutionalOthelloNet, 6),
+    ]:
+        game_net = net_class(grid_size)  # type: ignore[call-arg]
+        actions, duration, simulations = self_play(game_net, 400, False)
+        early_actions, early_duration, early_simulations = self_play(
+            game_net, 400, True
+        )
+        print(
+            f"{name} {grid_size}x{grid_size}: {duration:.1f}s -> "
+            f"{early_duration:.1f}s, {simulations} -> {early_simulations} "
+            f"simulations, same moves: {actions == early_actions}"
+        )
@@ -0,0 +1,102 @@
+import random
+import time
+from typing import Any, Callable, List, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from deep_mcts.benchmarks.common import random_states
+from deep_mcts.game import Player, State
+from deep_mcts.gamenet import GameNet
+from deep_mcts.hex.convolutionalnet import ConvolutionalHexNet
+from deep_mcts.othello.convolutionalnet import ConvolutionalOthelloNet
+from deep_mcts.tictactoe.fullyconnectednet import FullyConnectedTicTacToeNet
+
+
+def per_state_evaluations(
+    game_net: GameNet[Any], states: Sequence[State]
+) -> List[Tuple[float, torch.Tensor]]:
+    game_net.net.eval()
+    states_tensor = game_net.states_to_tensor(states).to(game_net.device)
+    with torch.autograd.no_grad():
+        values, probabilities = game_net.forward(states_tensor.float())
+    return process_per_state(game_net, states, values, probabilities)
+
+
+def process_per_state(
+    game_net: GameNet[Any],
+    states: Sequence[State],
+    values: torch.Tensor,
+    probabilities: torch.Tensor,
+) -> List[Tuple[float, torch.Tensor]]:
+    # The processing GameNet did one state at a time before evaluate_batch
+    evaluations = []
+    for state, value, state_probabilities in zip(states, values, probabilities):
+        value = torch.tanh(value)
+        if state.player == Player.min_player():
+            value = -value
+        value = (value + 1) / 2
+        state_probabilities = F.softmax(state_probabilities.flatten(), dim=0)
+        legal_moves = torch.from_numpy(
+            game_net.manager.legal_action_mask(state)
+        ).float()
+        state_probabilities = state_probabilities * legal_moves.to(game_net.device)
+        state_probabilities = state_probabilities / torch.sum(state_probabilities)
+        assert torch.allclose(
+            torch.sum(state_probabilities), torch.tensor([1.0], device=game_net.device)
+        )
+        evaluations.append((value.item(), state_probabilities.cpu().detach()))
+    return evaluations
+
+
+def time_per_state(function: Callable[[], Any], num_states: int) -> float:
+    function()
+    repeats = max(1, 512 // num_states)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / (repeats * num_states) * 1e6
+
+
+if __name__ == "__main__":
+    torch.manual_seed(0)
+    random.seed(0)
+    torch.set_num_threads(1)
+    for name, game_net in [
+        ("Hex 11x11", ConvolutionalHexNet(11)),
+        ("Othello 8x8", ConvolutionalOthelloNet(8)),
+        ("Tic-tac-toe", FullyConnectedTicTacToeNet()),
+    ]:
+        states = random_states(game_net.manager, 256)
+        values, probabilities = game_net.evaluate_batch(states)
+        assert values.shape == (len(states),)
+        assert probabilities.shape == (len(states), game_net.manager.num_actions)
+        for i, (value, state_probabilities) in enumerate(
+            per_state_evaluations(game_net, states)
+        ):
+            assert abs(values[i] - value) < 1e-6
+            assert np.allclose(probabilities[i], state_probabilities.numpy(), atol=1e-6)
+        assert game_net.evaluate(states[-1])[0] == values[-1]
+        for batch_size in [1, 16, 256]:
+            batch = states[:batch_size]
+            per_state = time_per_state(
+                lambda: per_state_evaluations(game_net, batch), batch_size
+            )
+            batched = time_per_state(lambda: game_net.evaluate_batch(batch), batch_size)
+            # The processing of the outputs alone, without the forward pass
+            with torch.autograd.no_grad():
+                outputs = game_net.forward(
+                    game_net.states_to_tensor(batch).to(game_net.device).float()
+                )
+            per_state_processing = time_per_state(
+                lambda: process_per_state(game_net, batch, *outputs), batch_size
+            )
+            batched_processing = time_per_state(
+                lambda: game_net._process_outputs(batch, *outputs), batch_size
+            )
+            print(
+                f"{name}, batch size {batch_size}, us/state: {per_state:.0f} -> "
+                f"{batched:.0f} in total, {per_state_processing:.1f} -> "
+                f"{batched_processing:.1f} processing the outputs"
+            )
@@ -0,0 +1,145 @@
+import pickle
+import random
+import time
+from typing import Any, Callable, List
+
+import numpy as np
+
+from deep_mcts.benchmarks.common import random_games
+from deep_mcts.game import CellState, GameManager, Player
+from deep_mcts.hex.bitboard import BitboardHexManager
+from deep_mcts.hex.game import HexManager, HexState
+from deep_mcts.hex_with_swap.game import HexWithSwapManager
+
+
+def scanned_legal_actions(manager: HexManager, state: HexState) -> List[int]:
+    # Legal moves found by scanning the grid, as before the empty cell masks
+    return [
+        x + y * manager.grid_size
+        for y in range(manager.grid_size)
+        for x in range(manager.grid_size)
+        if state.grid[y][x] == CellState.EMPTY
+    ]
+
+
+def scanned_can_swap(state: HexState) -> bool:
+    return (
+        state.player == Player.SECOND
+        and sum(sum(x != CellState.EMPTY for x in row) for row in state.grid) == 1
+    )
+
+
+def scanned_mask(manager: GameManager[Any], state: HexState) -> np.ndarray:
+    # The mask GameNet built from the list of legal actions
+    mask = np.zeros(manager.num_actions, dtype=np.bool_)
+    mask[manager.legal_actions(state)] = True
+    return mask
+
+
+def check_states(manager: HexManager, states: List[HexState]) -> None:
+    swap_manager = HexWithSwapManager(manager.grid_size)
+    for state in states:
+        actions = scanned_legal_actions(manager, state)
+        assert manager.legal_actions(state) == actions
+        assert manager.legal_action_mask(state).tolist() == [
+            action in actions for action in range(manager.num_actions)
+        ]
+        assert state.num_moves == manager.grid_size ** 2 - len(actions)
+        packed_state = manager.pack_state(state)
+        for copy in [packed_state, pickle.loads(pickle.dumps(packed_state))]:
+            assert (copy.empty_cells, copy.num_moves) == (
+                state.empty_cells,
+                state.num_moves,
+            )
+        # HexWithSwapManager can't have swapped, since the games are Hex games
+        can_swap = scanned_can_swap(state)
+        assert (swap_manager.swap_move in swap_manager.legal_actions(state)) == can_swap
+        assert swap_manager.legal_action_mask(state)[-1] == can_swap
+    # Masks and move numbers computed from the grid match the updated ones
+    for state in manager.unstack_states(manager.stack_states(states)):
+        assert manager.legal_actions(state) == scanned_legal_actions(manager, state)
+
+
+def time_per_state(
+    function: Callable[[HexState], Any], states: List[HexState]
+) -> float:
+    start = time.perf_counter()
+    for state in states:
+        function(state)
+    return (time.perf_counter() - start) / len(states) * 1e6
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    for grid_size in [1, 2, 5, 6]:
+        for manager in [HexManager(grid_size), BitboardHexManager(grid_size)]:
+            check_states(manager, random_games(manager, num_games=50))
+    # Swapping keeps the empty cells and counts as a move
+    swap_manager = HexWithSwapManager(5)
+    state = swap_manager.generate_child_state(swap_manager.initial_game_state(), 12)
+    assert swap_manager.swap_move in swap_manager.legal_actions(state)
+    swapped = swap_manager.generate_child_state(state, swap_manager.swap_move)
+    assert swapped.num_moves == 2 and swapped.empty_cells == state.empty_cells
+    assert swap_manager.swap_move not in swap_manager.legal_actions(swapped)
+    assert not swap_manager.legal_action_mask(swapped)[-1]
+    print("Legal actions, masks and swaps match scanning the grid")
+
+    for grid_size in [6, 11, 13]:
+        manager = HexManager(grid_size)
+        swap_manager = HexWithSwapManager(grid_size)
+        states = random_games(manager, num_games=20)
+        # Without the caches, which hide the cost of the first call
+        times = [
+            time_per_state(lambda state: scanned_legal_actions(manager, state), states),
+            time_per_state(
+                lambda state: HexManager.legal_actions.__wrapped__(  # type: ignore[attr-defined]
+                    manager, state
+                ),
+                states,
+            ),
+            time_per_state(scanned_can_swap, states),
+            time_per_state(
+                lambda state: state.player == Player.SECOND and state.num_moves == 1,
+                states,
+            ),
+            time_per_state(lambda state: scanned_mask(manager, state), states),
+            time_per_state(manager.legal_action_mask, states),
+        ]
+        print(
+            f"{grid_size}x{grid_size} Hex, us/state: legal_actions "
+            f"{times[0]:.2f} scanned, {times[1]:.2f} from the mask; swap check "
+            f"{times[2]:.2f} scanned, {times[3]:.2f} from the move number; action "
+            f"mask {times[4]:.2f} from legal_actions, {times[5]:.2f} from the mask"
+        )
+
+    try:
+        import torch
+    except ImportError:
+        print("torch not installed, skipping the GameNet masking benchmark")
+    else:
+        from deep_mcts.hex.convolutionalnet import ConvolutionalHexNet
+
+        for grid_size in [6, 11, 13]:
+            net = ConvolutionalHexNet(grid_size)
+            states = random_games(net.manager, num_games=5)
+
+            def list_mask(state: HexState) -> torch.Tensor:
+                legal_moves = torch.zeros(net.manager.num_actions, dtype=torch.bool)
+                legal_moves[
+                    HexManager.legal_actions.__wrapped__(  # type: ignore[attr-defined]
+                        net.manager, state
+                    )
+                ] = True
+                return legal_moves
+
+            for state in states:
+                assert list_mask(state).equal(net._legal_move_masks([state])[0])
+            list_time = time_per_state(list_mask, states)
+            mask_time = time_per_state(
+                lambda state: net._legal_move_masks([state]), states
+            )
+            print(
+                f"{grid_size}x{grid_size} GameNet._legal_move_masks: identical, "
+                f"{list_time:.1f} us/state from a list of actions, "
+                f"{mask_time:.1f} us/state from the mask"
+            )
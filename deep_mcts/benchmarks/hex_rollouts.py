@@ -0,0 +1,127 @@
+import math
+import random
+import time
+from typing import Any, Callable, List
+
+import numpy as np
+
+from deep_mcts.game import GameManager
+from deep_mcts.hex.bitboard import BitboardHexManager
+from deep_mcts.hex.game import HexManager, HexState
+from deep_mcts.hex_with_swap.game import HexWithSwapManager
+from deep_mcts.mcts import MCTS
+
+
+def move_by_move_rollout(manager: GameManager[Any], state: Any) -> float:
+    # The generic playout of GameManager, one move at a time
+    return GameManager.random_rollout(manager, state)
+
+
+def random_position(manager: GameManager[Any], num_moves: int) -> Any:
+    while True:
+        state = manager.initial_game_state()
+        for _ in range(num_moves):
+            state = manager.generate_child_state(
+                state, random.choice(manager.legal_actions(state))
+            )
+        if not manager.is_final_state(state):
+            return state
+
+
+def check_distribution(
+    manager: GameManager[Any], state: Any, num_rollouts: int
+) -> None:
+    # Every way of playing out the state must give the same mean value, up to
+    # sampling noise
+    means = [
+        np.mean([move_by_move_rollout(manager, state) for _ in range(num_rollouts)]),
+        np.mean([manager.random_rollout(state) for _ in range(num_rollouts)]),
+        manager.random_rollouts(state, num_rollouts).mean(),
+    ]
+    # The standard deviation of the difference of two means, at worst
+    tolerance = 5 * math.sqrt(2 * 0.25 / num_rollouts)
+    assert max(means) - min(means) < tolerance, (state, means)
+
+
+def playouts_per_second(function: Callable[[], Any], num_playouts: int) -> float:
+    start = time.perf_counter()
+    function()
+    return num_playouts / (time.perf_counter() - start)
+
+
+def search_speed(manager: HexManager, num_simulations: int, **kwargs: Any) -> float:
+    mcts = MCTS(
+        manager,
+        num_simulations,
+        rollout_policy=lambda state: random.choice(manager.legal_actions(state)),
+        state_evaluator=None,
+        **kwargs,
+    )
+    start = time.perf_counter()
+    for _ in range(3):
+        action_probabilities, _ = mcts.step()
+        mcts.make_move(int(np.argmax(action_probabilities)))
+    return 3 * num_simulations / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    np.random.seed(0)
+    for manager in [HexManager(5), BitboardHexManager(5), HexWithSwapManager(5)]:
+        for num_moves in [0, 1, 4, 10]:
+            check_distribution(
+                manager, random_position(manager, num_moves), num_rollouts=3000
+            )
+        # Final states are evaluated, not played out
+        state = random_position(manager, 0)
+        while not manager.is_final_state(state):
+            state = manager.generate_child_state(
+                state, random.choice(manager.legal_actions(state))
+            )
+        value = manager.evaluate_final_state(state).value
+        assert manager.random_rollout(state) == value
+        assert (manager.random_rollouts(state, 10) == value).all()
+        print(f"{type(manager).__name__}: rollouts match move by move playouts")
+
+    for grid_size in [7, 11, 13]:
+        hex_manager = HexManager(grid_size)
+        bitboard_manager = BitboardHexManager(grid_size)
+        state: HexState = hex_manager.initial_game_state()
+        bitboard_state = bitboard_manager.initial_game_state()
+        speeds: List[float] = [
+            playouts_per_second(
+                lambda: [move_by_move_rollout(hex_manager, state) for _ in range(20)],
+                20,
+            ),
+            playouts_per_second(
+                lambda: [hex_manager.random_rollout(state) for _ in range(500)], 500
+            ),
+            playouts_per_second(
+                lambda: [
+                    bitboard_manager.random_rollout(bitboard_state) for _ in range(500)
+                ],
+                500,
+            ),
+            playouts_per_second(lambda: hex_manager.random_rollouts(state, 256), 256),
+        ]
+        print(
+            f"{grid_size}x{grid_size} playouts/s: move by move {speeds[0]:.0f}, "
+            f"random fill {speeds[1]:.0f} ({speeds[1] / speeds[0]:.0f}x), "
+            f"bitboard random fill {speeds[2]:.0f} ({speeds[2] / speeds[0]:.0f}x), "
+            f"256 vectorized {speeds[3]:.0f} ({speeds[3] / speeds[0]:.0f}x)"
+        )
+
+    for grid_size, num_simulations in [(7, 300), (11, 100)]:
+        rollout_policy_speed = search_speed(HexManager(grid_size), num_simulations)
+        random_fill_speed = search_speed(
+            HexManager(grid_size), num_simulations, random_rollouts=1
+        )
+        vectorized_speed = search_speed(
+            HexManager(grid_size), num_simulations, random_rollouts=32
+        )
+        print(
+            f"{grid_size}x{grid_size} rollout MCTS simulations/s: rollout_policy "
+            f"{rollout_policy_speed:.0f}, random_rollouts=1 {random_fill_speed:.0f} "
+            f"({random_fill_speed / rollout_policy_speed:.1f}x), random_rollouts=32 "
+            f"{vectorized_speed:.0f} with 32 playouts each"
+        )
@@ -0,0 +1,79 @@
+import random
+import time
+from typing import Any
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from deep_mcts.benchmarks.common import random_states
+from deep_mcts.gamenet import GameNet
+from deep_mcts.hex.convolutionalnet import ConvolutionalHexNet
+from deep_mcts.hex_with_swap.convolutionalnet import ConvolutionalHexWithSwapNet
+from deep_mcts.othello.convolutionalnet import ConvolutionalOthelloNet
+from deep_mcts.tictactoe.convolutionalnet import ConvolutionalTicTacToeNet
+from deep_mcts.tictactoe.fullyconnectednet import FullyConnectedTicTacToeNet
+
+
+def randomize_batch_norms(game_net: GameNet[Any]) -> None:
+    # Fresh batch norms are the identity in evaluation mode, which would make
+    # folding them trivially right
+    with torch.no_grad():
+        for module in game_net.net.modules():
+            if isinstance(module, nn.BatchNorm2d):
+                module.running_mean.uniform_(-1, 1)  # type: ignore[operator]
+                module.running_var.uniform_(0.5, 2)  # type: ignore[operator]
+                module.weight.uniform_(0.5, 1.5)
+                module.bias.uniform_(-1, 1)
+
+
+def forward_time(game_net: GameNet[Any], states_tensor: torch.Tensor) -> float:
+    # Milliseconds per forward pass
+    game_net.net.eval()
+    with torch.autograd.no_grad():
+        game_net.forward(states_tensor)
+        repeats = max(5, 512 // len(states_tensor))
+        start = time.perf_counter()
+        for _ in range(repeats):
+            game_net.forward(states_tensor)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+if __name__ == "__main__":
+    torch.manual_seed(0)
+    random.seed(0)
+    torch.set_num_threads(1)
+    for game_net in [
+        ConvolutionalHexNet(5),
+        ConvolutionalHexWithSwapNet(5),
+        ConvolutionalOthelloNet(6),
+        ConvolutionalTicTacToeNet(),
+        FullyConnectedTicTacToeNet(),
+    ]:
+        randomize_batch_norms(game_net)
+        inference_net = game_net.to_inference()
+        assert inference_net.to_inference() is inference_net
+        states = random_states(game_net.manager, 100)
+        values, probabilities = game_net.evaluate_batch(states)
+        inference_values, inference_probabilities = inference_net.evaluate_batch(states)
+        assert np.allclose(values, inference_values, atol=1e-5)
+        assert np.allclose(probabilities, inference_probabilities, atol=1e-5)
+        for state, value in zip(states[:10], values):
+            assert abs(inference_net.evaluate(state)[0] - value) < 1e-5
+        print(f"{type(game_net).__name__}: inference copy matches the network")
+
+    for name, game_net in [
+        ("Hex 11x11", ConvolutionalHexNet(11)),
+        ("Othello 8x8", ConvolutionalOthelloNet(8)),
+        ("Tic-tac-toe, fully connected", FullyConnectedTicTacToeNet()),
+    ]:
+        inference_net = game_net.to_inference()
+        states = random_states(game_net.manager, 256)
+        for batch_size in [1, 4, 16, 64, 256]:
+            states_tensor = game_net.states_to_tensor(states[:batch_size]).float()
+            eager = forward_time(game_net, states_tensor)
+            inference = forward_time(inference_net, states_tensor)
+            print(
+                f"{name}, batch size {batch_size}: {eager:.3f} -> {inference:.3f} "
+                f"ms per forward pass ({eager / inference:.2f}x)"
+            )
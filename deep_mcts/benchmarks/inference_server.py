@@ -0,0 +1,81 @@
+import random
+import time
+from typing import List, Optional, Union
+
+import numpy as np
+import torch
+from torch import multiprocessing
+
+from deep_mcts.benchmarks.common import random_states
+from deep_mcts.hex.convolutionalnet import ConvolutionalHexNet
+from deep_mcts.hex.game import HexState
+from deep_mcts.inference_server import InferenceClient, InferenceServers
+
+
+def evaluate_one_at_a_time(
+    process_number: int,
+    game_net: ConvolutionalHexNet,
+    clients: Optional[List[InferenceClient[HexState]]],
+    num_states: int,
+    durations: torch.Tensor,
+) -> None:
+    # Like a self-play process whose evaluations all miss the cache
+    torch.set_num_threads(1)
+    random.seed(process_number)
+    evaluator: Union[ConvolutionalHexNet, InferenceClient[HexState]] = game_net
+    if clients is not None:
+        evaluator = clients[process_number]
+    states = random_states(game_net.manager, num_states)
+    start = time.perf_counter()
+    for state in states:
+        evaluator.evaluate(state)
+    durations[process_number] = time.perf_counter() - start
+
+
+def states_per_second(
+    game_net: ConvolutionalHexNet,
+    num_processes: int,
+    num_states: int,
+    servers: Optional[InferenceServers[HexState]],
+) -> float:
+    durations = torch.zeros(num_processes).share_memory_()
+    multiprocessing.spawn(
+        evaluate_one_at_a_time,
+        (
+            game_net,
+            servers.clients if servers is not None else None,
+            num_states,
+            durations,
+        ),
+        nprocs=num_processes,
+    )
+    return num_processes * num_states / float(durations.max())
+
+
+if __name__ == "__main__":
+    torch.manual_seed(0)
+    random.seed(0)
+    game_net = ConvolutionalHexNet(6)
+    servers = InferenceServers(game_net, 1, 2, max_batch_size=8)
+    states = random_states(game_net.manager, 20)
+    for (value, policy), (client_value, client_policy) in zip(
+        game_net.evaluate_states(states), servers.clients[1].evaluate_states(states)
+    ):
+        assert abs(value - client_value) < 1e-5
+        assert np.allclose(policy, client_policy, atol=1e-6)
+    servers.close()
+    print("Inference server evaluations match GameNet.evaluate_states")
+
+    num_states = 300
+    for num_processes in [4, 8, 16]:
+        local = states_per_second(game_net, num_processes, num_states, None)
+        servers = InferenceServers(
+            game_net, 1, num_processes, max_batch_size=num_processes, max_delay=0.005
+        )
+        served = states_per_second(game_net, num_processes, num_states, servers)
+        servers.close()
+        print(
+            f"{num_processes} processes evaluating one state at a time: "
+            f"{local:.0f} states/s with their own networks, {served:.0f} states/s "
+            f"through an inference server"
+        )
@@ -0,0 +1,148 @@
+import pickle
+import random
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from deep_mcts.benchmarks.common import uniform_state_evaluator
+from deep_mcts.cache import Cache, CacheStats
+from deep_mcts.game import Action, GameManager, Outcome
+from deep_mcts.hex.game import HexManager
+from deep_mcts.mcts import MCTS
+from deep_mcts.othello.game import OthelloManager, OthelloState
+
+
+class LruCacheOthelloManager(OthelloManager):
+    # The methods cached with functools.lru_cache on the class, as before the
+    # per-instance caches
+    @lru_cache(maxsize=2 ** 20)
+    def generate_child_state(self, state: OthelloState, action: Action) -> OthelloState:
+        return OthelloManager.generate_child_state.__wrapped__(  # type: ignore[attr-defined, no-any-return]
+            self, state, action
+        )
+
+    @lru_cache(maxsize=2 ** 20)
+    def legal_actions(self, state: OthelloState) -> List[Action]:
+        return OthelloManager.legal_actions.__wrapped__(  # type: ignore[attr-defined, no-any-return]
+            self, state
+        )
+
+    @lru_cache(maxsize=2 ** 20)
+    def is_final_state(self, state: OthelloState) -> bool:
+        return OthelloManager.is_final_state.__wrapped__(  # type: ignore[attr-defined, no-any-return]
+            self, state
+        )
+
+    @lru_cache(maxsize=2 ** 20)
+    def evaluate_final_state(self, state: OthelloState) -> Outcome:
+        return OthelloManager.evaluate_final_state.__wrapped__(  # type: ignore[attr-defined, no-any-return]
+            self, state
+        )
+
+
+def check_cache() -> None:
+    for policy in ["lru", "clock"]:
+        cache = Cache(max_entries=2, policy=policy)
+        cache.put(1, "a")
+        cache.put(2, "b")
+        assert cache.get(1) == "a"
+        cache.put(3, "c")
+        # Both policies keep the entry that was hit and evict the other one
+        assert cache.get(2) is None and cache.get(1) == "a" and cache.get(3) == "c"
+        assert cache.stats() == CacheStats(
+            hits=3, misses=1, evictions=1, entries=2, bytes=0
+        )
+        cache.clear()
+        assert cache.get(1) is None and cache.stats().entries == 0
+
+    # LRU keeps the entries hit last, while CLOCK clears the references of
+    # every entry it passes and then evicts the oldest one
+    lru, clock = Cache(max_entries=3), Cache(max_entries=3, policy="clock")
+    for cache in [lru, clock]:
+        for key in [1, 2, 3]:
+            cache.put(key, key)
+        for key in [3, 2, 1]:
+            cache.get(key)
+        cache.put(4, 4)
+    assert list(lru.entries) == [2, 1, 4]
+    assert list(clock.entries) == [2, 3, 4]
+
+    manager = HexManager(5)
+    manager.configure_caches(max_entries=None, max_bytes=20_000)
+    state = manager.initial_game_state()
+    while not manager.is_final_state(state):
+        state = manager.generate_child_state(
+            state, random.choice(manager.legal_actions(state))
+        )
+        for cache in manager.caches.values():
+            assert cache.bytes <= 20_000
+            assert cache.bytes == sum(entry[1] for entry in cache.entries.values())
+    assert sum(stats.evictions for stats in manager.cache_stats().values()) > 0
+
+    # The caches are per instance and aren't pickled
+    other_manager = HexManager(5)
+    assert other_manager.cache_stats() == {}
+    assert pickle.loads(pickle.dumps(manager)).cache_stats() == {}
+    manager.clear_caches()
+    assert all(stats.entries == 0 for stats in manager.cache_stats().values())
+
+
+def run_search(
+    manager: GameManager[Any], num_simulations: int, num_moves: int
+) -> float:
+    mcts = MCTS(manager, num_simulations, None, uniform_state_evaluator(manager))
+    start = time.perf_counter()
+    for _ in range(num_moves):
+        action_probabilities, _ = mcts.step()
+        mcts.make_move(int(np.argmax(action_probabilities)))
+    return num_simulations * num_moves / (time.perf_counter() - start)
+
+
+def hit_ratios(stats: Dict[str, CacheStats]) -> str:
+    return ", ".join(
+        f"{name.split('.')[-1]} {method_stats.hit_ratio * 100:.0f}%"
+        for name, method_stats in stats.items()
+    )
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    check_cache()
+    print("Cache: LRU and CLOCK eviction, byte limits and stats behave as expected")
+
+    configurations: List[Tuple[str, Optional[int], Optional[int], str]] = [
+        ("LRU, 2^20 entries", 2 ** 20, None, "lru"),
+        ("CLOCK, 2^20 entries", 2 ** 20, None, "clock"),
+        ("LRU, 2^12 entries", 2 ** 12, None, "lru"),
+        ("CLOCK, 2^12 entries", 2 ** 12, None, "clock"),
+        ("LRU, 4 MB", None, 4 * 2 ** 20, "lru"),
+    ]
+    for grid_size, num_simulations in [(6, 2000), (8, 1000)]:
+        manager: GameManager[Any] = LruCacheOthelloManager(grid_size)
+        speed = run_search(manager, num_simulations, num_moves=10)
+        print(f"{grid_size}x{grid_size} Othello, lru_cache: {speed:.0f} simulations/s")
+        for name, max_entries, max_bytes, policy in configurations:
+            manager = OthelloManager(grid_size)
+            manager.configure_caches(max_entries, max_bytes, policy)
+            speed = run_search(manager, num_simulations, num_moves=10)
+            stats = manager.cache_stats()
+            evictions = sum(method_stats.evictions for method_stats in stats.values())
+            print(
+                f"{grid_size}x{grid_size} Othello, {name}: {speed:.0f} simulations/s, "
+                f"{evictions} evictions, hits: {hit_ratios(stats)}"
+            )
+
+    hex_manager = HexManager(7)
+    speed = run_search(hex_manager, num_simulations=2000, num_moves=10)
+    print(
+        f"7x7 Hex, LRU, 2^20 entries: {speed:.0f} simulations/s, "
+        f"hits: {hit_ratios(hex_manager.cache_stats())}"
+    )
+    # The states of large boards are the most expensive to measure
+    for name, max_entries, max_bytes, policy in [configurations[0], configurations[4]]:
+        hex_manager = HexManager(13)
+        hex_manager.configure_caches(max_entries, max_bytes, policy)
+        speed = run_search(hex_manager, num_simulations=1000, num_moves=5)
+        print(f"13x13 Hex, {name}: {speed:.0f} simulations/s")
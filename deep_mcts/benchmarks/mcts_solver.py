@@ -0,0 +1,172 @@
+import random
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from deep_mcts.game import GameManager, Player, State
+from deep_mcts.hex.game import HexManager
+from deep_mcts.hex_with_swap.game import HexWithSwapManager
+from deep_mcts.mcts import MCTS
+from deep_mcts.othello.game import OthelloManager
+from deep_mcts.tictactoe.game import TicTacToeManager
+
+
+def minimax(
+    manager: GameManager[Any], state: State, values: Dict[State, float]
+) -> float:
+    if state not in values:
+        if manager.is_final_state(state):
+            values[state] = manager.evaluate_final_state(state).value
+        else:
+            child_values = [
+                minimax(manager, manager.generate_child_state(state, action), values)
+                for action in manager.legal_actions(state)
+            ]
+            if state.player == Player.max_player():
+                values[state] = max(child_values)
+            else:
+                values[state] = min(child_values)
+    return values[state]
+
+
+def random_position(manager: GameManager[Any], num_moves: int) -> State:
+    while True:
+        state = manager.initial_game_state()
+        for _ in range(num_moves):
+            if manager.is_final_state(state):
+                break
+            state = manager.generate_child_state(
+                state, random.choice(manager.legal_actions(state))
+            )
+        if not manager.is_final_state(state):
+            return state
+
+
+def solver_mcts(
+    manager: GameManager[Any], num_simulations: int, solver: bool, **kwargs: Any
+) -> MCTS[Any]:
+    return MCTS(
+        manager,
+        num_simulations,
+        None,
+        None,
+        random_rollouts=1,
+        solver=solver,
+        **kwargs,
+    )
+
+
+def check_proofs(manager: GameManager[Any], num_moves: int) -> None:
+    values: Dict[State, float] = {}
+    for kwargs in [{}, {"transposition_table_size": 10000}, {"leaf_batch_size": 8}]:
+        for _ in range(10):
+            state = random_position(manager, num_moves)
+            value = minimax(manager, state, values)
+            mcts = solver_mcts(manager, 10 ** 5, True, **kwargs)
+            mcts.set_state(state)
+            action_probabilities, _ = mcts.step()
+            assert mcts.is_solved() and mcts.root.proven == value
+            # Every move given a probability keeps the proven value
+            for action in np.flatnonzero(action_probabilities):
+                child = manager.generate_child_state(state, int(action))
+                assert minimax(manager, child, values) == value
+            # The proof carries over to the next move, so there is nothing left
+            # to search
+            mcts.make_move(int(np.argmax(action_probabilities)))
+            if not manager.is_final_state(mcts.state):
+                _, (with_expansion, without_expansion, _) = mcts.step()
+                assert with_expansion + without_expansion == 0
+
+
+def early_stopping_moves(
+    manager: GameManager[Any], num_moves: int, num_positions: int
+) -> int:
+    # The number of positions where early stopping changes the move chosen by
+    # the solver. The random rollouts are seeded the same for both searches.
+    changed = 0
+    for i in range(num_positions):
+        state = random_position(manager, num_moves)
+        actions = []
+        for early_stopping in [False, True]:
+            random.seed(i)
+            np.random.seed(i)
+            mcts = solver_mcts(manager, 200, True, early_stopping=early_stopping)
+            mcts.set_state(state)
+            action_probabilities, _ = mcts.step()
+            actions.append(int(np.argmax(action_probabilities)))
+        changed += actions[0] != actions[1]
+    return changed
+
+
+def play_endgames(
+    manager: GameManager[Any],
+    states: List[State],
+    num_simulations: int,
+    solver: bool,
+) -> Tuple[float, float, float]:
+    # Average simulations and seconds per move, and the share of moves that
+    # keep a won position won
+    values: Dict[State, float] = {}
+    simulations = 0
+    moves = 0
+    winning_moves = 0
+    won_positions = 0
+    start = time.perf_counter()
+    for state in states:
+        mcts = solver_mcts(manager, num_simulations, solver)
+        mcts.set_state(state)
+        while not manager.is_final_state(mcts.state):
+            action_probabilities, (with_expansion, without_expansion, _) = mcts.step()
+            simulations += with_expansion + without_expansion
+            moves += 1
+            action = int(np.argmax(action_probabilities))
+            if minimax(manager, mcts.state, values) == mcts.state.player.win().value:
+                won_positions += 1
+                child = manager.generate_child_state(mcts.state, action)
+                winning_moves += minimax(manager, child, values) == (
+                    mcts.state.player.win().value
+                )
+            mcts.make_move(action)
+    duration = time.perf_counter() - start
+    return simulations / moves, duration / moves, winning_moves / won_positions
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    np.random.seed(0)
+    for name, manager, num_moves in [
+        ("Tic-tac-toe", TicTacToeManager(), 3),
+        ("Hex 3x3", HexManager(3), 2),
+        ("Hex with swap 3x3", HexWithSwapManager(3), 2),
+        ("Othello 4x4", OthelloManager(4), 6),
+    ]:
+        check_proofs(manager, num_moves)
+        print(f"{name}: proven values and moves match minimax")
+
+    for name, manager, num_moves, num_positions in [
+        ("Tic-tac-toe", TicTacToeManager(), 2, 200),
+        ("Hex 4x4", HexManager(4), 2, 200),
+        ("Othello 4x4", OthelloManager(4), 4, 100),
+    ]:
+        changed = early_stopping_moves(manager, num_moves, num_positions)
+        print(
+            f"{name}: early stopping with the solver changes the move in "
+            f"{changed}/{num_positions} positions"
+        )
+
+    for grid_size, num_empty in [(5, 9), (6, 9)]:
+        manager = HexManager(grid_size)
+        states = [
+            random_position(manager, grid_size ** 2 - num_empty) for _ in range(20)
+        ]
+        results = [
+            play_endgames(manager, states, 400, solver) for solver in [False, True]
+        ]
+        print(
+            f"Hex {grid_size}x{grid_size} endgames from {num_empty} empty cells, "
+            f"per move: {results[0][0]:.0f} -> {results[1][0]:.0f} simulations, "
+            f"{results[0][1] * 1000:.1f} -> {results[1][1] * 1000:.1f} ms, "
+            f"winning moves in won positions {results[0][2]:.1%} -> "
+            f"{results[1][2]:.1%}"
+        )
@@ -0,0 +1,47 @@
+import resource
+from multiprocessing import Pool
+from typing import Optional, Tuple
+
+import numpy as np
+
+from deep_mcts.benchmarks.common import uniform_state_evaluator
+from deep_mcts.hex.game import HexManager
+from deep_mcts.mcts import MCTS
+
+
+def run_search(
+    max_nodes: Optional[int], grid_size: int, time_per_move: float, num_moves: int
+) -> Tuple[int, int, int]:
+    manager = HexManager(grid_size)
+
+    # Search on time alone, like evaluate_complex_rollouts
+    mcts = MCTS(
+        manager,
+        float("inf"),  # type: ignore[arg-type]
+        None,
+        uniform_state_evaluator(manager),
+        time_per_move=time_per_move,
+        max_nodes=max_nodes,
+    )
+    max_num_nodes = 0
+    for _ in range(num_moves):
+        action_probabilities, _ = mcts.step()
+        max_num_nodes = max(max_num_nodes, mcts.num_nodes)
+        mcts.make_move(int(np.argmax(action_probabilities)))
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_num_nodes, mcts.nbytes(), peak_rss
+
+
+if __name__ == "__main__":
+    for max_nodes in [None, 10 ** 5]:
+        # Each configuration runs in a fresh process so peak RSS is not shared
+        with Pool(processes=1) as pool:
+            max_num_nodes, nbytes, peak_rss = pool.apply(
+                run_search, (max_nodes, 9, 5.0, 10)
+            )
+        print(
+            f"max_nodes={max_nodes}: at most {max_num_nodes} nodes, "
+            f"{nbytes / 2 ** 20:.1f} MiB in the tree at the end, "
+            f"peak RSS {peak_rss / 1024:.1f} MiB"
+        )
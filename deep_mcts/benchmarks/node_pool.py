@@ -0,0 +1,44 @@
+import resource
+import time
+from multiprocessing import Pool
+from typing import Tuple
+
+import numpy as np
+
+from deep_mcts.benchmarks.common import uniform_state_evaluator
+from deep_mcts.hex.game import HexManager
+from deep_mcts.mcts import MCTS
+from deep_mcts.node_pool import PooledMCTS
+
+
+def run_search(
+    pooled: bool, grid_size: int, num_simulations: int, num_moves: int
+) -> Tuple[float, int]:
+    manager = HexManager(grid_size)
+
+    mcts_cls = PooledMCTS if pooled else MCTS
+    mcts = mcts_cls(manager, num_simulations, None, uniform_state_evaluator(manager))
+    start = time.perf_counter()
+    for _ in range(num_moves):
+        action_probabilities, _ = mcts.step()
+        mcts.make_move(int(np.argmax(action_probabilities)))
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return num_simulations * num_moves / elapsed, peak_rss
+
+
+if __name__ == "__main__":
+    grid_size = 11
+    num_simulations = 1000
+    num_moves = 10
+    for pooled, name in [(False, "Node"), (True, "NodePool")]:
+        # Each configuration runs in a fresh process so peak RSS is not shared
+        with Pool(processes=1) as pool:
+            simulations_per_second, peak_rss = pool.apply(
+                run_search, (pooled, grid_size, num_simulations, num_moves)
+            )
+        print(
+            f"{name}: {simulations_per_second:.0f} simulations/s, "
+            f"peak RSS {peak_rss / 1024:.1f} MiB"
+        )
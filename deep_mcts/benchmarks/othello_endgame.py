@@ -0,0 +1,128 @@
+import random
+import time
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from deep_mcts.benchmarks.common import uniform_state_evaluator
+from deep_mcts.game import CellState, Player
+from deep_mcts.mcts import MCTS
+from deep_mcts.othello.bitboard import BitboardOthelloManager
+from deep_mcts.othello.endgame import OthelloEndgameSolver
+from deep_mcts.othello.game import OthelloManager, OthelloState
+
+
+def num_empty(state: OthelloState) -> int:
+    return sum(cell == CellState.EMPTY for row in state.grid for cell in row)
+
+
+def random_endgame(manager: OthelloManager, max_empty: int) -> OthelloState:
+    # A position reached by random moves with at most max_empty empty cells,
+    # where the game isn't over yet
+    while True:
+        state = manager.initial_game_state()
+        while num_empty(state) > max_empty and not manager.is_final_state(state):
+            state = manager.generate_child_state(
+                state, random.choice(manager.legal_actions(state))
+            )
+        if not manager.is_final_state(state):
+            return state
+
+
+def minimax(manager: OthelloManager, state: OthelloState) -> float:
+    if manager.is_final_state(state):
+        return manager.evaluate_final_state(state).value  # type: ignore[no-any-return]
+    values = [
+        minimax(manager, manager.generate_child_state(state, action))
+        for action in manager.legal_actions(state)
+    ]
+    return max(values) if state.player == Player.max_player() else min(values)
+
+
+def play_endgame(
+    manager: OthelloManager,
+    state: OthelloState,
+    num_simulations: int,
+    endgame_solver: Optional[OthelloEndgameSolver],
+) -> Tuple[float, int]:
+    # Play the game out with MCTS, returning the time it took and the number
+    # of states given to the evaluator, which would be network evaluations
+    evaluations = 0
+    state_evaluator = uniform_state_evaluator(manager)
+
+    def counting_state_evaluator(state: OthelloState) -> Tuple[float, Sequence[float]]:
+        nonlocal evaluations
+        evaluations += 1
+        return state_evaluator(state)
+
+    mcts = MCTS(
+        manager,
+        num_simulations,
+        None,
+        counting_state_evaluator,
+        endgame_solver=endgame_solver,
+    )
+    mcts.set_state(state)
+    start = time.perf_counter()
+    while not manager.is_final_state(mcts.state):
+        action_probabilities, _ = mcts.step()
+        mcts.make_move(int(np.argmax(action_probabilities)))
+    return time.perf_counter() - start, evaluations
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    for grid_size, max_empty in [(4, 12), (6, 8), (8, 7)]:
+        manager = OthelloManager(grid_size)
+        bitboard_manager = BitboardOthelloManager(grid_size)
+        solver = OthelloEndgameSolver(grid_size, max_empty=max_empty)
+        for _ in range(20):
+            state = random_endgame(manager, max_empty)
+            value = minimax(manager, state)
+            assert solver(state) == value
+            bitboard_state = bitboard_manager.unstack_states(
+                manager.stack_states([state])
+            )[0]
+            assert OthelloEndgameSolver(grid_size, max_empty)(bitboard_state) == value
+        assert solver(manager.initial_game_state()) is None or grid_size == 4
+        print(f"{grid_size}x{grid_size}: solver matches minimax")
+
+    for grid_size, empties in [(6, [8, 10, 12]), (8, [8, 10, 12])]:
+        manager = OthelloManager(grid_size)
+        for max_empty in empties:
+            solver = OthelloEndgameSolver(grid_size, max_empty=max_empty)
+            states = [random_endgame(manager, max_empty) for _ in range(10)]
+            for state in states:
+                solver(state)
+            print(
+                f"{grid_size}x{grid_size}, {max_empty} empty: "
+                f"{solver.solve_time / len(states) * 1000:.1f} ms/position, "
+                f"{solver.nodes / len(states):.0f} nodes/position, "
+                f"{solver.nodes_per_second():.0f} nodes/s"
+            )
+
+    # The end of self-play games, from 14 empty cells. The evaluator is free
+    # here, so the time only shows the cost of solving, and every evaluation
+    # saved would be a network evaluation in training.
+    for grid_size, num_simulations in [(6, 200), (8, 200)]:
+        manager = OthelloManager(grid_size)
+        endgames = [random_endgame(manager, 14) for _ in range(5)]
+        results = []
+        for endgame_solver in [None, OthelloEndgameSolver(grid_size)]:
+            total_time = 0.0
+            total_evaluations = 0
+            for state in endgames:
+                elapsed, evaluations = play_endgame(
+                    OthelloManager(grid_size), state, num_simulations, endgame_solver
+                )
+                total_time += elapsed
+                total_evaluations += evaluations
+            results.append(
+                (total_time / len(endgames), total_evaluations / len(endgames))
+            )
+        print(
+            f"{grid_size}x{grid_size} endgames from 14 empty cells, "
+            f"{num_simulations} simulations/move: {results[0][0]:.2f} s and "
+            f"{results[0][1]:.0f} evaluations without the solver, "
+            f"{results[1][0]:.2f} s and {results[1][1]:.0f} evaluations with it"
+        )
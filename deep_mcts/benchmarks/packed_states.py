@@ -0,0 +1,103 @@
+import pickle
+import random
+import sys
+import time
+from typing import Any, Callable, List
+
+from deep_mcts.benchmarks.common import random_games
+from deep_mcts.game import GameManager, GridState, PackedGridState
+from deep_mcts.hex.game import HexManager
+from deep_mcts.othello.game import OthelloManager
+from deep_mcts.tictactoe.game import TicTacToeManager
+
+
+def state_size(state: GridState) -> int:
+    # The memory owned by the state. CellState and Player members are shared.
+    if isinstance(state, PackedGridState):
+        return sys.getsizeof(state) + sys.getsizeof(state.cells)
+    return (
+        sys.getsizeof(state)
+        + sys.getsizeof(state.grid)
+        + sum(sys.getsizeof(row) for row in state.grid)
+    )
+
+
+def time_per_state(
+    function: Callable[[GridState], Any], states: List[GridState]
+) -> float:
+    start = time.perf_counter()
+    for state in states:
+        function(state)
+    return (time.perf_counter() - start) / len(states) * 1e9
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    managers: List[GameManager[Any]] = [
+        TicTacToeManager(),
+        HexManager(7),
+        HexManager(13),
+        OthelloManager(8),
+    ]
+    for manager in managers:
+        states = random_games(manager, num_games=20)
+        packed_states = [manager.pack_state(state) for state in states]
+        for state, packed_state in zip(states, packed_states):
+            assert isinstance(packed_state, type(state))
+            assert packed_state.grid == state.grid
+            assert packed_state.key == state.key
+            assert str(packed_state) == str(state)
+            assert (packed_state.array() == state.array()).all()
+            assert pickle.loads(pickle.dumps(packed_state)) == packed_state
+        # Compare with copies, so the equality can't be decided by identity
+        name = f"{type(manager).__name__}({manager.grid_size})"
+        for label, values in [("tuples", states), ("packed", packed_states)]:
+            pairs = list(zip(values, pickle.loads(pickle.dumps(values))))
+            size = sum(map(state_size, values)) / len(values)
+            single_pickle_size = sum(len(pickle.dumps(state)) for state in values)
+            # Self-play games are pickled as lists, so rows and enum members
+            # shared between the states of a game are only pickled once
+            start = time.perf_counter()
+            pickled_values = pickle.dumps(values)
+            pickle.loads(pickled_values)
+            pickle_time = (time.perf_counter() - start) / len(values) * 1e9
+            hash_time = time_per_state(hash, values)
+            start = time.perf_counter()
+            for state, copy in pairs:
+                state == copy
+            equal_time = (time.perf_counter() - start) / len(values) * 1e9
+            print(
+                f"{name} {label}: {size:.0f} bytes/state, "
+                f"{single_pickle_size / len(values):.0f} bytes pickled alone, "
+                f"{len(pickled_values) / len(values):.0f} bytes pickled in a list, "
+                f"pickling {pickle_time:.0f} ns, hash {hash_time:.0f} ns, "
+                f"equality {equal_time:.0f} ns"
+            )
+
+    try:
+        import torch  # noqa: F401
+    except ImportError:
+        print("torch not installed, skipping states_to_tensor check")
+    else:
+        from deep_mcts.hex.convolutionalnet import ConvolutionalHexNet
+        from deep_mcts.othello.convolutionalnet import ConvolutionalOthelloNet
+
+        for manager, net in [
+            (HexManager(7), ConvolutionalHexNet(7)),
+            (OthelloManager(8), ConvolutionalOthelloNet(8)),
+        ]:
+            states = random_games(manager, num_games=50)
+            packed_states = [manager.pack_state(state) for state in states]
+            assert net.states_to_tensor(states).equal(
+                net.states_to_tensor(packed_states)
+            )
+            times = []
+            for values in [states, packed_states]:
+                start = time.perf_counter()
+                for _ in range(10):
+                    net.states_to_tensor(values)
+                times.append((time.perf_counter() - start) / 10 / len(values) * 1e6)
+            print(
+                f"{type(net).__name__}.states_to_tensor: identical tensors, "
+                f"{times[0]:.1f} us/state for tuples, {times[1]:.1f} us/state packed"
+            )
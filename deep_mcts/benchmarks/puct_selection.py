@@ -0,0 +1,92 @@
+import timeit
+from math import sqrt
+from typing import Dict, Tuple
+
+import numpy as np
+
+from deep_mcts.game import Action, Player
+from deep_mcts.mcts import select_child
+
+
+class ScalarNode:
+    # The per-object node layout used before children were stored in arrays
+    __slots__ = ["value_sum", "visits", "probability"]
+
+    def __init__(self, value_sum: float, visits: int, probability: float) -> None:
+        self.value_sum = value_sum
+        self.visits = visits
+        self.probability = probability
+
+    def u(self, parent_visits: int) -> float:
+        assert self.probability != -1.0
+        c = 1.25
+        return c * self.probability * sqrt(parent_visits) / (1 + self.visits)
+
+    def value(self, player: Player) -> float:
+        value: float
+        if self.visits == 0:
+            assert self.value_sum == 0
+            value = player.loss().value
+        else:
+            value = self.value_sum / self.visits
+        assert 0.0 <= value <= 1.0
+        return value
+
+
+def select_scalar(
+    children: Dict[Action, ScalarNode], parent_visits: int, player: Player
+) -> Action:
+    if player == Player.max_player():
+        action, _ = max(
+            children.items(),
+            key=lambda a_n: a_n[1].value(player) + a_n[1].u(parent_visits),
+        )
+    else:
+        action, _ = min(
+            children.items(),
+            key=lambda a_n: a_n[1].value(player) - a_n[1].u(parent_visits),
+        )
+    return action
+
+
+def random_children(
+    branching_factor: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    visits = np.random.randint(0, 20, size=branching_factor).astype(np.float64)
+    value_sums = visits * np.random.random(branching_factor)
+    probabilities = np.random.dirichlet([1.0] * branching_factor)
+    return visits, value_sums, probabilities, int(visits.sum()) + 1
+
+
+if __name__ == "__main__":
+    number = 10000
+    for branching_factor in [9, 36, 121, 169]:
+        visits, value_sums, probabilities, parent_visits = random_children(
+            branching_factor
+        )
+        children = {
+            action: ScalarNode(
+                value_sums[action], int(visits[action]), probabilities[action]
+            )
+            for action in range(branching_factor)
+        }
+        for player in Player:
+            assert select_scalar(children, parent_visits, player) == select_child(
+                visits, value_sums, probabilities, parent_visits, player
+            )
+        scalar_time = timeit.timeit(
+            lambda: select_scalar(children, parent_visits, Player.max_player()),
+            number=number,
+        )
+        vectorized_time = timeit.timeit(
+            lambda: select_child(
+                visits, value_sums, probabilities, parent_visits, Player.max_player()
+            ),
+            number=number,
+        )
+        print(
+            f"{branching_factor:>3} children: "
+            f"scalar {scalar_time / number * 1e6:.1f} us, "
+            f"vectorized {vectorized_time / number * 1e6:.1f} us, "
+            f"speedup {scalar_time / vectorized_time:.1f}x"
+        )
@@ -0,0 +1,94 @@
+import math
+import random
+from typing import Any
+
+import numpy as np
+import torch
+
+from deep_mcts.benchmarks.common import random_states
+from deep_mcts.benchmarks.inference_export import forward_time, randomize_batch_norms
+from deep_mcts.gamenet import GameNet
+from deep_mcts.hex.convolutionalnet import ConvolutionalHexNet
+from deep_mcts.mcts import MCTS, MCTSAgent
+from deep_mcts.othello.convolutionalnet import ConvolutionalOthelloNet
+from deep_mcts.tictactoe.fullyconnectednet import FullyConnectedTicTacToeNet
+from deep_mcts.tournament import compare_agents
+from deep_mcts.train import cached_state_evaluator
+
+
+def calibration_states(game_net: GameNet[Any], n: int) -> torch.Tensor:
+    # Stand-ins for states from the replay buffer
+    return game_net.states_to_tensor(random_states(game_net.manager, n))
+
+
+def mcts_agent(game_net: GameNet[Any], num_simulations: int) -> MCTSAgent[Any]:
+    return MCTSAgent(
+        MCTS(
+            game_net.manager,
+            num_simulations,
+            None,
+            cached_state_evaluator(game_net),
+            sample_move_cutoff=4,
+            dirichlet_alpha=1.0,
+        )
+    )
+
+
+if __name__ == "__main__":
+    torch.manual_seed(0)
+    random.seed(0)
+    np.random.seed(0)
+    torch.set_num_threads(1)
+    for name, game_net in [
+        ("Hex 11x11", ConvolutionalHexNet(11)),
+        ("Othello 8x8", ConvolutionalOthelloNet(8)),
+        ("Tic-tac-toe, fully connected", FullyConnectedTicTacToeNet()),
+    ]:
+        randomize_batch_norms(game_net)
+        inference_net = game_net.to_inference()
+        quantized_net = game_net.to_quantized(calibration_states(game_net, 256))
+        states = random_states(game_net.manager, 256)
+        values, probabilities = game_net.evaluate_batch(states)
+        quantized_values, quantized_probabilities = quantized_net.evaluate_batch(states)
+        print(
+            f"{name}: largest error {np.abs(values - quantized_values).max():.4f} "
+            f"in the values and "
+            f"{np.abs(probabilities - quantized_probabilities).max():.4f} in the "
+            f"probabilities, same most probable move in "
+            f"{np.mean(probabilities.argmax(1) == quantized_probabilities.argmax(1)):.1%}"
+            f" of the states"
+        )
+        for batch_size in [1, 16, 64, 256]:
+            states_tensor = game_net.states_to_tensor(states[:batch_size]).float()
+            fp32 = forward_time(inference_net, states_tensor)
+            int8 = forward_time(quantized_net, states_tensor)
+            print(
+                f"{name}, batch size {batch_size}: {fp32:.3f} ms in fp32, "
+                f"{int8:.3f} ms in int8 per forward pass ({fp32 / int8:.2f}x)"
+            )
+
+    # The win rate of MCTS with the quantized network against MCTS with the
+    # network it was made from, and the Elo difference it corresponds to
+    num_games = 40
+    for name, game_net, num_simulations in [
+        ("Hex 5x5", ConvolutionalHexNet(5), 50),
+        ("Othello 6x6", ConvolutionalOthelloNet(6), 50),
+        ("Tic-tac-toe, fully connected", FullyConnectedTicTacToeNet(), 50),
+    ]:
+        randomize_batch_norms(game_net)
+        quantized_net = game_net.to_quantized(calibration_states(game_net, 256))
+        wins, draws, _ = compare_agents(
+            (
+                mcts_agent(quantized_net, num_simulations),
+                mcts_agent(game_net, num_simulations),
+            ),
+            num_games,
+            game_net.manager,
+        )
+        score = (sum(wins) + sum(draws) / 2) / 2
+        clamped = min(max(score, 1 / num_games), 1 - 1 / num_games)
+        elo = 400 * math.log10(clamped / (1 - clamped))
+        print(
+            f"{name}, {num_games} games with {num_simulations} simulations per move: "
+            f"int8 scores {score:.1%} against fp32, {elo:+.0f} Elo"
+        )
@@ -0,0 +1,102 @@
+import random
+import tracemalloc
+from typing import Sequence, Set, Tuple
+
+import numpy as np
+
+from deep_mcts.benchmarks.common import uniform_state_evaluator
+from deep_mcts.game import GameManager, State
+from deep_mcts.hex.game import HexManager
+from deep_mcts.mcts import MCTS, MCTSAgent, Node
+from deep_mcts.othello.game import OthelloManager
+from deep_mcts.tournament import compare_agents
+
+
+def count_expansions(root: Node) -> int:
+    # Transpositions share their child statistics, so count distinct arrays
+    seen: Set[int] = set()
+    nodes = [root]
+    while nodes:
+        node = nodes.pop()
+        if node.child_statistics is None or id(node.child_statistics) in seen:
+            continue
+        seen.add(id(node.child_statistics))
+        nodes.extend(node.children.values())
+    return len(seen)
+
+
+def run_search(
+    manager: GameManager[State],
+    transposition_table_size: int,
+    num_simulations: int,
+    num_moves: int,
+) -> Tuple[int, int, float]:
+    num_evaluations = 0
+    state_evaluator = uniform_state_evaluator(manager)
+
+    def counting_state_evaluator(state: State) -> Tuple[float, Sequence[float]]:
+        nonlocal num_evaluations
+        num_evaluations += 1
+        return state_evaluator(state)
+
+    mcts = MCTS(
+        manager,
+        num_simulations,
+        None,
+        counting_state_evaluator,
+        transposition_table_size=transposition_table_size,
+    )
+    tracemalloc.start()
+    for _ in range(num_moves):
+        action_probabilities, _ = mcts.step()
+        mcts.make_move(int(np.argmax(action_probabilities)))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return num_evaluations, count_expansions(mcts.root), peak / num_simulations
+
+
+def compare_strength(
+    manager: GameManager[State], num_simulations: int, num_games: int
+) -> None:
+    def create_agent(transposition_table_size: int) -> MCTSAgent[State]:
+        return MCTSAgent(
+            MCTS(
+                manager,
+                num_simulations,
+                lambda state: random.choice(manager.legal_actions(state)),
+                None,
+                transposition_table_size=transposition_table_size,
+            )
+        )
+
+    agents = (create_agent(2 ** 20), create_agent(0))
+    wins, draws, losses = (
+        sum(result) for result in compare_agents(agents, num_games, manager)
+    )
+    # Every simulation evaluates exactly one new leaf with a rollout, so both
+    # agents use the same number of evaluations per move
+    print(
+        f"  transpositions vs tree with {num_simulations} simulations: "
+        f"{wins / 2:.0%} wins, {draws / 2:.0%} draws, {losses / 2:.0%} losses"
+    )
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    np.random.seed(0)
+    manager: GameManager[State]
+    for name, manager in [
+        ("Hex 7x7", HexManager(7)),
+        ("Othello 6x6", OthelloManager(6)),
+    ]:
+        print(name)
+        for transposition_table_size in [0, 2 ** 20]:
+            evaluations, expansions, bytes_per_simulation = run_search(
+                manager, transposition_table_size, num_simulations=2000, num_moves=5
+            )
+            print(
+                f"  table size {transposition_table_size:>7}: {evaluations} "
+                f"evaluations, {expansions} distinct positions expanded in the "
+                f"final tree, peak {bytes_per_simulation:.0f} bytes/simulation"
+            )
+        compare_strength(manager, num_simulations=200, num_games=20)
@@ -0,0 +1,78 @@
+import time
+from typing import List, Tuple, Type
+
+import numpy as np
+import torch
+
+from deep_mcts.game import State
+from deep_mcts.gamenet import GameNet
+from deep_mcts.hex.convolutionalnet import ConvolutionalHexNet
+from deep_mcts.mcts import MCTS
+from deep_mcts.othello.convolutionalnet import ConvolutionalOthelloNet
+
+
+def simulations_per_second(
+    game_net: GameNet[State], num_threads: int, num_simulations: int, num_moves: int
+) -> Tuple[float, float]:
+    # Also returns the share of the time spent in the state evaluator. The
+    # network is evaluated without a cache so that every simulation
+    # performs a forward pass.
+    evaluation_time = 0.0
+
+    def state_evaluator(state: State) -> Tuple[float, List[float]]:
+        nonlocal evaluation_time
+        start = time.perf_counter()
+        value, probabilities = game_net.evaluate(state)
+        evaluation_time += time.perf_counter() - start
+        return value, probabilities.tolist()
+
+    mcts = MCTS(
+        game_net.manager,
+        num_simulations,
+        rollout_policy=None,
+        state_evaluator=state_evaluator,
+        num_threads=num_threads,
+    )
+    start = time.perf_counter()
+    for _ in range(num_moves):
+        action_probabilities, _ = mcts.step()
+        mcts.make_move(int(np.argmax(action_probabilities)))
+    elapsed = time.perf_counter() - start
+    return num_simulations * num_moves / elapsed, evaluation_time / elapsed
+
+
+if __name__ == "__main__":
+    # The speedups depend on the number of cores. Everything outside the
+    # state evaluator runs under the tree lock, and holds the GIL whatever
+    # the locking, so with a single thread spending a share e of its time in
+    # the evaluator no number of threads or cores can beat 1 / (1 - e). Part
+    # of the evaluator is Python code holding the GIL too, so the real bound
+    # is lower. On a single core, 6x6 Hex and Othello gave e = 0.83 and
+    # 0.89-0.90, bounds of 5.7x and 9-10x, while 2 to 16 threads only
+    # reached 0.90-1.51x, as the forward passes have no other core to
+    # overlap on. Scaling up to those bounds is still to be measured on a
+    # multicore machine.
+    # Let the search threads provide the parallelism
+    torch.set_num_threads(1)
+    net_class: Type[GameNet[State]]
+    for name, net_class, grid_size in [
+        ("Hex", ConvolutionalHexNet, 6),
+        ("Othello", ConvolutionalOthelloNet, 6),
+    ]:
+        game_net = net_class(grid_size)  # type: ignore[call-arg]
+        baseline = None
+        for num_threads in [1, 2, 4, 8, 16]:
+            result, evaluation_share = simulations_per_second(
+                game_net, num_threads, num_simulations=200, num_moves=3
+            )
+            if baseline is None:
+                baseline = result
+                print(
+                    f"{name}: {evaluation_share:.2f} of a single thread's time "
+                    f"in the evaluator, at most {1 / (1 - evaluation_share):.1f}x "
+                    "with more threads"
+                )
+            print(
+                f"{name} {num_threads:>2} threads: {result:.0f} simulations/s "
+                f"({result / baseline:.2f}x)"
+            )
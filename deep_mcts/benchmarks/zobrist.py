@@ -0,0 +1,81 @@
+import random
+import time
+from typing import Any, List, Tuple
+
+import numpy as np
+
+from deep_mcts.benchmarks.common import random_games, uniform_state_evaluator
+from deep_mcts.game import GameManager, GridState, zobrist_key
+from deep_mcts.hex.bitboard import BitboardHexManager
+from deep_mcts.hex.game import HexManager, HexState
+from deep_mcts.hex_with_swap.game import HexWithSwapManager
+from deep_mcts.mcts import MCTS
+from deep_mcts.othello.bitboard import BitboardOthelloManager
+from deep_mcts.othello.game import OthelloManager
+from deep_mcts.tictactoe.game import TicTacToeManager
+
+
+def check_keys(manager: GameManager[Any], num_games: int) -> None:
+    # The keys updated by generate_child_state must match the keys computed
+    # from scratch
+    for state in random_games(manager, num_games):
+        assert state.key == zobrist_key(state.player, state.grid)
+
+
+def time_hashing(states: List[GridState], repeats: int) -> Tuple[float, float]:
+    # Hashing the fields like the dataclass hash did, and hashing the key
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for state in states:
+            hash((state.player, state.grid))
+    field_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for state in states:
+            hash(state)
+    key_time = time.perf_counter() - start
+    return field_time, key_time
+
+
+def time_search(manager: GameManager[Any], num_simulations: int) -> float:
+    mcts = MCTS(manager, num_simulations, None, uniform_state_evaluator(manager))
+    start = time.perf_counter()
+    for _ in range(5):
+        action_probabilities, _ = mcts.step()
+        mcts.make_move(int(np.argmax(action_probabilities)))
+    return 5 * num_simulations / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    managers: List[GameManager[Any]] = [
+        TicTacToeManager(),
+        HexManager(5),
+        HexWithSwapManager(5),
+        BitboardHexManager(7),
+        OthelloManager(6),
+        BitboardOthelloManager(6),
+    ]
+    for manager in managers:
+        check_keys(manager, num_games=200)
+        print(f"{type(manager).__name__}: incremental keys match")
+
+    for grid_size in [7, 13, 19]:
+        states: List[HexState] = random_games(HexManager(grid_size), num_games=20)
+        field_time, key_time = time_hashing(states, repeats=20)
+        print(
+            f"{grid_size}x{grid_size} Hex: {len(states) * 20 / field_time:.0f} "
+            f"field hashes/s, {len(states) * 20 / key_time:.0f} key hashes/s"
+        )
+
+    # MCTS hashes states in the caches of the game managers on every step
+    # of every simulation
+    for manager, num_simulations in [
+        (HexManager(7), 2000),
+        (HexManager(13), 1000),
+        (OthelloManager(6), 2000),
+    ]:
+        print(
+            f"{type(manager).__name__}({manager.grid_size}) search: "
+            f"{time_search(manager, num_simulations):.0f} simulations/s"
+        )
@@ -0,0 +1,49 @@
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from deep_mcts.game import CellState
+
+# Helpers for boards stored as integers with one bit per cell, where bit
+# x + y * grid_size is the cell (x, y), so the bits line up with the actions.
+
+
+def bits(mask: int) -> Iterator[int]:
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+def popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+def array_to_mask(flags: np.ndarray) -> int:
+    # The mask with the bits of the true entries of a flat boolean array
+    return int.from_bytes(np.packbits(flags, bitorder="little").tobytes(), "little")
+
+
+def mask_to_array(mask: int, num_cells: int) -> np.ndarray:
+    # The flat boolean array of the first num_cells bits of the mask
+    return np.unpackbits(
+        np.frombuffer(mask.to_bytes((num_cells + 7) // 8, "little"), dtype=np.uint8),
+        count=num_cells,
+        bitorder="little",
+    ).view(np.bool_)
+
+
+def bitboard_grid(
+    grid_size: int, first_player_stones: int, second_player_stones: int
+) -> Tuple[Tuple[CellState, ...], ...]:
+    return tuple(
+        tuple(
+            CellState.FIRST_PLAYER
+            if first_player_stones >> (x + y * grid_size) & 1
+            else CellState.SECOND_PLAYER
+            if second_player_stones >> (x + y * grid_size) & 1
+            else CellState.EMPTY
+            for x in range(grid_size)
+        )
+        for y in range(grid_size)
+    )
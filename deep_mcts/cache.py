@@ -0,0 +1,203 @@
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple, TypeVar
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+EVICTION_POLICIES = ["lru", "clock"]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+
+class Cache:
+    # Bounded mapping keeping at most max_entries entries or max_bytes bytes
+    # of keys and values, with no limit for None. Measuring an entry with
+    # approximate_size walks all of its objects, every cell of the grid for
+    # a state, so entries are only measured the first time their keys and
+    # values have new types, or containers of new lengths, and later ones
+    # are charged the same. The caches of a manager hold one method each,
+    # whose states have a fixed size for the grid size of the manager. With the LRU policy every hit moves the entry to the end of the
+    # eviction order, while with CLOCK a hit only marks the entry, and marked
+    # entries get a second chance when they come up for eviction. That makes
+    # hits cheaper at the cost of a coarser recency order. A lock makes the
+    # cache safe to share between the threads of a tree parallel search.
+    entries: "OrderedDict[Hashable, List[Any]]"
+    max_entries: Optional[int]
+    max_bytes: Optional[int]
+    policy: str
+    hits: int
+    misses: int
+    evictions: int
+    bytes: int
+    entry_sizes: Dict[Tuple[Tuple[type, int], ...], int]
+    lock: threading.Lock
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = 2 ** 20,
+        max_bytes: Optional[int] = None,
+        policy: str = "lru",
+    ) -> None:
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"unknown eviction policy {policy!r}")
+        # Each entry is [value, size in bytes, referenced since the clock
+        # hand passed it]
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self.entry_sizes = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            if self.policy == "lru":
+                self.entries.move_to_end(key)
+            else:
+                entry[2] = True
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self.entry_size(key, value) if self.max_bytes is not None else 0
+        with self.lock:
+            old_entry = self.entries.pop(key, None)
+            if old_entry is not None:
+                self.bytes -= old_entry[1]
+            # Evict before inserting, so CLOCK can't pick the new entry, which
+            # hasn't been referenced yet
+            while self.entries and (
+                (self.max_entries is not None and len(self.entries) >= self.max_entries)
+                or (self.max_bytes is not None and self.bytes + size > self.max_bytes)
+            ):
+                self._evict()
+            self.entries[key] = [value, size, False]
+            self.bytes += size
+
+    def entry_size(self, key: Hashable, value: Any) -> int:
+        shape = (shape_of(key), shape_of(value))
+        size = self.entry_sizes.get(shape)
+        if size is None:
+            size = self.entry_sizes[shape] = approximate_size((key, value))
+        return size
+
+    def _evict(self) -> None:
+        # Only called with the lock held
+        while True:
+            key, entry = self.entries.popitem(last=False)
+            if not entry[2]:
+                break
+            # Give referenced entries a second chance, only possible for CLOCK
+            entry[2] = False
+            self.entries[key] = entry
+        self.bytes -= entry[1]
+        self.evictions += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self.lock:
+            return CacheStats(
+                self.hits, self.misses, self.evictions, len(self.entries), self.bytes
+            )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Locks can't be pickled, the copy gets a new one
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+
+def shape_of(obj: Any) -> Tuple[type, int]:
+    if isinstance(obj, (tuple, list, dict)):
+        return type(obj), len(obj)
+    return type(obj), 0
+
+
+def approximate_size(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    # Size in bytes of an object and the objects it refers to through
+    # tuples, lists, dicts and slots, counting shared objects once. Enum
+    # members are shared by everything, so they aren't counted.
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, Enum):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (tuple, list)):
+        size += sum(approximate_size(item, seen) for item in obj)
+    elif isinstance(obj, dict):
+        size += sum(
+            approximate_size(key, seen) + approximate_size(value, seen)
+            for key, value in obj.items()
+        )
+    else:
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                # Read the slot itself, in case a subclass shadows it with a
+                # property
+                descriptor = vars(cls).get(name)
+                try:
+                    value = descriptor.__get__(obj, cls)  # type: ignore[union-attr]
+                except AttributeError:
+                    continue
+                size += approximate_size(value, seen)
+    return size
+
+
+def cached(method: _F) -> _F:
+    # Cache the results of a method of a GameManager in a Cache of the
+    # instance, see GameManager.configure_caches. The arguments are the key.
+    # The qualified name keeps overridden methods that call the method they
+    # override from sharing a cache.
+    name = method.__qualname__
+
+    @wraps(method)
+    def wrapper(self: Any, *args: Hashable) -> Any:
+        try:
+            cache = self.caches[name]
+        except KeyError:
+            # setdefault, so threads racing to create the cache share one
+            cache = self.caches.setdefault(name, self.create_cache())
+        key = args[0] if len(args) == 1 else args
+        result = cache.get(key, _missing)
+        if result is _missing:
+            result = method(self, *args)
+            cache.put(key, result)
+        return result
+
+    return wrapper  # type: ignore[return-value]
+
+
+_missing = object()
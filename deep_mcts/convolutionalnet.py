@@ -1,8 +1,9 @@
-from typing import TYPE_CHECKING, Tuple, Callable, TypeVar
+from typing import TYPE_CHECKING, Tuple, Callable, TypeVar, Optional
 
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+import torch.nn.quantized
 
 _T = TypeVar("_T")
 
@@ -19,6 +20,32 @@ class IdentityModule(nn.Module):  # type: ignore[type-arg]
         return x
 
 
+def fold_batch_norm(conv: nn.Conv2d, bn: nn.BatchNorm2d) -> None:
+    # Scale and shift the weights of conv so it computes bn(conv(x)) with the
+    # running statistics of bn, which is what bn does in evaluation mode
+    with torch.no_grad():
+        scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)  # type: ignore[operator]
+        bias = conv.bias if conv.bias is not None else torch.zeros_like(scale)
+        conv.weight.mul_(scale.reshape(-1, 1, 1, 1))
+        conv.bias = nn.Parameter((bias - bn.running_mean) * scale + bn.bias)
+
+
+def fold_batch_norms(module: nn.Module) -> None:  # type: ignore[type-arg]
+    # Fold every batch norm of the blocks of module into the convolution
+    # before it, for a module that is only used for inference
+    for block in list(module.modules()):
+        if isinstance(block, (ConvolutionalBlock, ResidualBlock)):
+            block.fold_batch_norm()
+
+
+def add_float_functionals(module: nn.Module) -> None:  # type: ignore[type-arg]
+    # Give every residual block of module a FloatFunctional for its addition,
+    # which eager mode quantization needs to quantize it
+    for block in list(module.modules()):
+        if isinstance(block, ResidualBlock):
+            block.add = torch.nn.quantized.FloatFunctional()
+
+
 class ConvolutionalNet(TensorPairModule):
     def __init__(
         self,
@@ -79,7 +106,7 @@ class ConvolutionalBlock(TensorModule):
             kernel_size=kernel_size,
             padding=padding,
         )
-        self.bn1 = nn.BatchNorm2d(out_channels)
+        self.bn1: Callable[[torch.Tensor], torch.Tensor] = nn.BatchNorm2d(out_channels)
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:  # type: ignore[override]
         x = self.conv1(x)
@@ -87,6 +114,10 @@ class ConvolutionalBlock(TensorModule):
         x = F.relu(x)
         return x
 
+    def fold_batch_norm(self) -> None:
+        fold_batch_norm(self.conv1, self.bn1)  # type: ignore[arg-type]
+        self.bn1 = IdentityModule()
+
 
 class ResidualBlock(TensorModule):
     def __init__(
@@ -96,14 +127,16 @@ class ResidualBlock(TensorModule):
         self.in_channels = in_channels
         self.out_channels = out_channels
         self.conv1 = nn.Conv2d(in_channels, out_channels, kernel_size, padding=padding)
-        self.bn1 = nn.BatchNorm2d(out_channels)
+        self.bn1: Callable[[torch.Tensor], torch.Tensor] = nn.BatchNorm2d(out_channels)
         self.conv2 = nn.Conv2d(out_channels, out_channels, kernel_size, padding=padding)
-        self.bn2 = nn.BatchNorm2d(out_channels)
+        self.bn2: Callable[[torch.Tensor], torch.Tensor] = nn.BatchNorm2d(out_channels)
         self.projection: Callable[[torch.Tensor], torch.Tensor]
         if in_channels != out_channels:
             self.projection = nn.Conv2d(in_channels, out_channels, kernel_size=1)
         else:
             self.projection = IdentityModule()
+        # Only set in copies for quantization, see add_float_functionals
+        self.add: Optional[torch.nn.quantized.FloatFunctional] = None
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:  # type: ignore[override]
         input = x
@@ -118,7 +151,8 @@ class ResidualBlock(TensorModule):
         x = F.relu(x)
         x = self.conv2(x)
         x = self.bn2(x)
-        x = x + self.projection(input)
+        residual = self.projection(input)
+        x = x + residual if self.add is None else self.add.add(x, residual)
         x = F.relu(x)
         assert x.shape == (
             input.shape[0],
@@ -128,6 +162,12 @@ class ResidualBlock(TensorModule):
         )
         return x
 
+    def fold_batch_norm(self) -> None:
+        fold_batch_norm(self.conv1, self.bn1)  # type: ignore[arg-type]
+        fold_batch_norm(self.conv2, self.bn2)  # type: ignore[arg-type]
+        self.bn1 = IdentityModule()
+        self.bn2 = IdentityModule()
+
 
 class PolicyHead(TensorModule):
     def __init__(
@@ -103,7 +103,4 @@ def evaluate_models(
 def reset_caches(agent: MCTSAgent[_S]) -> None:
     if hasattr(agent.mcts.state_evaluator, "cache_clear"):
         agent.mcts.state_evaluator.cache_clear()  # type: ignore[union-attr]
-    for attr_name in dir(agent.mcts.game_manager):
-        attr = getattr(agent.mcts.game_manager, attr_name)
-        if callable(attr) and hasattr(attr, "cache_clear"):
-            attr.cache_clear()
+    agent.mcts.game_manager.clear_caches()
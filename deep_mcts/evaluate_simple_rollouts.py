@@ -20,12 +20,18 @@ def evaluate_simple_rollouts(
     net_class: Type[GameNet[_S]],
     manager: GameManager[_S],
     device: torch.device,
+    random_rollouts: int = 0,
 ) -> None:
+    # random_rollouts > 0 uses GameManager.random_rollouts instead of playing
+    # random moves one by one, which is faster for some games
     save_dirs = sorted(dir for dir in save_dir.iterdir())[-20:]
     with Pool(processes=10) as pool:
         pool.starmap(
             evaluate_models,
-            [(save_dir, net_class, manager, device) for save_dir in save_dirs],
+            [
+                (save_dir, net_class, manager, device, random_rollouts)
+                for save_dir in save_dirs
+            ],
         )
 
 
@@ -34,6 +40,7 @@ def evaluate_models(
     net_class: Type[GameNet[_S]],
     manager: GameManager[_S],
     device: torch.device,
+    random_rollouts: int = 0,
 ) -> None:
     model_file = max(
         (f for f in model_dir.iterdir() if f.name.endswith(".tar")),
@@ -54,6 +61,7 @@ def evaluate_models(
                 else None,
                 state_evaluator=state_evaluator,
                 rollout_share=i / 100,
+                random_rollouts=random_rollouts if i > 0 else 0,
             )
         )
         for i in range(0, 101, 20)
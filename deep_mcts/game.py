@@ -1,10 +1,27 @@
+import itertools
+import math
+import random
 from abc import abstractmethod, ABC
 from enum import IntEnum, Enum
 from functools import lru_cache
-from typing import TypeVar, Dict, Generic, List, Sequence
+from typing import (
+    Any,
+    TypeVar,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
 
 from dataclasses import dataclass
 
+import numpy as np
+
+from deep_mcts.cache import Cache, CacheStats, EVICTION_POLICIES
+
 
 class Player(IntEnum):
     FIRST = 1
@@ -68,18 +85,198 @@ class State:
     player: Player
 
 
+# Random 64-bit Zobrist keys for a stone of each player on every cell, and
+# for the first player being to move. They are seeded, so keys are the same
+# in every process and can be stored.
+ZOBRIST_PLAYER_KEY = random.Random("player").getrandbits(64)
+
+
+@lru_cache(maxsize=None)
+def zobrist_table(num_cells: int) -> List[Tuple[int, int]]:
+    rng = random.Random(num_cells)
+    return [(rng.getrandbits(64), rng.getrandbits(64)) for _ in range(num_cells)]
+
+
+def zobrist_key(player: Player, grid: Tuple[Tuple[CellState, ...], ...]) -> int:
+    table = zobrist_table(len(grid) * len(grid[0]))
+    key = ZOBRIST_PLAYER_KEY if player == Player.FIRST else 0
+    for cell, cell_state in enumerate(itertools.chain.from_iterable(grid)):
+        if cell_state != CellState.EMPTY:
+            key ^= table[cell][cell_state]
+    return key
+
+
+@dataclass(init=False, eq=False)
+class GridState(State):
+    # State of a game played by placing stones on a grid. The Zobrist key is
+    # derived from the player and the grid, and managers update it with each
+    # move instead of computing it again. Hashing only uses the key, so
+    # hashing a state doesn't have to visit every cell.
+    __slots__ = ["grid", "key"]
+    grid: Tuple[Tuple[CellState, ...], ...]
+
+    def __init__(
+        self,
+        player: Player,
+        grid: Tuple[Tuple[CellState, ...], ...],
+        key: Optional[int] = None,
+    ) -> None:
+        self.player = player
+        self.grid = grid
+        self.key = zobrist_key(player, grid) if key is None else key
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (
+            self.key == other.key  # type: ignore[attr-defined]
+            and self.player == other.player  # type: ignore[attr-defined]
+            and self.grid == other.grid  # type: ignore[attr-defined]
+        )
+
+    def __hash__(self) -> int:
+        return self.key
+
+    def array(self) -> np.ndarray:
+        return np.array(self.grid, dtype=np.int8)
+
+
+_P = TypeVar("_P", bound="PackedGridState")
+
+
+class PackedGridState(GridState):
+    # Grid state storing the grid as bytes, with the int8 CellState value of
+    # every cell in row-major order. It takes a fraction of the memory of the
+    # nested tuples, pickles as a single bytes object and array returns the
+    # grid without copying. The grid is still available, but is built on
+    # every access. Subclasses add the cells slot, so they can also derive
+    # from state classes with slots of their own.
+    __slots__ = ()
+    cells: bytes
+
+    def __init__(self, player: Player, cells: bytes, key: Optional[int] = None) -> None:
+        self.player = player
+        self.cells = cells
+        self.key = zobrist_key(player, self.grid) if key is None else key
+
+    @classmethod
+    def pack(cls: Type[_P], state: GridState) -> _P:
+        return cls(state.player, state.array().tobytes(), state.key)
+
+    @property
+    def grid(self) -> Tuple[Tuple[CellState, ...], ...]:
+        return cell_grid(self.array())
+
+    @grid.setter
+    def grid(self, grid: Tuple[Tuple[CellState, ...], ...]) -> None:
+        self.cells = np.array(grid, dtype=np.int8).tobytes()
+
+    def array(self) -> np.ndarray:
+        size = int(math.sqrt(len(self.cells)))
+        return np.frombuffer(self.cells, dtype=np.int8).reshape(size, size)
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (
+            self.key == other.key  # type: ignore[attr-defined]
+            and self.player == other.player  # type: ignore[attr-defined]
+            and self.cells == other.cells  # type: ignore[attr-defined]
+        )
+
+    def __hash__(self) -> int:
+        return self.key
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # The default pickling of slots would try to set the grid property
+        return (self.__class__, (self.player, self.cells, self.key))
+
+
+@dataclass
+class StateBatch:
+    # Many states of the same game stored as arrays, for the batched methods
+    # of GameManager. players has shape (N,) and grids (N, size, size), both
+    # int8 with the values of Player and CellState.
+    players: np.ndarray
+    grids: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+
 _S = TypeVar("_S", bound=State)
 Action = int
+
+
+def cell_grid(grid: np.ndarray) -> Tuple[Tuple[CellState, ...], ...]:
+    # Convert a grid of a StateBatch to the grid of a single state
+    return tuple(tuple(CellState(cell) for cell in row) for row in grid.tolist())
+
+
+@lru_cache(maxsize=None)
+def grid_symmetries(grid_size: int, dihedral: bool) -> np.ndarray:
+    # Permutations of the cells of a square grid in row-major order, with
+    # cell i of a transformed grid being cell permutation[i] of the grid. The
+    # rotations by 0 and 180 degrees, or with dihedral all 4 rotations and
+    # their reflections. The identity comes first.
+    cells = np.arange(grid_size ** 2).reshape(grid_size, grid_size)
+    if dihedral:
+        transforms = [np.rot90(cells, k) for k in range(4)]
+        transforms += [np.rot90(cells.T, k) for k in range(4)]
+    else:
+        transforms = [cells, np.rot90(cells, 2)]
+    return np.stack([transform.flatten() for transform in transforms])
+
+
 _T = TypeVar("_T", bound="GameManager")  # type: ignore[type-arg]
 
 
 class GameManager(ABC, Generic[_S]):
     grid_size: int
     num_actions: int
+    # The caches of the methods decorated with deep_mcts.cache.cached, by
+    # qualified method name. They belong to the instance, so they are freed
+    # with the manager and managers in different processes don't share them.
+    caches: Dict[str, Cache]
+    cache_max_entries: Optional[int]
+    cache_max_bytes: Optional[int]
+    cache_policy: str
 
     def __init__(self, grid_size: int, num_actions: int) -> None:
         self.grid_size = grid_size
         self.num_actions = num_actions
+        self.caches = {}
+        self.configure_caches()
+
+    def configure_caches(
+        self,
+        max_entries: Optional[int] = 2 ** 20,
+        max_bytes: Optional[int] = None,
+        policy: str = "lru",
+    ) -> None:
+        # Limits apply to each method separately. Cached results are dropped.
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"unknown eviction policy {policy!r}")
+        self.cache_max_entries = max_entries
+        self.cache_max_bytes = max_bytes
+        self.cache_policy = policy
+        self.caches.clear()
+
+    def create_cache(self) -> Cache:
+        return Cache(self.cache_max_entries, self.cache_max_bytes, self.cache_policy)
+
+    def clear_caches(self) -> None:
+        for cache in self.caches.values():
+            cache.clear()
+
+    def cache_stats(self) -> Dict[str, CacheStats]:
+        return {name: cache.stats() for name, cache in self.caches.items()}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Cached states aren't worth sending to other processes
+        state = self.__dict__.copy()
+        state["caches"] = {}
+        return state
 
     @abstractmethod
     def initial_game_state(self) -> _S:
@@ -109,5 +306,101 @@ class GameManager(ABC, Generic[_S]):
         x, y = action % self.grid_size, action // self.grid_size
         return str((x, y))
 
+    def legal_action_mask(self, state: _S) -> np.ndarray:
+        # Boolean array over all actions, true for the legal ones
+        mask = np.zeros(self.num_actions, dtype=np.bool_)
+        mask[self.legal_actions(state)] = True
+        return mask
+
+    def symmetries(self) -> np.ndarray:
+        # The transforms of the grid that keep the game the same, as
+        # permutations of the cells like those of grid_symmetries, with the
+        # identity first. Only the identity by default.
+        return np.arange(self.num_actions).reshape(1, -1)
+
+    def canonical_state(self, state: _S) -> Tuple[_S, int]:
+        # One state for each class of states that are symmetries of each
+        # other, the one with the smallest grid, and the transform taking
+        # state to it, as an index into symmetries. States that are already
+        # canonical are returned as they are.
+        symmetries = self.symmetries()
+        if len(symmetries) == 1:
+            return state, 0
+        grids = state.array().reshape(-1)[symmetries]  # type: ignore[attr-defined]
+        transform = min(range(len(grids)), key=lambda i: grids[i].tobytes())
+        if transform == 0:
+            return state, 0
+        return self.transform_state(state, transform), transform
+
+    def transform_state(self, state: _S, transform: int) -> _S:
+        grid = state.array()  # type: ignore[attr-defined]
+        transformed = grid.reshape(-1)[self.symmetries()[transform]]
+        return self.unstack_states(
+            StateBatch(
+                np.array([state.player], dtype=np.int8),
+                transformed.reshape(1, *grid.shape),
+            )
+        )[0]
+
+    def inverse_transform_probabilities(
+        self, probabilities: np.ndarray, transform: int
+    ) -> np.ndarray:
+        # The probabilities of the actions in a state, from those of the
+        # state transformed by transform. Actions other than placing on a
+        # cell, like passing, are the same in both.
+        permutation = self.symmetries()[transform]
+        result = probabilities.copy()
+        result[permutation] = probabilities[: len(permutation)]
+        return result
+
+    # Optional batched versions of the methods above, playing N games at once
+    # without a Python loop over the games. Actions and outcomes are arrays
+    # with one entry per game, and outcomes are the values of Outcome, which
+    # like evaluate_final_state are only meaningful for final states.
+
+    def initial_game_states(self, n: int) -> StateBatch:
+        raise NotImplementedError
+
+    def generate_child_states(
+        self, states: StateBatch, actions: np.ndarray
+    ) -> StateBatch:
+        raise NotImplementedError
+
+    def legal_action_masks(self, states: StateBatch) -> np.ndarray:
+        raise NotImplementedError
+
+    def are_final(self, states: StateBatch) -> np.ndarray:
+        raise NotImplementedError
+
+    def evaluate_final_states(self, states: StateBatch) -> np.ndarray:
+        raise NotImplementedError
+
+    def stack_states(self, states: Sequence[_S]) -> StateBatch:
+        return StateBatch(
+            np.array([state.player for state in states], dtype=np.int8),
+            np.stack([state.array() for state in states]),  # type: ignore[attr-defined]
+        )
+
+    def unstack_states(self, states: StateBatch) -> List[_S]:
+        raise NotImplementedError
+
+    def random_rollout(self, state: _S) -> float:
+        # The outcome value of a game played to the end from the state with
+        # uniformly random moves. Managers can override this and
+        # random_rollouts with faster playouts of the same distribution.
+        while not self.is_final_state(state):
+            state = self.generate_child_state(
+                state, random.choice(self.legal_actions(state))
+            )
+        return self.evaluate_final_state(state).value  # type: ignore[no-any-return]
+
+    def random_rollouts(self, state: _S, n: int) -> np.ndarray:
+        return np.array([self.random_rollout(state) for _ in range(n)])
+
+    def pack_state(self, state: _S) -> _S:
+        # A compact copy of the state for storing or sending between
+        # processes. It must be usable wherever the state is.
+        return state
+
     def copy(self: _T) -> _T:
         return type(self)(self.grid_size)  # type: ignore[call-arg]
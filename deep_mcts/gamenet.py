@@ -1,9 +1,12 @@
+import copy
+import warnings
 from abc import ABC, abstractmethod
 from typing import (
     Any,
     Callable,
     Dict,
     Generic,
+    List,
     Mapping,
     Sequence,
     Tuple,
@@ -13,11 +16,14 @@ from typing import (
     Optional,
 )
 
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 import torch.optim.optimizer
+import torch.quantization
 
+from deep_mcts.convolutionalnet import add_float_functionals, fold_batch_norms
 from deep_mcts.game import Player, State, GameManager, Action
 from deep_mcts.tournament import Agent
 
@@ -37,6 +43,8 @@ class GameNet(ABC, Generic[_S]):
     optimizer: "torch.optim.optimizer.Optimizer"
     device: torch.device
     manager: GameManager[_S]
+    # Whether this is a copy made by to_inference
+    inference: bool = False
 
     def __init__(
         self,
@@ -58,31 +66,47 @@ class GameNet(ABC, Generic[_S]):
             self.net.parameters(), *optimizer_args, **optimizer_kwargs
         )
 
-    def evaluate(self, state: _S) -> Tuple[float, torch.Tensor]:
+    def evaluate(self, state: _S) -> Tuple[float, np.ndarray]:
+        values, probabilities = self.evaluate_batch([state])
+        return float(values[0]), probabilities[0]
+
+    def evaluate_states(self, states: Sequence[_S]) -> List[Tuple[float, np.ndarray]]:
+        values, probabilities = self.evaluate_batch(states)
+        return list(zip(values.tolist(), probabilities))
+
+    def evaluate_batch(self, states: Sequence[_S]) -> Tuple[np.ndarray, np.ndarray]:
+        # The values of the states for MCTS, with shape (N,), and the
+        # probabilities of the actions, with shape (N, num_actions)
         self.net.eval()
-        states = self.states_to_tensor([state]).to(self.device)
-        value: torch.Tensor
+        states_tensor = self.states_to_tensor(states).to(self.device)
         with torch.autograd.no_grad():
-            value, probabilities = self.forward(states.float())
-        value = torch.tanh(value)
-        # The output value is from the perspective of the current player,
-        # but MCTS expects it to be independent of the player
-        if state.player == Player.min_player():
-            value = -value
+            values, probabilities = self.forward(states_tensor.float())
+        return self._process_outputs(states, values, probabilities)
+
+    def _process_outputs(
+        self, states: Sequence[_S], values: torch.Tensor, probabilities: torch.Tensor
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        values = torch.tanh(values.reshape(len(states)))
+        # The output values are from the perspective of the current player,
+        # but MCTS expects them to be independent of the player
+        min_player = torch.tensor(
+            [state.player == Player.min_player() for state in states],
+            device=values.device,
+        )
+        values = torch.where(min_player, -values, values)
         # MCTS uses a range of [0, 1]
-        value = (value + 1) / 2
-        probabilities = F.softmax(probabilities.flatten(), dim=0)
-        assert probabilities.shape == (self.manager.num_actions,)
-        probabilities = self._mask_illegal_moves(state, probabilities)
-        assert probabilities.shape == (self.manager.num_actions,)
-        probabilities = probabilities / torch.sum(probabilities)
-        assert probabilities.shape == (self.manager.num_actions,)
-        assert torch.allclose(
-            torch.sum(probabilities), torch.tensor([1.0], device=self.device)
+        values = (values + 1) / 2
+        # The softmax over the legal moves only, which is the softmax over
+        # all moves renormalized after masking the illegal ones
+        probabilities = probabilities.reshape(len(states), -1)
+        assert probabilities.shape == (len(states), self.manager.num_actions)
+        probabilities = F.softmax(
+            probabilities.masked_fill(
+                ~self._legal_move_masks(states).to(probabilities.device), -np.inf
+            ),
+            dim=1,
         )
-        value = value.item()
-        probabilities = probabilities.cpu().detach()
-        return value, probabilities
+        return values.cpu().numpy(), probabilities.cpu().numpy()
 
     def train(
         self,
@@ -119,13 +143,10 @@ class GameNet(ABC, Generic[_S]):
     def forward(self, states: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
         return self.net.forward(states)
 
-    def _mask_illegal_moves(self, state: _S, output: torch.Tensor) -> torch.Tensor:
-        legal_moves = torch.zeros(self.manager.num_actions)
-        legal_moves[self.manager.legal_actions(state)] = 1.0
-        assert legal_moves.shape == output.shape
-        result = output * legal_moves.to(self.device)
-        assert result.shape == output.shape
-        return result
+    def _legal_move_masks(self, states: Sequence[_S]) -> torch.Tensor:
+        return torch.from_numpy(
+            np.stack([self.manager.legal_action_mask(state) for state in states])
+        )
 
     def save(self, path: str) -> None:
         torch.save(self.net.state_dict(), path)
@@ -166,6 +187,64 @@ class GameNet(ABC, Generic[_S]):
         )
         return self
 
+    def to_inference(self: _T) -> _T:
+        # A copy for evaluation only, sharing everything but the network. The
+        # batch norms of the network are folded into the convolutions before
+        # them, and it is traced and frozen with TorchScript, which drops the
+        # asserts and the Python code of the modules from the forward pass and
+        # lets TorchScript fuse what is left. PyTorch before 1.8 can't freeze,
+        # so there the copy keeps the folded network in eager mode. The copy
+        # can't be trained, moved or copied, so make a new one after loading
+        # new weights into self.
+        if self.inference:
+            return self
+        net = copy.deepcopy(self.net).eval()
+        fold_batch_norms(net)
+        return self._inference_copy(net, self.device)
+
+    def to_quantized(self: _T, calibration_states: torch.Tensor) -> _T:
+        # Like to_inference, but the convolutions and linear layers of the
+        # copy compute in int8 on the CPU, with post-training static
+        # quantization. The ranges of the activations are calibrated on
+        # calibration_states, which should look like the states the copy will
+        # evaluate, such as states from the replay buffer.
+        if self.inference:
+            return self
+        net = copy.deepcopy(self.net).cpu().eval()
+        fold_batch_norms(net)
+        add_float_functionals(net)
+        quantized = QuantizedModule(net).eval()
+        quantized.qconfig = torch.quantization.get_default_qconfig(
+            torch.backends.quantized.engine
+        )
+        with torch.autograd.no_grad(), warnings.catch_warnings():
+            # Newer versions of PyTorch warn that eager mode quantization is
+            # deprecated
+            warnings.simplefilter("ignore")
+            torch.quantization.prepare(quantized, inplace=True)
+            quantized(calibration_states.cpu().float())
+            torch.quantization.convert(quantized, inplace=True)
+        return self._inference_copy(quantized, torch.device("cpu"))
+
+    def _inference_copy(self: _T, net: TensorPairModule, device: torch.device) -> _T:
+        if hasattr(torch.jit, "freeze"):
+            # Two states, so nothing is specialized to a batch size of one
+            example = self.states_to_tensor([self.manager.initial_game_state()] * 2)
+            with torch.autograd.no_grad(), warnings.catch_warnings():
+                # The asserts comparing shapes only hold for the example, which
+                # is what tracing warns about, but they are dropped anyway.
+                # Newer versions of PyTorch also warn that TorchScript is
+                # deprecated.
+                warnings.simplefilter("ignore", torch.jit.TracerWarning)
+                warnings.simplefilter("ignore", FutureWarning)
+                traced = torch.jit.trace(net, example.to(device).float())
+                net = torch.jit.freeze(traced)
+        inference_net = copy.copy(self)
+        inference_net.net = net
+        inference_net.device = device
+        inference_net.inference = True
+        return inference_net
+
     @classmethod
     def from_path(cls: Type[_T], path: str, *args: Any, **kwargs: Any) -> _T:
         anet = cls(*args, **kwargs)
@@ -183,6 +262,23 @@ class GameNet(ABC, Generic[_S]):
         self.net.load_state_dict(state_dict)
 
 
+class QuantizedModule(TensorPairModule):
+    # Quantizes the input of net and dequantizes its outputs, so everything in
+    # between can run on quantized tensors
+    def __init__(self, net: TensorPairModule) -> None:
+        super().__init__()
+        self.quant = torch.quantization.QuantStub()
+        self.net = net
+        self.value_dequant = torch.quantization.DeQuantStub()
+        self.policy_dequant = torch.quantization.DeQuantStub()
+
+    def forward(  # type: ignore[override]
+        self, x: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        values, policies = self.net(self.quant(x))
+        return self.value_dequant(values), self.policy_dequant(policies)
+
+
 class GameNetAgent(Agent[_S]):
     net: GameNet[_S]
 
@@ -4,6 +4,7 @@ from abc import ABC, abstractmethod
 from typing import Callable, Dict, List, NoReturn, Optional, TypeVar, Generic
 
 import dataclasses
+import functools
 import numpy as np
 import pexpect
 import torch
@@ -13,7 +14,8 @@ sys.path.append('C:/Users/vanag/Desktop/deep_mcts')
 
 from deep_mcts.game import Player, State, GameManager, Action
 from deep_mcts.gamenet import GameNet
-from deep_mcts.mcts import MCTS, Node
+from deep_mcts.mcts import MCTS
+from deep_mcts.root_parallel import RootParallelMCTS
 from deep_mcts.tournament import Agent
 from deep_mcts.train import cached_state_evaluator
 
@@ -25,8 +27,19 @@ class GTPInterface(ABC, Generic[_S]):
     game_manager: GameManager[_S]
     mcts: MCTS[_S]
     board_size: int
+    num_processes: int
+    time_per_move: float
+    dirichlet_alpha: float
 
-    def __init__(self, board_size: int) -> None:
+    def __init__(
+        self,
+        board_size: int,
+        num_processes: int = 1,
+        time_per_move: float = 1.0,
+        dirichlet_alpha: float = 0.3,
+    ) -> None:
+        # time_per_move and dirichlet_alpha are only used with more than one
+        # process
         self.commands = {
             "name": self.name,
             "version": self.version,
@@ -43,14 +56,31 @@ class GTPInterface(ABC, Generic[_S]):
             "result": self.result,
         }
         self.board_size = board_size
+        self.num_processes = num_processes
+        self.time_per_move = time_per_move
+        self.dirichlet_alpha = dirichlet_alpha
         self.net = self.get_game_net(board_size).to(torch.device("cuda"))
         self.game_manager = self.net.manager
-        self.mcts = MCTS(
-            self.game_manager,
-            num_simulations=100,
-            rollout_policy=None,
-            state_evaluator=cached_state_evaluator(self.net),
-        )
+        self.mcts = self.create_mcts()
+
+    def create_mcts(self) -> MCTS[_S]:
+        if self.num_processes > 1:
+            # Each worker process gets its own copy of the network and
+            # searches for time_per_move seconds. The network is deterministic,
+            # so the Dirichlet noise at the root, seeded differently in every
+            # worker, is what makes the trees differ.
+            return RootParallelMCTS(
+                self.game_manager,
+                functools.partial(
+                    create_mcts,
+                    self.net,
+                    num_simulations=float("inf"),  # type: ignore[arg-type]
+                    dirichlet_alpha=self.dirichlet_alpha,
+                    time_per_move=self.time_per_move,
+                ),
+                self.num_processes,
+            )
+        return create_mcts(self.net, num_simulations=100)
 
     def run_command(self, command: str) -> Optional[str]:
         command, *args = command.split()
@@ -95,14 +125,11 @@ class GTPInterface(ABC, Generic[_S]):
         self.clear_board([])
 
     def clear_board(self, args: List[str]) -> None:
+        if isinstance(self.mcts, RootParallelMCTS):
+            self.mcts.close()
         self.net = self.get_game_net(self.board_size)
         self.game_manager = self.net.manager
-        self.mcts = MCTS(
-            self.game_manager,
-            num_simulations=100,
-            rollout_policy=None,
-            state_evaluator=cached_state_evaluator(self.net),
-        )
+        self.mcts = self.create_mcts()
 
     def play(self, args: List[str]) -> None:
         if len(args) != 2:
@@ -114,12 +141,7 @@ class GTPInterface(ABC, Generic[_S]):
         actual_player = self.mcts.state.player
         if actual_player != player:
             self.mcts.state = dataclasses.replace(self.mcts.state, player=player)
-        if __debug__ and action not in self.mcts.root.children:
-            assert len(self.mcts.root.children) == 0
-        self.mcts.root = self.mcts.root.children.get(action, Node())
-        self.mcts.state = self.game_manager.generate_child_state(
-            self.mcts.state, action
-        )
+        self.mcts.make_move(action)
 
     def genmove(self, args: List[str]) -> str:
         if len(args) != 1:
@@ -141,10 +163,7 @@ class GTPInterface(ABC, Generic[_S]):
             self.game_manager.probabilities_grid(action_probabilities), file=sys.stderr
         )
         action = np.argmax(action_probabilities)
-        self.mcts.root = self.mcts.root.children[action]
-        self.mcts.state = self.mcts.game_manager.generate_child_state(
-            self.mcts.state, action
-        )
+        self.mcts.make_move(action)
         return self.format_move(action, self.board_size)
 
     def showboard(self, args: List[str]) -> str:
@@ -199,6 +218,22 @@ class GTPInterface(ABC, Generic[_S]):
                     print(f"= {result}\n")
 
 
+def create_mcts(
+    game_net: GameNet[_S],
+    num_simulations: int,
+    dirichlet_alpha: float = 0.0,
+    time_per_move: float = float("inf"),
+) -> MCTS[_S]:
+    return MCTS(
+        game_net.manager,
+        num_simulations=num_simulations,
+        rollout_policy=None,
+        state_evaluator=cached_state_evaluator(game_net),
+        dirichlet_alpha=dirichlet_alpha,
+        time_per_move=time_per_move,
+    )
+
+
 class GTPAgent(Agent[_S]):
     def __init__(self, manager: GameManager[_S], grid_size: int) -> None:
         self.process = pexpect.spawn(
@@ -0,0 +1,319 @@
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+from deep_mcts.bitboard import bitboard_grid, bits, popcount
+from deep_mcts.game import (
+    Action,
+    CellState,
+    Outcome,
+    Player,
+    StateBatch,
+    ZOBRIST_PLAYER_KEY,
+)
+from deep_mcts.hex.game import HexManager, HexState, hex_neighbours
+
+
+class BitboardHexState(HexState):
+    # Hex state storing the stones of each player as the bits of an integer,
+    # with bit x + y * grid_size for the cell (x, y), so the bits match the
+    # actions. The grid is computed on demand, and setting it replaces the
+    # stones, so the state can be used anywhere a HexState can.
+    __slots__ = [
+        "grid_size",
+        "first_player_stones",
+        "second_player_stones",
+        "parents",
+        "outcome",
+    ]
+    grid_size: int
+    first_player_stones: int
+    second_player_stones: int
+    # Union-find forest over the cells and the four virtual edge nodes. It
+    # is derived from the stones, so it isn't part of equality or the hash.
+    parents: List[int]
+    outcome: Outcome
+
+    def __init__(
+        self,
+        player: Player,
+        grid_size: int,
+        first_player_stones: int,
+        second_player_stones: int,
+        parents: List[int],
+        outcome: Outcome,
+        key: int,
+        empty_cells: Optional[int] = None,
+        num_moves: Optional[int] = None,
+    ) -> None:
+        self.player = player
+        self.grid_size = grid_size
+        self.first_player_stones = first_player_stones
+        self.second_player_stones = second_player_stones
+        self.parents = parents
+        self.outcome = outcome
+        self.key = key
+        stones = first_player_stones | second_player_stones
+        if empty_cells is None:
+            empty_cells = ((1 << grid_size ** 2) - 1) & ~stones
+        self.empty_cells = empty_cells
+        if num_moves is None:
+            num_moves = popcount(stones)
+        self.num_moves = num_moves
+
+    @property
+    def grid(self) -> Tuple[Tuple[CellState, ...], ...]:
+        return bitboard_grid(
+            self.grid_size, self.first_player_stones, self.second_player_stones
+        )
+
+    @grid.setter
+    def grid(self, grid: Tuple[Tuple[CellState, ...], ...]) -> None:
+        # Replace the stones, and build the forest and the outcome for them
+        stones = [0, 0]
+        for y, row in enumerate(grid):
+            for x, cell in enumerate(row):
+                if cell != CellState.EMPTY:
+                    stones[cell] |= 1 << (x + y * self.grid_size)
+        self.first_player_stones = stones[Player.FIRST]
+        self.second_player_stones = stones[Player.SECOND]
+        self.parents = list(range(self.grid_size ** 2 + 4))
+        self.outcome = Outcome.DRAW
+        neighbours = hex_neighbours(self.grid_size)
+        edges = edge_nodes(self.grid_size)
+        for player in Player:
+            for cell in bits(stones[player]):
+                if (
+                    _connect(
+                        self.parents,
+                        neighbours,
+                        edges[player],
+                        player,
+                        cell,
+                        stones[player],
+                    )
+                    != Outcome.DRAW
+                ):
+                    self.outcome = player.win()
+        self.empty_cells = ((1 << self.grid_size ** 2) - 1) & ~(
+            stones[Player.FIRST] | stones[Player.SECOND]
+        )
+        self.num_moves = popcount(stones[Player.FIRST] | stones[Player.SECOND])
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BitboardHexState):
+            return NotImplemented
+        return self.key == other.key and (
+            self.player,
+            self.grid_size,
+            self.first_player_stones,
+            self.second_player_stones,
+        ) == (
+            other.player,
+            other.grid_size,
+            other.first_player_stones,
+            other.second_player_stones,
+        )
+
+    def __hash__(self) -> int:
+        return self.key
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # The default pickling of slots would try to set the grid property
+        return (
+            BitboardHexState,
+            (
+                self.player,
+                self.grid_size,
+                self.first_player_stones,
+                self.second_player_stones,
+                self.parents,
+                self.outcome,
+                self.key,
+                self.empty_cells,
+                self.num_moves,
+            ),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"BitboardHexState(player={self.player!r}, grid_size={self.grid_size}, "
+            f"first_player_stones={self.first_player_stones:#x}, "
+            f"second_player_stones={self.second_player_stones:#x})"
+        )
+
+
+class BitboardHexManager(HexManager):
+    # Drop-in replacement for HexManager using BitboardHexState. The first
+    # player connects the top and bottom edges and the second player the
+    # left and right edges, and every move joins the new stone with its
+    # neighbours and edges in a union-find forest, so checking for a win is
+    # a pair of finds instead of a search of the board. The methods aren't
+    # cached, since they are about as cheap as hashing the state.
+    full_mask: int
+    edges: List[List[List[int]]]
+
+    def __init__(self, grid_size: int, num_actions: Optional[int] = None) -> None:
+        super().__init__(grid_size, num_actions)
+        self.full_mask = (1 << grid_size ** 2) - 1
+        self.edges = edge_nodes(grid_size)
+
+    def initial_game_state(self) -> BitboardHexState:
+        return BitboardHexState(
+            Player.FIRST,
+            self.grid_size,
+            0,
+            0,
+            list(range(self.grid_size ** 2 + 4)),
+            Outcome.DRAW,
+            ZOBRIST_PLAYER_KEY,
+        )
+
+    def generate_child_state(  # type: ignore[override]
+        self, state: BitboardHexState, action: Action
+    ) -> BitboardHexState:
+        # Actions can be NumPy integers, which would overflow
+        bit = 1 << int(action)
+        assert 0 <= action < self.grid_size ** 2
+        assert not (state.first_player_stones | state.second_player_stones) & bit
+        first_player_stones = state.first_player_stones
+        second_player_stones = state.second_player_stones
+        if state.player == Player.FIRST:
+            first_player_stones |= bit
+            stones = first_player_stones
+        else:
+            second_player_stones |= bit
+            stones = second_player_stones
+        parents = state.parents.copy()
+        outcome = _connect(
+            parents,
+            self.neighbours,
+            self.edges[state.player],
+            state.player,
+            action,
+            stones,
+        )
+        if outcome == Outcome.DRAW:
+            # Play can continue past the end of the game, e.g. in tests, and
+            # the winner can't change after that
+            outcome = state.outcome
+        return BitboardHexState(
+            state.player.opposite(),
+            self.grid_size,
+            first_player_stones,
+            second_player_stones,
+            parents,
+            outcome,
+            state.key ^ self.zobrist_table[action][state.player] ^ ZOBRIST_PLAYER_KEY,
+            state.empty_cells & ~bit,
+            state.num_moves + 1,
+        )
+
+    def legal_actions(  # type: ignore[override]
+        self, state: BitboardHexState
+    ) -> List[Action]:
+        return list(
+            bits(
+                ~(state.first_player_stones | state.second_player_stones)
+                & self.full_mask
+            )
+        )
+
+    def is_final_state(self, state: BitboardHexState) -> bool:  # type: ignore[override]
+        return state.outcome != Outcome.DRAW
+
+    def evaluate_final_state(  # type: ignore[override]
+        self, state: BitboardHexState
+    ) -> Outcome:
+        return state.outcome
+
+    def random_rollout(self, state: BitboardHexState) -> float:  # type: ignore[override]
+        if state.outcome != Outcome.DRAW:
+            return state.outcome.value  # type: ignore[no-any-return]
+        return self._random_fill(
+            state.player,
+            set(bits(state.first_player_stones)),
+            self.legal_actions(state),
+        )
+
+    def unstack_states(  # type: ignore[override]
+        self, states: StateBatch
+    ) -> List[BitboardHexState]:
+        return [self.from_hex_state(state) for state in super().unstack_states(states)]
+
+    def transform_state(  # type: ignore[override]
+        self, state: BitboardHexState, transform: int
+    ) -> BitboardHexState:
+        return self.from_hex_state(super().transform_state(state, transform))
+
+    def from_hex_state(self, state: HexState) -> BitboardHexState:
+        # Replay the stones of a HexState, e.g. one received over GTP
+        bitboard_state = self.initial_game_state()
+        bitboard_state.grid = state.grid
+        bitboard_state.player = state.player
+        bitboard_state.key = state.key
+        # The moves can differ from the stones after a swap
+        bitboard_state.num_moves = state.num_moves
+        return bitboard_state
+
+
+@lru_cache(maxsize=None)
+def edge_nodes(grid_size: int) -> List[List[List[int]]]:
+    # The edge nodes touching each cell, indexed by player. The nodes of the
+    # top, bottom, left and right edges follow the cells in the forest.
+    num_cells = grid_size ** 2
+    top, bottom, left, right = range(num_cells, num_cells + 4)
+    edges: List[List[List[int]]] = [[], []]
+    for y in range(grid_size):
+        for x in range(grid_size):
+            edges[Player.FIRST].append(
+                [top] * (y == 0) + [bottom] * (y == grid_size - 1)
+            )
+            edges[Player.SECOND].append(
+                [left] * (x == 0) + [right] * (x == grid_size - 1)
+            )
+    return edges
+
+
+def _connect(
+    parents: List[int],
+    neighbours: List[List[int]],
+    edges: List[List[int]],
+    player: Player,
+    cell: int,
+    stones: int,
+) -> Outcome:
+    # Join the stone at cell with the neighbouring stones of the same player
+    # and the edges of the player it touches, and return the resulting
+    # outcome. Only the player who moved can have won.
+    for neighbour in neighbours[cell]:
+        if stones >> neighbour & 1:
+            _union(parents, cell, neighbour)
+    for edge in edges[cell]:
+        _union(parents, cell, edge)
+    num_cells = len(neighbours)
+    if player == Player.FIRST:
+        # The top and bottom edges
+        connected = _find(parents, num_cells) == _find(parents, num_cells + 1)
+    else:
+        # The left and right edges
+        connected = _find(parents, num_cells + 2) == _find(parents, num_cells + 3)
+    return player.win() if connected else Outcome.DRAW
+
+
+def _find(parents: List[int], node: int) -> int:
+    # Path halving keeps the trees flat enough without recursion
+    while parents[node] != node:
+        parents[node] = parents[parents[node]]
+        node = parents[node]
+    return node
+
+
+def _union(parents: List[int], a: int, b: int) -> None:
+    a = _find(parents, a)
+    b = _find(parents, b)
+    if a != b:
+        # Keep the edge nodes as roots, so the win check stays short
+        if a > b:
+            parents[b] = a
+        else:
+            parents[a] = b
@@ -1,5 +1,6 @@
 from typing import Mapping, Sequence, Tuple, Type, Any, Optional, Dict
 
+import numpy as np
 import torch
 import torch.optim
 import torch.optim.optimizer
@@ -68,7 +69,7 @@ class ConvolutionalHexNet(GameNet[HexState]):
                     state.player == Player.SECOND,
                     state.player,
                     state.player.opposite(),
-                    state.grid,
+                    state.array(),
                 )
                 for state in states
             ]
@@ -83,7 +84,7 @@ class ConvolutionalHexNet(GameNet[HexState]):
         # We also want a consistent orientation, the current player's goal
         # should always be connecting north-south. This means we need to flip
         # the board for the second player.
-        grids = torch.tensor(grids)
+        grids = torch.from_numpy(np.stack(grids))
         grids[second_player_states, :] = grids[second_player_states, :].transpose(1, 2)
 
         current_player = (grids == players).float()
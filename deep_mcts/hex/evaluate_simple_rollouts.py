@@ -9,4 +9,6 @@ from deep_mcts.hex.convolutionalnet import ConvolutionalHexNet
 
 save_dir = Path(__file__).resolve().parent / "saves"
 manager = HexManager(grid_size=6)
-evaluate_simple_rollouts(save_dir, ConvolutionalHexNet, manager, torch.device("cuda"))
+evaluate_simple_rollouts(
+    save_dir, ConvolutionalHexNet, manager, torch.device("cuda"), random_rollouts=1
+)
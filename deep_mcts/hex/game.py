@@ -1,17 +1,72 @@
+import itertools
+import random
 import string
 from functools import lru_cache
-from typing import Tuple, List, Iterable, MutableSet, Optional, Set, Sequence
+from typing import (
+    Any,
+    Tuple,
+    List,
+    Iterable,
+    MutableSet,
+    Optional,
+    Set,
+    Sequence,
+    Type,
+    TypeVar,
+)
 
-from dataclasses import dataclass
+import numpy as np
 
-from deep_mcts.game import GameManager, Player, State, CellState, Outcome, Action
+from deep_mcts.bitboard import array_to_mask, bits, mask_to_array, popcount
+from deep_mcts.cache import cached
+from deep_mcts.game import (
+    GameManager,
+    Player,
+    GridState,
+    PackedGridState,
+    StateBatch,
+    CellState,
+    Outcome,
+    Action,
+    cell_grid,
+    grid_symmetries,
+    zobrist_table,
+    ZOBRIST_PLAYER_KEY,
+)
 from deep_mcts.mcts import play_random_mcts
 
 
-@dataclass(unsafe_hash=True)
-class HexState(State):
-    __slots__ = ["grid"]
-    grid: Tuple[Tuple[CellState, ...], ...]
+class HexState(GridState):
+    # The empty cells are also kept as a mask with bit x + y * grid_size for
+    # the cell (x, y), matching the actions, and managers update it and the
+    # number of moves played with every move, so legal moves don't need a
+    # scan of the grid. Both are derived from the grid and the moves, so
+    # they aren't part of equality or the hash. Without the moves, the
+    # number of moves is taken to be the number of stones, which only
+    # differs after a swap.
+    __slots__ = ["empty_cells", "num_moves"]
+    empty_cells: int
+    num_moves: int
+
+    def __init__(
+        self,
+        player: Player,
+        grid: Tuple[Tuple[CellState, ...], ...],
+        key: Optional[int] = None,
+        empty_cells: Optional[int] = None,
+        num_moves: Optional[int] = None,
+    ) -> None:
+        super().__init__(player, grid, key)
+        if empty_cells is None:
+            empty_cells = sum(
+                1 << cell
+                for cell, cell_state in enumerate(itertools.chain.from_iterable(grid))
+                if cell_state == CellState.EMPTY
+            )
+        self.empty_cells = empty_cells
+        if num_moves is None:
+            num_moves = len(grid) ** 2 - popcount(empty_cells)
+        self.num_moves = num_moves
 
     def __str__(self) -> str:
         symbol = {-1: ".", 0: "0", 1: "1"}
@@ -28,11 +83,73 @@ class HexState(State):
         return "\n".join(grid)
 
 
+_P = TypeVar("_P", bound="PackedHexState")
+
+
+class PackedHexState(PackedGridState, HexState):
+    __slots__ = ["cells"]
+
+    def __init__(
+        self,
+        player: Player,
+        cells: bytes,
+        key: Optional[int] = None,
+        empty_cells: Optional[int] = None,
+        num_moves: Optional[int] = None,
+    ) -> None:
+        PackedGridState.__init__(self, player, cells, key)
+        if empty_cells is None:
+            empty_cells = array_to_mask(
+                np.frombuffer(cells, dtype=np.int8) == CellState.EMPTY
+            )
+        self.empty_cells = empty_cells
+        if num_moves is None:
+            num_moves = len(cells) - popcount(empty_cells)
+        self.num_moves = num_moves
+
+    @classmethod
+    def pack(cls: Type[_P], state: GridState) -> _P:
+        return cls(
+            state.player,
+            state.array().tobytes(),
+            state.key,
+            state.empty_cells,  # type: ignore[attr-defined]
+            state.num_moves,  # type: ignore[attr-defined]
+        )
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (
+            self.__class__,
+            (self.player, self.cells, self.key, self.empty_cells, self.num_moves),
+        )
+
+
+@lru_cache(maxsize=None)
+def hex_neighbours(grid_size: int) -> List[List[int]]:
+    # The neighbours of every cell, by index in row-major order
+    shifts = [(0, -1), (1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0)]
+    return [
+        [
+            x + x_shift + (y + y_shift) * grid_size
+            for x_shift, y_shift in shifts
+            if 0 <= x + x_shift < grid_size and 0 <= y + y_shift < grid_size
+        ]
+        for y in range(grid_size)
+        for x in range(grid_size)
+    ]
+
+
 class HexManager(GameManager[HexState]):
+    zobrist_table: List[Tuple[int, int]]
+    # The neighbours of every cell, by index in row-major order
+    neighbours: List[List[int]]
+
     def __init__(self, grid_size: int, num_actions: Optional[int] = None) -> None:
         if num_actions is None:
             num_actions = grid_size ** 2
         super().__init__(grid_size, num_actions)
+        self.zobrist_table = zobrist_table(grid_size ** 2)
+        self.neighbours = hex_neighbours(grid_size)
 
     def initial_game_state(self) -> HexState:
         return HexState(
@@ -41,13 +158,17 @@ class HexManager(GameManager[HexState]):
                 tuple(CellState.EMPTY for _ in range(self.grid_size))
                 for _ in range(self.grid_size)
             ),
+            empty_cells=(1 << self.grid_size ** 2) - 1,
+            num_moves=0,
         )
 
-    @lru_cache(maxsize=2 ** 20)
+    @cached
     def generate_child_state(  # type: ignore[override]
         self, state: HexState, action: Action
     ) -> HexState:
-        assert action in self.legal_actions(state)
+        # Actions can be NumPy integers, which would overflow
+        bit = 1 << int(action)
+        assert state.empty_cells & bit
         x, y = action % self.grid_size, action // self.grid_size
         return HexState(
             state.player.opposite(),
@@ -60,22 +181,23 @@ class HexManager(GameManager[HexState]):
                 else row
                 for i, row in enumerate(state.grid)
             ),
+            state.key ^ self.zobrist_table[action][state.player] ^ ZOBRIST_PLAYER_KEY,
+            state.empty_cells ^ bit,
+            state.num_moves + 1,
         )
 
-    @lru_cache(maxsize=2 ** 20)
+    @cached
     def legal_actions(self, state: HexState) -> List[Action]:  # type: ignore[override]
-        return [
-            x + y * self.grid_size
-            for y in range(self.grid_size)
-            for x in range(self.grid_size)
-            if state.grid[y][x] == CellState.EMPTY
-        ]
+        return list(bits(state.empty_cells))
+
+    def legal_action_mask(self, state: HexState) -> np.ndarray:
+        return mask_to_array(state.empty_cells, self.grid_size ** 2)
 
-    @lru_cache(maxsize=2 ** 20)
+    @cached
     def is_final_state(self, state: HexState) -> bool:  # type: ignore[override]
         return self.evaluate_final_state(state) != Outcome.DRAW
 
-    @lru_cache(maxsize=2 ** 20)
+    @cached
     def evaluate_final_state(  # type: ignore[override]
         self, state: HexState
     ) -> Outcome:
@@ -141,6 +263,134 @@ class HexManager(GameManager[HexState]):
             ):
                 yield shifted_x, shifted_y
 
+    def initial_game_states(self, n: int) -> StateBatch:
+        return StateBatch(
+            np.full(n, Player.FIRST, dtype=np.int8),
+            np.full(
+                (n, self.grid_size, self.grid_size), CellState.EMPTY, dtype=np.int8
+            ),
+        )
+
+    def generate_child_states(
+        self, states: StateBatch, actions: np.ndarray
+    ) -> StateBatch:
+        grids = states.grids.copy()
+        flat_grids = grids.reshape(len(states), self.grid_size ** 2)
+        indices = np.arange(len(states))
+        assert np.all(flat_grids[indices, actions] == CellState.EMPTY)
+        flat_grids[indices, actions] = states.players
+        return StateBatch(1 - states.players, grids)
+
+    def legal_action_masks(self, states: StateBatch) -> np.ndarray:
+        return states.grids.reshape(len(states), self.grid_size ** 2) == CellState.EMPTY
+
+    def are_final(self, states: StateBatch) -> np.ndarray:
+        return self.evaluate_final_states(states) != Outcome.DRAW.value
+
+    def evaluate_final_states(self, states: StateBatch) -> np.ndarray:
+        # The first player connects the top and bottom rows, the second player
+        # the left and right columns
+        first_player = states.grids == CellState.FIRST_PLAYER
+        starts = np.zeros_like(first_player)
+        starts[:, 0, :] = True
+        first_player_wins = connected_cells(first_player, starts)[:, -1, :].any(axis=1)
+        second_player = states.grids == CellState.SECOND_PLAYER
+        starts = np.zeros_like(second_player)
+        starts[:, :, 0] = True
+        second_player_wins = connected_cells(second_player, starts)[:, :, -1].any(
+            axis=1
+        )
+        outcomes = np.full(len(states), Outcome.DRAW.value)
+        outcomes[first_player_wins] = Outcome.FIRST_PLAYER_WIN.value
+        outcomes[second_player_wins] = Outcome.SECOND_PLAYER_WIN.value
+        return outcomes
+
+    def unstack_states(self, states: StateBatch) -> List[HexState]:
+        return [
+            HexState(Player(player), cell_grid(grid))
+            for player, grid in zip(states.players, states.grids)
+        ]
+
+    def pack_state(self, state: HexState) -> HexState:
+        return PackedHexState.pack(state)
+
+    def symmetries(self) -> np.ndarray:
+        # Rotating the board by 180 degrees keeps the edges of each player
+        return grid_symmetries(self.grid_size, dihedral=False)
+
+    def transform_state(self, state: HexState, transform: int) -> HexState:
+        # The number of moves is kept, since it differs from the number of
+        # stones after a swap
+        grid = state.array().reshape(-1)[self.symmetries()[transform]]
+        return HexState(
+            state.player,
+            cell_grid(grid.reshape(self.grid_size, self.grid_size)),
+            num_moves=state.num_moves,
+        )
+
+    # Hex can't end in a draw and extra stones never undo a connection, so a
+    # game of uniformly random moves has the same winner as filling every
+    # empty cell in a random order, with the players alternating, and only
+    # looking at the full board. On a full board the second player wins
+    # exactly when the first player doesn't.
+
+    def random_rollout(self, state: HexState) -> float:
+        if self.is_final_state(state):
+            return self.evaluate_final_state(state).value  # type: ignore[no-any-return]
+        return self._random_fill(
+            state.player,
+            {
+                cell
+                for cell, cell_state in enumerate(
+                    itertools.chain.from_iterable(state.grid)
+                )
+                if cell_state == CellState.FIRST_PLAYER
+            },
+            list(bits(state.empty_cells)),
+        )
+
+    def _random_fill(
+        self, player: Player, first_player_stones: Set[int], empty: List[int]
+    ) -> float:
+        random.shuffle(empty)
+        first_player_stones.update(empty[0 if player == Player.FIRST else 1 :: 2])
+        stack = [cell for cell in range(self.grid_size) if cell in first_player_stones]
+        visited = set(stack)
+        bottom_row = self.grid_size * (self.grid_size - 1)
+        while stack:
+            cell = stack.pop()
+            if cell >= bottom_row:
+                return Outcome.FIRST_PLAYER_WIN.value  # type: ignore[no-any-return]
+            for neighbour in self.neighbours[cell]:
+                if neighbour in first_player_stones and neighbour not in visited:
+                    visited.add(neighbour)
+                    stack.append(neighbour)
+        return Outcome.SECOND_PLAYER_WIN.value  # type: ignore[no-any-return]
+
+    def random_rollouts(self, state: HexState, n: int) -> np.ndarray:
+        if self.is_final_state(state):
+            return np.full(n, self.evaluate_final_state(state).value)
+        grid = state.array().reshape(self.grid_size ** 2)
+        empty = np.flatnonzero(grid == CellState.EMPTY)
+        # A random order of the empty cells for every playout
+        order = np.argsort(np.random.random((n, len(empty))), axis=1)
+        stones = np.empty(len(empty), dtype=np.int8)
+        stones[0::2] = state.player
+        stones[1::2] = state.player.opposite()
+        grids = np.tile(grid, (n, 1))
+        grids[np.arange(n)[:, np.newaxis], empty[order]] = stones
+        first_player = (grids == CellState.FIRST_PLAYER).reshape(
+            n, self.grid_size, self.grid_size
+        )
+        starts = np.zeros_like(first_player)
+        starts[:, 0, :] = True
+        first_player_wins = connected_cells(first_player, starts)[:, -1, :].any(axis=1)
+        return np.where(
+            first_player_wins,
+            Outcome.FIRST_PLAYER_WIN.value,
+            Outcome.SECOND_PLAYER_WIN.value,
+        )
+
     def probabilities_grid(self, action_probabilities: Sequence[float]) -> str:
         board = [[0.0 for _ in range(self.grid_size)] for _ in range(self.grid_size)]
         for action, probability in enumerate(action_probabilities):
@@ -156,5 +406,24 @@ class HexManager(GameManager[HexState]):
         return "\n".join(grid)
 
 
+def connected_cells(stones: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    # Flood fill of boolean (N, size, size) arrays, giving the stones that are
+    # connected to a stone in starts, on all the boards at once
+    reached = stones & starts
+    while True:
+        grown = reached.copy()
+        grown[:, 1:, :] |= reached[:, :-1, :]
+        grown[:, :-1, :] |= reached[:, 1:, :]
+        grown[:, :, 1:] |= reached[:, :, :-1]
+        grown[:, :, :-1] |= reached[:, :, 1:]
+        # The diagonal neighbours at (x + 1, y - 1) and (x - 1, y + 1)
+        grown[:, 1:, :-1] |= reached[:, :-1, 1:]
+        grown[:, :-1, 1:] |= reached[:, 1:, :-1]
+        grown &= stones
+        if np.array_equal(grown, reached):
+            return reached
+        reached = grown
+
+
 if __name__ == "__main__":
     play_random_mcts(HexManager(grid_size=4), num_simulations=1000)
@@ -1,7 +1,11 @@
-from functools import lru_cache
+import itertools
+import random
 from typing import List, Sequence
 
-from deep_mcts.game import Player, CellState
+import numpy as np
+
+from deep_mcts.cache import cached
+from deep_mcts.game import Player, CellState, StateBatch, ZOBRIST_PLAYER_KEY
 from deep_mcts.hex.game import HexManager, HexState, Action
 from deep_mcts.mcts import play_random_mcts
 
@@ -13,28 +17,94 @@ class HexWithSwapManager(HexManager):
         super().__init__(grid_size, num_actions=grid_size ** 2 + 1)
         self.swap_move = grid_size ** 2
 
-    @lru_cache(maxsize=2 ** 20)
+    @cached
     def generate_child_state(  # type: ignore[override]
         self, state: HexState, action: Action
     ) -> HexState:
         assert action in self.legal_actions(state)
         if action == self.swap_move:
+            # Swapping the colours of the stones changes both of their keys
+            key = state.key ^ ZOBRIST_PLAYER_KEY
+            for cell, cell_state in enumerate(
+                itertools.chain.from_iterable(state.grid)
+            ):
+                if cell_state != CellState.EMPTY:
+                    first_key, second_key = self.zobrist_table[cell]
+                    key ^= first_key ^ second_key
             return HexState(
                 state.player.opposite(),
                 tuple(tuple(cell.opposite() for cell in row) for row in state.grid),
+                key,
+                state.empty_cells,
+                state.num_moves + 1,
             )
         return super().generate_child_state(state, action)
 
-    @lru_cache(maxsize=2 ** 20)
+    @cached
     def legal_actions(self, state: HexState) -> List[Action]:  # type: ignore[override]
         actions = super().legal_actions(state)
-        if (
-            state.player == Player.SECOND
-            and sum(sum(x != CellState.EMPTY for x in row) for row in state.grid) == 1
-        ):
-            actions.append(self.swap_move)
+        if state.player == Player.SECOND and state.num_moves == 1:
+            # A new list, the one of HexManager is cached too
+            actions = actions + [self.swap_move]
         return actions
 
+    def legal_action_mask(self, state: HexState) -> np.ndarray:
+        return np.append(
+            super().legal_action_mask(state),
+            state.player == Player.SECOND and state.num_moves == 1,
+        )
+
+    def generate_child_states(
+        self, states: StateBatch, actions: np.ndarray
+    ) -> StateBatch:
+        swaps = actions == self.swap_move
+        child_states = super().generate_child_states(
+            StateBatch(states.players[~swaps], states.grids[~swaps]),
+            actions[~swaps],
+        )
+        grids = np.empty_like(states.grids)
+        grids[~swaps] = child_states.grids
+        assert np.all(self.legal_action_masks(states)[swaps, self.swap_move])
+        swapped = states.grids[swaps]
+        grids[swaps] = np.where(
+            swapped == CellState.EMPTY, CellState.EMPTY, 1 - swapped
+        )
+        return StateBatch(1 - states.players, grids)
+
+    def legal_action_masks(self, states: StateBatch) -> np.ndarray:
+        can_swap = (states.players == Player.SECOND) & (
+            (states.grids != CellState.EMPTY).sum(axis=(1, 2)) == 1
+        )
+        return np.concatenate(
+            [super().legal_action_masks(states), can_swap[:, np.newaxis]], axis=1
+        )
+
+    # Random playouts from a state where the swap is legal swap with the same
+    # probability as any other move, and are Hex games after that
+
+    def random_rollout(self, state: HexState) -> float:
+        if not self.is_final_state(state):
+            actions = self.legal_actions(state)
+            if self.swap_move in actions and random.randrange(len(actions)) == 0:
+                state = self.generate_child_state(state, self.swap_move)
+        return super().random_rollout(state)
+
+    def random_rollouts(self, state: HexState, n: int) -> np.ndarray:
+        if self.is_final_state(state):
+            return super().random_rollouts(state, n)
+        actions = self.legal_actions(state)
+        if self.swap_move not in actions:
+            return super().random_rollouts(state, n)
+        num_swaps = np.random.binomial(n, 1 / len(actions))
+        return np.concatenate(
+            [
+                super().random_rollouts(
+                    self.generate_child_state(state, self.swap_move), num_swaps
+                ),
+                super().random_rollouts(state, n - num_swaps),
+            ]
+        )
+
     def probabilities_grid(self, action_probabilities: Sequence[float]) -> str:
         return f"{super().probabilities_grid(action_probabilities[:-1])}\nswap: {action_probabilities[-1]}"
 
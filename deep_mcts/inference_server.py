@@ -0,0 +1,268 @@
+import queue
+import time
+from multiprocessing.synchronize import Semaphore
+from typing import Generic, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+import torch
+from torch import multiprocessing
+
+from deep_mcts.game import GameManager, State
+from deep_mcts.gamenet import GameNet
+
+_S = TypeVar("_S", bound=State)
+# The number of a client and the number of states in its input buffer, or
+# None to stop the server
+InferenceRequest = Optional[Tuple[int, int]]
+
+
+class InferenceClient(Generic[_S]):
+    # The side of an inference server used by a self-play process. States are
+    # encoded here and written to the input buffer of the client in shared
+    # memory, so only the client number and the number of states go through
+    # the request queue, and the server writes the outputs of the network
+    # back to shared memory. Clients evaluate states like a GameNet, so they
+    # can be passed to cached_state_evaluator and
+    # cached_batch_state_evaluator.
+    game_net: GameNet[_S]
+    manager: GameManager[_S]
+    number: int
+    requests: "multiprocessing.Queue[InferenceRequest]"
+    response: Semaphore
+    inputs: torch.Tensor
+    values: torch.Tensor
+    policies: torch.Tensor
+
+    def __init__(
+        self,
+        game_net: GameNet[_S],
+        number: int,
+        requests: "multiprocessing.Queue[InferenceRequest]",
+        response: Semaphore,
+        inputs: torch.Tensor,
+        values: torch.Tensor,
+        policies: torch.Tensor,
+    ) -> None:
+        # The network of game_net is never run, it is only used to encode
+        # states and process the outputs
+        self.game_net = game_net
+        self.manager = game_net.manager
+        self.number = number
+        self.requests = requests
+        self.response = response
+        self.inputs = inputs
+        self.values = values
+        self.policies = policies
+
+    def evaluate(self, state: _S) -> Tuple[float, np.ndarray]:
+        values, probabilities = self.evaluate_batch([state])
+        return float(values[0]), probabilities[0]
+
+    def evaluate_states(self, states: Sequence[_S]) -> List[Tuple[float, np.ndarray]]:
+        values, probabilities = self.evaluate_batch(states)
+        return list(zip(values.tolist(), probabilities))
+
+    def evaluate_batch(self, states: Sequence[_S]) -> Tuple[np.ndarray, np.ndarray]:
+        values = []
+        probabilities = []
+        capacity = len(self.inputs)
+        for start in range(0, len(states), capacity):
+            chunk = states[start : start + capacity]
+            n = len(chunk)
+            self.inputs[:n] = self.game_net.states_to_tensor(chunk)
+            self.requests.put((self.number, n))
+            self.response.acquire()
+            chunk_values, chunk_probabilities = self.game_net._process_outputs(
+                chunk, self.values[:n], self.policies[:n]
+            )
+            values.append(chunk_values)
+            probabilities.append(chunk_probabilities)
+        return np.concatenate(values), np.concatenate(probabilities)
+
+
+class InferenceServers(Generic[_S]):
+    # Processes running the network for many self-play processes, so their
+    # states are evaluated together in large batches instead of one forward
+    # pass per state and process. Client i sends its requests to server
+    # i % num_servers. A server collects requests until they hold
+    # max_batch_size states or max_delay seconds have passed since the first
+    # one, and evaluates them with a single forward pass. game_net is shared
+    # with the servers, which evaluate with an inference copy of it, or a
+    # quantized copy if there are calibration states. Loading new weights
+    # into game_net and changing last_trained_iteration makes them copy it
+    # again.
+    clients: List[InferenceClient[_S]]
+    requests: "List[multiprocessing.Queue[InferenceRequest]]"
+    processes: List[multiprocessing.Process]
+
+    def __init__(
+        self,
+        game_net: GameNet[_S],
+        num_servers: int,
+        num_clients: int,
+        max_batch_size: int = 256,
+        max_delay: float = 0.002,
+        report_interval: float = 60.0,
+        last_trained_iteration: Optional[torch.Tensor] = None,
+        calibration_states: Optional[torch.Tensor] = None,
+    ) -> None:
+        if num_servers < 1:
+            raise ValueError("num_servers must be at least 1")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        context = multiprocessing.get_context("spawn")
+        # Every client can send up to max_batch_size states at a time, and
+        # the shapes of the outputs are those of the network
+        example = game_net.states_to_tensor([game_net.manager.initial_game_state()])
+        game_net.net.eval()
+        with torch.autograd.no_grad():
+            values, policies = game_net.forward(example.to(game_net.device).float())
+        inputs = torch.zeros(
+            (num_clients, max_batch_size, *example.shape[1:]), dtype=example.dtype
+        ).share_memory_()
+        value_outputs = torch.zeros(
+            (num_clients, max_batch_size, *values.shape[1:])
+        ).share_memory_()
+        policy_outputs = torch.zeros(
+            (num_clients, max_batch_size, *policies.shape[1:])
+        ).share_memory_()
+        responses = [context.Semaphore(0) for _ in range(num_clients)]
+        self.requests = [context.Queue() for _ in range(num_servers)]
+        # A copy on the CPU, so the clients don't need the device of game_net
+        client_game_net = game_net.copy()
+        self.clients = [
+            InferenceClient(
+                client_game_net,
+                i,
+                self.requests[i % num_servers],
+                responses[i],
+                inputs[i],
+                value_outputs[i],
+                policy_outputs[i],
+            )
+            for i in range(num_clients)
+        ]
+        self.processes = []
+        for i in range(num_servers):
+            process = context.Process(
+                target=inference_server,
+                args=(
+                    i,
+                    game_net,
+                    self.requests[i],
+                    inputs,
+                    value_outputs,
+                    policy_outputs,
+                    responses,
+                    max_batch_size,
+                    max_delay,
+                    report_interval,
+                    last_trained_iteration,
+                    calibration_states,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self.processes.append(process)
+
+    def close(self) -> None:
+        for requests in self.requests:
+            requests.put(None)
+        for process in self.processes:
+            process.join()
+        self.processes = []
+
+
+def inference_server(
+    server_number: int,
+    game_net: GameNet[_S],
+    requests: "multiprocessing.Queue[InferenceRequest]",
+    inputs: torch.Tensor,
+    values: torch.Tensor,
+    policies: torch.Tensor,
+    responses: List[Semaphore],
+    max_batch_size: int,
+    max_delay: float,
+    report_interval: float,
+    last_trained_iteration: Optional[torch.Tensor],
+    calibration_states: Optional[torch.Tensor],
+) -> None:
+    inference_net = inference_copy(game_net, calibration_states)
+    copied_iteration = last_trained_iteration_value(last_trained_iteration)
+    batch_sizes: List[int] = []
+    last_report = time.perf_counter()
+    # A request that didn't fit in the last batch, which starts the next one
+    held_request: InferenceRequest = None
+    while True:
+        if held_request is not None:
+            request, held_request = held_request, None
+        else:
+            request = requests.get()
+        if request is None:
+            break
+        batch = [request]
+        num_states = request[1]
+        deadline = time.perf_counter() + max_delay
+        while num_states < max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                request = requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                # Stop after answering the requests already collected
+                requests.put(None)
+                break
+            if num_states + request[1] > max_batch_size:
+                held_request = request
+                break
+            batch.append(request)
+            num_states += request[1]
+        iteration = last_trained_iteration_value(last_trained_iteration)
+        if iteration != copied_iteration:
+            inference_net = inference_copy(game_net, calibration_states)
+            copied_iteration = iteration
+        states = torch.cat([inputs[client, :n] for client, n in batch])
+        with torch.autograd.no_grad():
+            batch_values, batch_policies = inference_net.forward(
+                states.to(inference_net.device).float()
+            )
+        batch_values = batch_values.cpu()
+        batch_policies = batch_policies.cpu()
+        start = 0
+        for client, n in batch:
+            values[client, :n] = batch_values[start : start + n]
+            policies[client, :n] = batch_policies[start : start + n]
+            start += n
+            responses[client].release()
+        batch_sizes.append(num_states)
+        if time.perf_counter() - last_report >= report_interval:
+            report_batch_sizes(server_number, batch_sizes)
+            batch_sizes = []
+            last_report = time.perf_counter()
+    if batch_sizes:
+        report_batch_sizes(server_number, batch_sizes)
+
+
+def inference_copy(
+    game_net: GameNet[_S], calibration_states: Optional[torch.Tensor]
+) -> GameNet[_S]:
+    if calibration_states is not None:
+        return game_net.to_quantized(calibration_states)
+    return game_net.to_inference()
+
+
+def last_trained_iteration_value(last_trained_iteration: Optional[torch.Tensor]) -> int:
+    return (
+        int(last_trained_iteration.item()) if last_trained_iteration is not None else 0
+    )
+
+
+def report_batch_sizes(server_number: int, batch_sizes: List[int]) -> None:
+    print(
+        f"{time.strftime('%H:%M:%S')} inference server {server_number}: "
+        f"{len(batch_sizes)} batches, batch size mean {np.mean(batch_sizes):.1f}, "
+        f"median {np.median(batch_sizes):.0f}, max {max(batch_sizes)}"
+    )
@@ -1,5 +1,7 @@
 import random
+import sys
 from abc import ABC
+from collections import OrderedDict
 from math import sqrt
 from typing import (
     Callable,
@@ -11,8 +13,12 @@ from typing import (
     Generic,
     Optional,
     Sequence,
+    Set,
+    cast,
 )
+import threading
 import time
+import weakref
 
 import numpy as np
 
@@ -21,21 +27,111 @@ from deep_mcts.tournament import Agent
 
 _S = TypeVar("_S", bound=State)
 StateEvaluator = Callable[[_S], Tuple[float, Sequence[float]]]
+BatchStateEvaluator = Callable[[Sequence[_S]], Sequence[Tuple[float, Sequence[float]]]]
 RolloutPolicy = Callable[[_S], Action]
+# The exact value of a state, or None if it can't be solved
+EndgameSolver = Callable[[_S], Optional[float]]
+# Simulations with expansion, without expansion and skipped by early stopping
+SimulationStats = Tuple[int, int, int]
+
+
+# Rows of the statistics arrays. PROVEN holds the exact value of the node
+# once the solver has proven it, and UNPROVEN until then.
+VISITS, VALUE_SUM, PROBABILITY, PROVEN = range(4)
+UNPROVEN = -1.0
 
 
 class Node:
-    __slots__ = ["children", "value_sum", "visits", "probability"]
+    # The statistics of a node are stored in an array shared with its
+    # siblings and owned by the parent, so that the children of a node can
+    # be scored with a few vectorized operations during selection.
+    __slots__ = [
+        "children",
+        "child_actions",
+        "child_statistics",
+        "statistics",
+        "index",
+        "state",
+        "__weakref__",
+    ]
     children: Dict[Action, "Node"]
-    value_sum: float
-    visits: int
-    probability: float
-
-    def __init__(self, probability: float = -1.0) -> None:
-        self.value_sum = 0.0
-        self.visits = 0
-        self.probability = probability
+    child_actions: List[Action]
+    child_statistics: Optional[np.ndarray]
+    statistics: np.ndarray
+    index: int
+    # The state is only stored when MCTS.cache_states is enabled
+    state: Optional[State]
+
+    def __init__(
+        self,
+        probability: float = -1.0,
+        statistics: Optional[np.ndarray] = None,
+        index: int = 0,
+    ) -> None:
+        if statistics is None:
+            statistics = np.array([[0.0], [0.0], [probability], [UNPROVEN]])
+        self.statistics = statistics
+        self.index = index
         self.children = {}
+        self.child_actions = []
+        self.child_statistics = None
+        self.state = None
+
+    @property
+    def visits(self) -> int:
+        return int(self.statistics[VISITS, self.index])
+
+    @visits.setter
+    def visits(self, visits: int) -> None:
+        self.statistics[VISITS, self.index] = visits
+
+    @property
+    def value_sum(self) -> float:
+        return float(self.statistics[VALUE_SUM, self.index])
+
+    @value_sum.setter
+    def value_sum(self, value_sum: float) -> None:
+        self.statistics[VALUE_SUM, self.index] = value_sum
+
+    @property
+    def probability(self) -> float:
+        return float(self.statistics[PROBABILITY, self.index])
+
+    @probability.setter
+    def probability(self, probability: float) -> None:
+        self.statistics[PROBABILITY, self.index] = probability
+
+    @property
+    def proven(self) -> float:
+        return float(self.statistics[PROVEN, self.index])
+
+    @proven.setter
+    def proven(self, proven: float) -> None:
+        self.statistics[PROVEN, self.index] = proven
+
+    def expand(self, actions: Sequence[Action], probabilities: Sequence[float]) -> None:
+        statistics = np.zeros((4, len(actions)))
+        statistics[PROBABILITY] = probabilities
+        statistics[PROVEN] = UNPROVEN
+        self.child_statistics = statistics
+        self.child_actions = list(actions)
+        self.children = {
+            action: Node(statistics=statistics, index=i)
+            for i, action in enumerate(actions)
+        }
+
+    def detach(self) -> None:
+        # Give the node its own copy of its statistics, so the array shared
+        # with its former siblings can be freed
+        self.statistics = self.statistics[:, self.index : self.index + 1].copy()
+        self.index = 0
+
+    def share_expansion(self, node: "Node") -> None:
+        # Make this node a transposition of node: both get the same children
+        # and child statistics, turning the tree into a DAG
+        self.children = node.children
+        self.child_actions = node.child_actions
+        self.child_statistics = node.child_statistics
 
     def u(self, parent: "Node") -> float:
         assert self.probability != -1.0
@@ -54,6 +150,48 @@ class Node:
         return value
 
 
+def select_child(
+    visits: np.ndarray,
+    value_sums: np.ndarray,
+    probabilities: np.ndarray,
+    parent_visits: int,
+    player: Player,
+    proven: Optional[np.ndarray] = None,
+) -> int:
+    # Vectorized equivalent of taking the max (or min) of Node.value +- Node.u
+    # over the children, including picking the first child on ties. Children
+    # proven to lose are skipped, unless there is nothing else to pick.
+    c = 1.25
+    values = value_sums / np.maximum(visits, 1)
+    # Count unvisited nodes as lost
+    values[visits == 0] = player.loss().value
+    u = c * probabilities * sqrt(parent_visits) / (1 + visits)
+    if player == Player.max_player():
+        scores = values + u
+    else:
+        scores = u - values
+    if proven is not None:
+        lost = proven == player.loss().value
+        if not lost.all():
+            scores[lost] = -np.inf
+    return int(np.argmax(scores))
+
+
+def count_nodes(root: Node) -> int:
+    # Nodes shared by transpositions are only counted once
+    num_nodes = 1
+    seen: Set[int] = set()
+    nodes = [root]
+    while nodes:
+        node = nodes.pop()
+        if node.child_statistics is None or id(node.child_statistics) in seen:
+            continue
+        seen.add(id(node.child_statistics))
+        num_nodes += len(node.child_actions)
+        nodes.extend(node.children.values())
+    return num_nodes
+
+
 class MCTS(Generic[_S]):
     game_manager: GameManager[_S]
     root: Node
@@ -66,6 +204,18 @@ class MCTS(Generic[_S]):
     dirichlet_factor: float
     rollout_share: float
     time_per_move: float
+    batch_state_evaluator: Optional[BatchStateEvaluator[_S]]
+    leaf_batch_size: int
+    num_threads: int
+    transposition_table_size: int
+    transpositions: "Optional[OrderedDict[_S, weakref.ReferenceType[Node]]]"
+    cache_states: bool
+    max_nodes: Optional[int]
+    num_nodes: int
+    early_stopping: bool
+    random_rollouts: int
+    endgame_solver: Optional[EndgameSolver[_S]]
+    solver: bool
 
     def __init__(
         self,
@@ -78,9 +228,31 @@ class MCTS(Generic[_S]):
         dirichlet_factor: float = 0.25,
         rollout_share: float = 1.0,
         time_per_move: float = float("inf"),
+        batch_state_evaluator: Optional[BatchStateEvaluator[_S]] = None,
+        leaf_batch_size: int = 1,
+        num_threads: int = 1,
+        transposition_table_size: int = 0,
+        cache_states: bool = False,
+        max_nodes: Optional[int] = None,
+        early_stopping: bool = False,
+        random_rollouts: int = 0,
+        endgame_solver: Optional[EndgameSolver[_S]] = None,
+        solver: bool = False,
     ) -> None:
-        if rollout_policy is None and state_evaluator is None:
+        if rollout_policy is None and state_evaluator is None and random_rollouts == 0:
             raise ValueError("Both rollout_policy and state_evaluator cannot be None")
+        if random_rollouts < 0:
+            raise ValueError("random_rollouts cannot be negative")
+        if leaf_batch_size < 1:
+            raise ValueError("leaf_batch_size must be at least 1")
+        if num_threads < 1:
+            raise ValueError("num_threads must be at least 1")
+        if num_threads > 1 and leaf_batch_size > 1:
+            raise ValueError("num_threads and leaf_batch_size cannot both be above 1")
+        if transposition_table_size < 0:
+            raise ValueError("transposition_table_size cannot be negative")
+        if max_nodes is not None and max_nodes < 1:
+            raise ValueError("max_nodes must be at least 1")
         self.game_manager = game_manager
         self.num_simulations = num_simulations
         self.rollout_policy = rollout_policy
@@ -92,6 +264,38 @@ class MCTS(Generic[_S]):
         self.dirichlet_factor = dirichlet_factor
         self.rollout_share = rollout_share
         self.time_per_move = time_per_move
+        self.batch_state_evaluator = batch_state_evaluator
+        self.leaf_batch_size = leaf_batch_size
+        self.num_threads = num_threads
+        self.transposition_table_size = transposition_table_size
+        # Expanded nodes by state, in least recently used order. The table
+        # only holds weak references, so it doesn't keep subtrees that are
+        # no longer reachable from the root alive.
+        self.transpositions = OrderedDict() if transposition_table_size > 0 else None
+        # Trade memory for speed by keeping the state of every visited node,
+        # so selection doesn't have to generate the child states again
+        self.cache_states = cache_states
+        # Once the tree has max_nodes nodes, leaves are no longer expanded and
+        # are evaluated again on every visit instead
+        self.max_nodes = max_nodes
+        self.num_nodes = 1
+        # Stop searching once the most visited child of the root can't be
+        # overtaken. This doesn't change the move with the most visits, but
+        # it does change the visit distribution returned by step. With the
+        # solver, a proof can change the move at any time, so the search only
+        # stops early once the root is proven.
+        self.early_stopping = early_stopping
+        # Instead of following rollout_policy, rollouts average this many
+        # uniformly random playouts from GameManager.random_rollouts, which
+        # some managers run much faster than playing the moves one by one
+        self.random_rollouts = random_rollouts
+        # States the endgame solver solves are treated like final states:
+        # they get their exact value and are never expanded
+        self.endgame_solver = endgame_solver
+        # MCTS-solver: final and solved leaves are proven, and proofs are
+        # propagated up the tree with the minimax rules. The search skips
+        # children proven to lose and stops once the root is proven.
+        self.solver = solver
 
     def self_play(self) -> Iterable[Tuple[_S, _S, Action, Sequence[float]]]:
         i = 0
@@ -103,91 +307,345 @@ class MCTS(Generic[_S]):
                 )
             else:
                 action = np.argmax(action_probabilities)
-            next_node = self.root.children[action]
-            self.root = next_node
             old_state = self.state
-            self.state = self.game_manager.generate_child_state(self.state, action)
+            self.make_move(action)
             i += 1
             yield old_state, self.state, action, action_probabilities
 
-    def step(self) -> Tuple[List[float], Tuple[int, int]]:
+    def step(self) -> Tuple[List[float], SimulationStats]:
         if not self.root.children:
-            self.expand_node(self.root, self.state)
-            self.root.visits += 1
+            if not self.find_transposition(self.root, self.state):
+                self.expand_node(self.root, self.state)
+                self.root.visits += 1
+            # A root proven as a leaf still has to find the move that gets
+            # its value
+            self.root.proven = UNPROVEN
         self.add_dirichlet_noise(self.root)
+        simulation_stats = self.run_simulations()
+        visits = self.policy_visits()
+        action_probabilities = np.zeros(self.game_manager.num_actions)
+        action_probabilities[self.root.child_actions] = visits / visits.sum()
+        return action_probabilities.tolist(), simulation_stats
+
+    def run_simulations(self) -> SimulationStats:
+        if self.num_threads > 1:
+            return self.run_parallel_simulations()
         simulations_with_expansion = 0
         simulations_without_expansion = 0
-        if self.time_per_move < float("inf"):
-            now = time.perf_counter()
-            while (
-                time.perf_counter() - now < self.time_per_move
-                and simulations_with_expansion + simulations_without_expansion
-                < self.num_simulations
-            ):
-                leaf_state = self.simulation()
-                if self.game_manager.is_final_state(leaf_state):
-                    simulations_without_expansion += 1
-                else:
-                    simulations_with_expansion += 1
-        else:
-            for _ in range(self.num_simulations):
-                leaf_state = self.simulation()
-                if self.game_manager.is_final_state(leaf_state):
+        simulations_saved = 0
+        now = time.perf_counter()
+        while (
+            simulations_with_expansion + simulations_without_expansion
+            < self.num_simulations
+            and (
+                self.time_per_move == float("inf")
+                or time.perf_counter() - now < self.time_per_move
+            )
+        ):
+            if self.is_solved():
+                simulations_saved = self.remaining_simulations(
+                    simulations_with_expansion + simulations_without_expansion, now
+                )
+                break
+            if self.leaf_batch_size > 1:
+                remaining = self.num_simulations - (
+                    simulations_with_expansion + simulations_without_expansion
+                )
+                terminal_leaves = self.simulation_batch(
+                    int(min(self.leaf_batch_size, remaining))
+                )
+            else:
+                terminal_leaves = [self.simulation()]
+            for is_terminal in terminal_leaves:
+                if is_terminal:
                     simulations_without_expansion += 1
                 else:
                     simulations_with_expansion += 1
-        visit_sum = sum(node.visits for node in self.root.children.values())
+            if self.early_stopping:
+                remaining = self.remaining_simulations(
+                    simulations_with_expansion + simulations_without_expansion, now
+                )
+                if self.is_decided(remaining):
+                    simulations_saved = remaining
+                    break
         return (
-            [
-                self.root.children[action].visits / visit_sum
-                if action in self.root.children
-                else 0.0
-                for action in range(self.game_manager.num_actions)
-            ],
-            (simulations_with_expansion, simulations_without_expansion),
+            simulations_with_expansion,
+            simulations_without_expansion,
+            simulations_saved,
         )
 
-    def simulation(self) -> _S:
+    def remaining_simulations(self, num_simulations: int, start: float) -> int:
+        # When searching on time, estimate how many simulations fit in the
+        # time that is left from the rate so far
+        remaining: float = self.num_simulations - num_simulations
+        if self.time_per_move != float("inf"):
+            elapsed = time.perf_counter() - start
+            remaining = min(
+                remaining,
+                num_simulations / elapsed * (self.time_per_move - elapsed),
+            )
+        if remaining == float("inf"):
+            return sys.maxsize
+        return max(int(remaining), 0)
+
+    def is_decided(self, remaining_simulations: int) -> bool:
+        # Whether the runner-up can't catch up with the most visited child,
+        # even if it gets all the remaining simulations
+        visits = self.root_child_visits()
+        if self.solver:
+            # A single simulation can prove a child, which can drop the most
+            # visited child from policy_visits or solve the root with another
+            # move, so only stop early once no child is left to prove
+            proven = self.root.child_statistics[PROVEN]  # type: ignore[index]
+            if (proven == UNPROVEN).any():
+                return False
+            visits = self.policy_visits()
+        if len(visits) < 2:
+            return True
+        runner_up, best = np.partition(visits, -2)[-2:]
+        return bool(best - runner_up > remaining_simulations)
+
+    def root_child_visits(self) -> np.ndarray:
+        return self.root.child_statistics[VISITS]  # type: ignore[index]
+
+    def is_solved(self) -> bool:
+        return self.solver and self.root.proven != UNPROVEN
+
+    def policy_visits(self) -> np.ndarray:
+        # The visits of the root children that step turns into action
+        # probabilities. The solver leaves out the children proven to be
+        # worse than the root, since their visits only reflect how long it
+        # took to prove them.
+        visits = self.root_child_visits()
+        if not self.solver:
+            return visits
+        proven = self.root.child_statistics[PROVEN]  # type: ignore[index]
+        if self.is_solved():
+            keep = proven == self.root.proven
+        else:
+            keep = proven != self.state.player.loss().value
+        if not keep.any():
+            return visits
+        if not visits[keep].any():
+            return keep.astype(np.float64)
+        return np.where(keep, visits, 0)
+
+    def simulation(self) -> bool:
+        # Whether the leaf was terminal, so the caller can count it without
+        # asking the endgame solver again
         path, state = self.tree_search()
         leaf_node = path[-1]
-        evaluation = self.evaluate_leaf(leaf_node, state)
+        terminal_value = self.terminal_value(state)
+        evaluation = self.evaluate_leaf(leaf_node, state, terminal_value)
         self.backpropagate(path, evaluation)
         if __debug__:
-            if self.game_manager.is_final_state(state):
+            if terminal_value is not None:
                 assert leaf_node.value(state) == evaluation
-            else:
+            elif self.max_nodes is None:
                 assert (leaf_node.visits, leaf_node.value_sum) == (1, evaluation)
-        return state
+        return terminal_value is not None
+
+    def run_parallel_simulations(self) -> SimulationStats:
+        # Tree parallelism: every thread runs whole simulations on the shared
+        # tree. The tree itself is only touched while holding the lock, which
+        # is released while the leaf is evaluated, so threads overlap in the
+        # state evaluator (PyTorch releases the GIL during forward passes).
+        condition = threading.Condition()
+        pending_leaves: Set[Node] = set()
+        # Simulations with and without expansion, and saved by early stopping
+        simulation_counts = [0, 0, 0]
+        started_simulations = 0
+        now = time.perf_counter()
+
+        def worker() -> None:
+            nonlocal started_simulations
+            while True:
+                with condition:
+                    if started_simulations >= self.num_simulations or (
+                        time.perf_counter() - now >= self.time_per_move
+                    ):
+                        return
+                    if self.is_solved():
+                        remaining = self.remaining_simulations(started_simulations, now)
+                        simulation_counts[2] = max(simulation_counts[2], remaining)
+                        return
+                    if self.early_stopping and started_simulations > 0:
+                        # Simulations in progress are already counted in the
+                        # visits of the root children through virtual losses
+                        remaining = self.remaining_simulations(started_simulations, now)
+                        if self.is_decided(remaining):
+                            simulation_counts[2] = max(simulation_counts[2], remaining)
+                            return
+                    started_simulations += 1
+                is_terminal = self.parallel_simulation(condition, pending_leaves)
+                with condition:
+                    simulation_counts[int(is_terminal)] += 1
+
+        threads = [threading.Thread(target=worker) for _ in range(self.num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return simulation_counts[0], simulation_counts[1], simulation_counts[2]
+
+    def parallel_simulation(
+        self, condition: threading.Condition, pending_leaves: Set[Node]
+    ) -> bool:
+        # Whether the leaf was terminal, found while holding the lock so the
+        # caches of the manager and the endgame solver aren't asked again
+        with condition:
+            while True:
+                path, state = self.tree_search()
+                leaf_node = path[-1]
+                terminal_value = self.terminal_value(state)
+                if terminal_value is not None or leaf_node not in pending_leaves:
+                    break
+                # Another thread is evaluating this leaf, so wait for it to
+                # be expanded instead of evaluating it twice
+                condition.wait()
+            if terminal_value is not None:
+                evaluation = self.evaluate_leaf(leaf_node, state, terminal_value)
+                self.backpropagate(path, evaluation)
+                return True
+            # The virtual loss steers the other threads away from this path
+            self.apply_virtual_loss(path)
+            pending_leaves.add(leaf_node)
+        evaluation = self.evaluate_states([state])[0]
+        with condition:
+            self.revert_virtual_loss(path)
+            pending_leaves.remove(leaf_node)
+            self.backpropagate(
+                path, self.evaluate_leaf(leaf_node, state, None, evaluation)
+            )
+            condition.notify_all()
+        return False
+
+    def simulation_batch(self, num_leaves: int) -> List[bool]:
+        # Select up to num_leaves leaves, using virtual losses to spread
+        # them over the tree, and evaluate them with a single call to the
+        # batch state evaluator. Returns whether each leaf was terminal.
+        terminal_leaves = []
+        pending: List[Tuple[List[Node], _S]] = []
+        pending_leaves: Set[Node] = set()
+        for _ in range(num_leaves):
+            path, state = self.tree_search()
+            terminal_value = self.terminal_value(state)
+            if terminal_value is not None:
+                evaluation = self.evaluate_leaf(path[-1], state, terminal_value)
+                self.backpropagate(path, evaluation)
+                terminal_leaves.append(True)
+                continue
+            if path[-1] in pending_leaves:
+                # The virtual losses weren't enough to steer the search
+                # elsewhere, so evaluate what we have
+                break
+            self.apply_virtual_loss(path)
+            pending.append((path, state))
+            pending_leaves.add(path[-1])
+        evaluations = self.evaluate_states([state for _, state in pending])
+        for (path, state), evaluation in zip(pending, evaluations):
+            self.revert_virtual_loss(path)
+            self.backpropagate(
+                path, self.evaluate_leaf(path[-1], state, None, evaluation)
+            )
+            terminal_leaves.append(False)
+        return terminal_leaves
+
+    def evaluate_states(
+        self, states: Sequence[_S]
+    ) -> Sequence[Optional[Tuple[float, Sequence[float]]]]:
+        if not states:
+            return []
+        if self.batch_state_evaluator is not None:
+            return self.batch_state_evaluator(states)
+        if self.state_evaluator is not None:
+            return [self.state_evaluator(state) for state in states]
+        return [None] * len(states)
+
+    def apply_virtual_loss(self, path: Sequence[Node]) -> None:
+        # Every action switches the player, so the player choosing each
+        # node alternates along the path, starting with the root player.
+        player = self.state.player
+        path[0].visits += 1
+        for node in path[1:]:
+            node.visits += 1
+            node.value_sum += player.loss().value
+            player = player.opposite()
+
+    def revert_virtual_loss(self, path: Sequence[Node]) -> None:
+        player = self.state.player
+        path[0].visits -= 1
+        for node in path[1:]:
+            node.visits -= 1
+            node.value_sum -= player.loss().value
+            player = player.opposite()
 
     def tree_search(self) -> Tuple[List[Node], _S]:
         path = [self.root]
         node = self.root
         state = self.state
-        while node.children:
-            if state.player == Player.max_player():
-                action, node = max(
-                    node.children.items(),
-                    key=lambda a_n: a_n[1].value(state) + a_n[1].u(node),
-                )
+        while node.child_statistics is not None or (
+            self.transpositions is not None and self.find_transposition(node, state)
+        ):
+            statistics = node.child_statistics
+            assert statistics is not None
+            if self.transpositions is None:
+                parent_visits = node.visits
             else:
-                action, node = min(
-                    node.children.items(),
-                    key=lambda a_n: a_n[1].value(state) - a_n[1].u(node),
+                # The children of a transposition are shared with other
+                # parents, so their visits can exceed the visits of the edge
+                # leading here. Count the visits of the position instead.
+                parent_visits = int(statistics[VISITS].sum()) + 1
+            action = node.child_actions[
+                select_child(
+                    statistics[VISITS],
+                    statistics[VALUE_SUM],
+                    statistics[PROBABILITY],
+                    parent_visits,
+                    state.player,
+                    statistics[PROVEN] if self.solver else None,
                 )
+            ]
+            node = node.children[action]
             path.append(node)
-            state = self.game_manager.generate_child_state(state, action)
+            if not self.cache_states:
+                state = self.game_manager.generate_child_state(state, action)
+            elif node.state is not None:
+                state = cast(_S, node.state)
+            else:
+                state = self.game_manager.generate_child_state(state, action)
+                node.state = state
         return path, state
 
-    def evaluate_leaf(self, leaf_node: Node, state: _S) -> float:
+    def terminal_value(self, state: _S) -> Optional[float]:
+        # The value of a final or solved state, or None if the state has to
+        # be expanded and evaluated
         if self.game_manager.is_final_state(state):
-            return self.game_manager.evaluate_final_state(  # type: ignore[no-any-return]
-                state
-            ).value
-        value = self.expand_node(leaf_node, state)
+            final_value: float = self.game_manager.evaluate_final_state(state).value
+            return final_value
+        if self.endgame_solver is not None:
+            return self.endgame_solver(state)
+        return None
+
+    def evaluate_leaf(
+        self,
+        leaf_node: Node,
+        state: _S,
+        terminal_value: Optional[float],
+        evaluation: Optional[Tuple[float, Sequence[float]]] = None,
+    ) -> float:
+        # terminal_value is the terminal_value of the state, which callers
+        # need before evaluating the leaf, so it is passed in rather than
+        # solved again
+        if terminal_value is not None:
+            if self.solver:
+                leaf_node.proven = terminal_value
+            return terminal_value
+        value = self.expand_node(leaf_node, state, evaluation)
         if self.state_evaluator is None:
             rollout_value = self.rollout(leaf_node, state)
             return rollout_value
-        elif self.rollout_policy is None or (
+        elif (self.rollout_policy is None and self.random_rollouts == 0) or (
             self.rollout_share < 1.0 and random.random() >= self.rollout_share
         ):
             return value
@@ -195,11 +653,25 @@ class MCTS(Generic[_S]):
             rollout_value = self.rollout(leaf_node, state)
             return (rollout_value + value) / 2
 
-    def expand_node(self, node: Node, state: _S) -> float:
-        assert (node.value_sum, node.visits) == (0.0, 0)
+    def expand_node(
+        self,
+        node: Node,
+        state: _S,
+        evaluation: Optional[Tuple[float, Sequence[float]]] = None,
+    ) -> float:
+        # Leaves that weren't expanded because of max_nodes are visited again,
+        # and solved leaves are expanded when they become the root
+        assert (
+            self.max_nodes is not None
+            or self.endgame_solver is not None
+            or (node.value_sum, node.visits) == (0.0, 0)
+        )
         legal_actions = set(self.game_manager.legal_actions(state))
         probabilities: Sequence[float]
-        if self.state_evaluator is None:
+        if evaluation is not None:
+            value, probabilities = evaluation
+            assert len(probabilities) == self.game_manager.num_actions
+        elif self.state_evaluator is None:
             value, probabilities = (
                 0.5,
                 [
@@ -210,14 +682,62 @@ class MCTS(Generic[_S]):
         else:
             value, probabilities = self.state_evaluator(state)
             assert len(probabilities) == self.game_manager.num_actions
-        node.children = {
-            action: Node(probabilities[action]) for action in legal_actions
-        }
+        if (
+            self.max_nodes is not None
+            and node is not self.root
+            and self.num_nodes + len(legal_actions) > self.max_nodes
+        ):
+            return value
+        node.expand(
+            list(legal_actions), [probabilities[action] for action in legal_actions]
+        )
+        self.num_nodes += len(legal_actions)
+        if self.transpositions is not None:
+            self.transpositions[state] = weakref.ref(node)
+            if len(self.transpositions) > self.transposition_table_size:
+                # Evicted nodes stay in the tree, they just can't be shared
+                self.transpositions.popitem(last=False)
 
         return value
 
+    def find_transposition(self, node: Node, state: _S) -> bool:
+        # Share the expansion of another node with the same state, so the
+        # statistics of all move orders leading to a position are combined
+        # and the position is evaluated only once. None of the games can
+        # repeat a position, so the resulting graph has no cycles.
+        if self.transpositions is None:
+            return False
+        reference = self.transpositions.get(state)
+        transposition = reference() if reference is not None else None
+        if transposition is None:
+            return False
+        self.transpositions.move_to_end(state)
+        node.share_expansion(transposition)
+        return True
+
+    def release_transpositions(self) -> None:
+        # Drop the entries of the nodes that were freed with the subtrees
+        # that became unreachable after moving the root
+        if self.transpositions is None:
+            return
+        for state in [
+            state
+            for state, reference in self.transpositions.items()
+            if reference() is None
+        ]:
+            del self.transpositions[state]
+
     def rollout(self, node: Node, state: _S) -> float:
-        assert (node.value_sum, node.visits) == (0.0, 0)
+        assert self.max_nodes is not None or (node.value_sum, node.visits) == (0.0, 0)
+        return self.playout(state)
+
+    def playout(self, state: _S) -> float:
+        if self.random_rollouts == 1:
+            return self.game_manager.random_rollout(state)
+        elif self.random_rollouts > 1:
+            return float(
+                self.game_manager.random_rollouts(state, self.random_rollouts).mean()
+            )
         while not self.game_manager.is_final_state(state):
             action = self.rollout_policy(state)  # type: ignore[misc]
             state = self.game_manager.generate_child_state(state, action)
@@ -225,31 +745,98 @@ class MCTS(Generic[_S]):
             state
         ).value
 
-    def backpropagate(self, path: Iterable[Node], evaluation: float) -> None:
+    def backpropagate(self, path: Sequence[Node], evaluation: float) -> None:
         for node in path:
             node.visits += 1
             node.value_sum += evaluation
+        if self.solver:
+            self.propagate_proof(path)
+
+    def propagate_proof(self, path: Sequence[Node]) -> None:
+        # Going up from the leaf, a node is proven once one of its children
+        # is proven to win for the player to move there, or once all of its
+        # children are proven, getting the best of their values. The player
+        # alternates along the path, starting with the root player.
+        players = [self.state.player, self.state.player.opposite()]
+        for i in range(len(path) - 2, -1, -1):
+            if path[i + 1].proven == UNPROVEN:
+                return
+            node = path[i]
+            player = players[i % 2]
+            proven = node.child_statistics[PROVEN]  # type: ignore[index]
+            if (proven == player.win().value).any():
+                node.proven = player.win().value
+            elif (proven != UNPROVEN).all():
+                if player == Player.max_player():
+                    node.proven = float(proven.max())
+                else:
+                    node.proven = float(proven.min())
+            else:
+                return
 
     def add_dirichlet_noise(self, node: Node) -> None:
         if self.dirichlet_alpha == 0:
             return
         noise = np.random.dirichlet([self.dirichlet_alpha] * len(node.children))
-        for i, child in enumerate(node.children.values()):
-            child.probability = (
-                child.probability * (1 - self.dirichlet_factor)
-                + noise[i] * self.dirichlet_factor
-            )
+        probabilities = node.child_statistics[PROBABILITY]  # type: ignore[index]
+        probabilities[:] = (
+            probabilities * (1 - self.dirichlet_factor) + noise * self.dirichlet_factor
+        )
 
     def reset(self) -> None:
         self.root = Node()
+        self.num_nodes = 1
         self.state = self.game_manager.initial_game_state()
+        if self.transpositions is not None:
+            self.transpositions.clear()
+
+    def set_state(self, state: _S) -> None:
+        if __debug__ and not any(
+            self.game_manager.generate_child_state(self.state, action) == state
+            for action in self.root.children
+        ):
+            assert len(self.root.children) == 0
+        self.move_root(
+            next(
+                (
+                    node
+                    for action, node in self.root.children.items()
+                    if self.game_manager.generate_child_state(self.state, action)
+                    == state
+                ),
+                Node(),
+            )
+        )
+        self.state = state
+
+    def make_move(self, action: Action) -> None:
+        if __debug__ and action not in self.root.children:
+            assert len(self.root.children) == 0
+        self.move_root(self.root.children.get(action, Node()))
+        self.state = self.game_manager.generate_child_state(self.state, action)
+
+    def move_root(self, root: Node) -> None:
+        # Release the siblings of the new root and everything below them at
+        # once, instead of leaving it to whoever drops the last reference
+        root.detach()
+        self.root.children.clear()
+        self.root = root
+        self.num_nodes = count_nodes(root)
+        self.release_transpositions()
+
+    def nbytes(self) -> int:
+        # Approximate size of the tree: every node object along with its
+        # column of the statistics array and its entries in the children
+        # dict and action list of its parent. States cached on the nodes are
+        # not included.
+        return self.num_nodes * (sys.getsizeof(self.root) + 4 * 8 + 3 * 8 + 8)
 
 
 class MCTSAgent(Agent[_S], ABC):
     mcts: MCTS[_S]
     epsilon: float
-    current_game_simulation_stats: List[Tuple[int, int]]
-    simulation_stats: List[List[Tuple[int, int]]]
+    current_game_simulation_stats: List[SimulationStats]
+    simulation_stats: List[List[SimulationStats]]
     reset_fn: Optional[Callable[["MCTSAgent[_S]"], None]]
 
     def __init__(
@@ -265,22 +852,7 @@ class MCTSAgent(Agent[_S], ABC):
         self.reset_fn = reset_fn
 
     def play(self, state: _S) -> Action:
-        if __debug__ and not any(
-            self.mcts.game_manager.generate_child_state(self.mcts.state, action)
-            == state
-            for action, node in self.mcts.root.children.items()
-        ):
-            assert len(self.mcts.root.children) == 0
-        self.mcts.root = next(
-            (
-                node
-                for action, node in self.mcts.root.children.items()
-                if self.mcts.game_manager.generate_child_state(self.mcts.state, action)
-                == state
-            ),
-            Node(),
-        )
-        self.mcts.state = state
+        self.mcts.set_state(state)
         action_probabilities, simulations = self.mcts.step()
         self.current_game_simulation_stats.append(simulations)
         action: Action
@@ -288,8 +860,7 @@ class MCTSAgent(Agent[_S], ABC):
             action = np.random.choice(len(action_probabilities), p=action_probabilities)
         else:
             action = np.argmax(action_probabilities)
-        self.mcts.root = self.mcts.root.children[action]
-        self.mcts.state = self.mcts.game_manager.generate_child_state(state, action)
+        self.mcts.make_move(action)
         return action
 
     def reset(self) -> None:
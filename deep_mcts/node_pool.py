@@ -0,0 +1,307 @@
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from deep_mcts.game import Action, State
+from deep_mcts.mcts import MCTS, SimulationStats, select_child
+
+_S = TypeVar("_S", bound=State)
+
+
+class NodePool:
+    # Struct-of-arrays storage for search nodes addressed by integer ids.
+    # The children of a node always occupy a contiguous block of ids
+    # starting at first_child, so they can be scored and updated as slices.
+    visits: np.ndarray
+    value_sum: np.ndarray
+    probability: np.ndarray
+    action: np.ndarray
+    first_child: np.ndarray
+    num_children: np.ndarray
+    size: int
+
+    def __init__(self, capacity: int = 2 ** 16) -> None:
+        self._allocate_arrays(capacity)
+        self.size = 0
+
+    def _allocate_arrays(self, capacity: int) -> None:
+        self.visits = np.zeros(capacity, dtype=np.int64)
+        self.value_sum = np.zeros(capacity, dtype=np.float64)
+        self.probability = np.full(capacity, -1.0, dtype=np.float64)
+        self.action = np.full(capacity, -1, dtype=np.int64)
+        self.first_child = np.zeros(capacity, dtype=np.int64)
+        self.num_children = np.zeros(capacity, dtype=np.int64)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.visits)
+
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self._arrays())
+
+    def _arrays(self) -> List[np.ndarray]:
+        return [
+            self.visits,
+            self.value_sum,
+            self.probability,
+            self.action,
+            self.first_child,
+            self.num_children,
+        ]
+
+    def allocate(self, n: int) -> int:
+        if self.size + n > self.capacity:
+            self._grow(max(2 * self.capacity, self.size + n))
+        start = self.size
+        end = start + n
+        self.visits[start:end] = 0
+        self.value_sum[start:end] = 0.0
+        self.probability[start:end] = -1.0
+        self.action[start:end] = -1
+        self.first_child[start:end] = 0
+        self.num_children[start:end] = 0
+        self.size = end
+        return start
+
+    def _grow(self, capacity: int) -> None:
+        old_arrays = self._arrays()
+        self._allocate_arrays(capacity)
+        for new, old in zip(self._arrays(), old_arrays):
+            new[: self.size] = old[: self.size]
+
+    def new_node(self) -> int:
+        return self.allocate(1)
+
+    def add_children(
+        self, node: int, actions: Sequence[Action], probabilities: Sequence[float]
+    ) -> None:
+        start = self.allocate(len(actions))
+        end = start + len(actions)
+        self.action[start:end] = actions
+        self.probability[start:end] = probabilities
+        self.first_child[node] = start
+        self.num_children[node] = len(actions)
+
+    def children(self, node: int) -> slice:
+        start = int(self.first_child[node])
+        return slice(start, start + int(self.num_children[node]))
+
+    def child(self, node: int, action: Action) -> Optional[int]:
+        children = self.children(node)
+        matches = np.flatnonzero(self.action[children] == action)
+        if len(matches) == 0:
+            return None
+        return children.start + int(matches[0])
+
+    def clear(self) -> None:
+        self.size = 0
+
+    def compact(self, root: int) -> int:
+        # Copy the subtree below root to the start of the arrays in
+        # breadth-first order, releasing every node that is no longer
+        # reachable. Sibling blocks stay contiguous, so this can be done
+        # one level at a time with array operations.
+        levels = [np.array([root], dtype=np.int64)]
+        level = levels[0]
+        while True:
+            counts = self.num_children[level]
+            total = int(counts.sum())
+            if total == 0:
+                break
+            offsets = np.cumsum(counts) - counts
+            level = np.repeat(self.first_child[level] - offsets, counts) + np.arange(
+                total
+            )
+            levels.append(level)
+        order = np.concatenate(levels)
+        new_ids = np.full(self.size, -1, dtype=np.int64)
+        new_ids[order] = np.arange(len(order))
+        has_children = self.num_children[order] > 0
+        first_child = np.where(
+            has_children, new_ids[self.first_child[order]], 0
+        ).astype(np.int64)
+        for array in self._arrays():
+            array[: len(order)] = array[order]
+        self.first_child[: len(order)] = first_child
+        self.size = len(order)
+        return 0
+
+
+class PooledMCTS(MCTS[_S]):
+    # MCTS that keeps the tree in a NodePool instead of Node objects.
+    # Nodes are plain integer ids into the pool.
+    pool: NodePool
+    root: int  # type: ignore[assignment]
+
+    def __init__(self, *args: Any, capacity: int = 2 ** 16, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        if self.transpositions is not None:
+            raise ValueError("PooledMCTS does not support transpositions")
+        if self.cache_states:
+            raise ValueError("PooledMCTS does not support caching states")
+        if self.solver:
+            raise ValueError("PooledMCTS does not support the solver")
+        self.pool = NodePool(capacity)
+        self.root = self.pool.new_node()
+
+    def step(self) -> Tuple[List[float], SimulationStats]:
+        pool = self.pool
+        if not pool.num_children[self.root]:
+            self.expand_node(self.root, self.state)
+            pool.visits[self.root] += 1
+        self.add_dirichlet_noise(self.root)
+        simulation_stats = self.run_simulations()
+        children = pool.children(self.root)
+        visits = self.root_child_visits()
+        action_probabilities = np.zeros(self.game_manager.num_actions)
+        action_probabilities[pool.action[children]] = visits / visits.sum()
+        return action_probabilities.tolist(), simulation_stats
+
+    def root_child_visits(self) -> np.ndarray:
+        return self.pool.visits[self.pool.children(self.root)]
+
+    def simulation(self) -> bool:
+        path, state = self.tree_search()
+        leaf_node = path[-1]
+        terminal_value = self.terminal_value(state)
+        evaluation = self.evaluate_leaf(
+            leaf_node, state, terminal_value  # type: ignore[arg-type]
+        )
+        self.backpropagate(path, evaluation)
+        if __debug__ and self.max_nodes is None and terminal_value is None:
+            assert (
+                self.pool.visits[leaf_node],
+                self.pool.value_sum[leaf_node],
+            ) == (1, evaluation)
+        return terminal_value is not None
+
+    def tree_search(self) -> Tuple[List[int], _S]:  # type: ignore[override]
+        pool = self.pool
+        path = [self.root]
+        node = self.root
+        state = self.state
+        while pool.num_children[node]:
+            children = pool.children(node)
+            node = children.start + select_child(
+                pool.visits[children],
+                pool.value_sum[children],
+                pool.probability[children],
+                pool.visits[node],
+                state.player,
+            )
+            path.append(node)
+            state = self.game_manager.generate_child_state(
+                state, int(pool.action[node])
+            )
+        return path, state
+
+    def expand_node(  # type: ignore[override]
+        self,
+        node: int,
+        state: _S,
+        evaluation: Optional[Tuple[float, Sequence[float]]] = None,
+    ) -> float:
+        if self.max_nodes is None:
+            assert (self.pool.value_sum[node], self.pool.visits[node]) == (0.0, 0)
+        legal_actions = list(set(self.game_manager.legal_actions(state)))
+        probabilities: Sequence[float]
+        if evaluation is None and self.state_evaluator is None:
+            value = 0.5
+            probabilities = [1 / len(legal_actions)] * len(legal_actions)
+        else:
+            if evaluation is not None:
+                value, all_probabilities = evaluation
+            else:
+                value, all_probabilities = self.state_evaluator(  # type: ignore[misc]
+                    state
+                )
+            assert len(all_probabilities) == self.game_manager.num_actions
+            probabilities = [all_probabilities[action] for action in legal_actions]
+        if (
+            self.max_nodes is not None
+            and node != self.root
+            and self.pool.size + len(legal_actions) > self.max_nodes
+        ):
+            return value
+        self.pool.add_children(node, legal_actions, probabilities)
+        self.num_nodes = self.pool.size
+        return value
+
+    def rollout(self, node: int, state: _S) -> float:  # type: ignore[override]
+        if self.max_nodes is None:
+            assert (self.pool.value_sum[node], self.pool.visits[node]) == (0.0, 0)
+        return self.playout(state)
+
+    def backpropagate(  # type: ignore[override]
+        self, path: Iterable[int], evaluation: float
+    ) -> None:
+        path = list(path)
+        self.pool.visits[path] += 1
+        self.pool.value_sum[path] += evaluation
+
+    def apply_virtual_loss(self, path: Sequence[int]) -> None:  # type: ignore[override]
+        self.pool.visits[path] += 1
+        self.pool.value_sum[path[1:]] += self._virtual_losses(len(path) - 1)
+
+    def revert_virtual_loss(self, path: Sequence[int]) -> None:  # type: ignore[override]
+        self.pool.visits[path] -= 1
+        self.pool.value_sum[path[1:]] -= self._virtual_losses(len(path) - 1)
+
+    def _virtual_losses(self, length: int) -> np.ndarray:
+        # The player choosing each node alternates along the path
+        player = self.state.player
+        return np.resize([player.loss().value, player.opposite().loss().value], length)
+
+    def add_dirichlet_noise(self, node: int) -> None:  # type: ignore[override]
+        if self.dirichlet_alpha == 0:
+            return
+        children = self.pool.children(node)
+        noise = np.random.dirichlet(
+            [self.dirichlet_alpha] * (children.stop - children.start)
+        )
+        self.pool.probability[children] = (
+            self.pool.probability[children] * (1 - self.dirichlet_factor)
+            + noise * self.dirichlet_factor
+        )
+
+    def reset(self) -> None:
+        self.pool.clear()
+        self.root = self.pool.new_node()
+        self.num_nodes = self.pool.size
+        self.state = self.game_manager.initial_game_state()
+
+    def set_state(self, state: _S) -> None:
+        children = self.pool.children(self.root)
+        root = next(
+            (
+                node
+                for node in range(children.start, children.stop)
+                if self.game_manager.generate_child_state(
+                    self.state, int(self.pool.action[node])
+                )
+                == state
+            ),
+            None,
+        )
+        if __debug__ and root is None:
+            assert children.start == children.stop
+        self.move_root(root)
+        self.state = state
+
+    def make_move(self, action: Action) -> None:
+        root = self.pool.child(self.root, action)
+        if __debug__ and root is None:
+            assert self.pool.num_children[self.root] == 0
+        self.move_root(root)
+        self.state = self.game_manager.generate_child_state(self.state, action)
+
+    def move_root(self, root: Optional[int]) -> None:  # type: ignore[override]
+        if root is None:
+            self.pool.clear()
+            self.root = self.pool.new_node()
+        else:
+            self.root = self.pool.compact(root)
+        self.num_nodes = self.pool.size
+
+    def nbytes(self) -> int:
+        return self.pool.nbytes()
@@ -0,0 +1,249 @@
+from typing import Any, List, Tuple
+
+import numpy as np
+
+from deep_mcts.bitboard import array_to_mask, bitboard_grid, bits, popcount
+from deep_mcts.game import (
+    Action,
+    CellState,
+    Outcome,
+    Player,
+    StateBatch,
+    ZOBRIST_PLAYER_KEY,
+)
+from deep_mcts.othello.game import OthelloManager, OthelloState
+
+
+class BitboardOthelloState(OthelloState):
+    # Othello state storing the stones of each player as the bits of an
+    # integer, see deep_mcts.bitboard. The grid is computed on demand, and
+    # setting it replaces the stones, so the state can be used anywhere an
+    # OthelloState can.
+    __slots__ = ["grid_size", "first_player_stones", "second_player_stones"]
+    grid_size: int
+    first_player_stones: int
+    second_player_stones: int
+
+    def __init__(
+        self,
+        player: Player,
+        grid_size: int,
+        first_player_stones: int,
+        second_player_stones: int,
+        key: int,
+    ) -> None:
+        self.player = player
+        self.grid_size = grid_size
+        self.first_player_stones = first_player_stones
+        self.second_player_stones = second_player_stones
+        self.key = key
+
+    @property
+    def grid(self) -> Tuple[Tuple[CellState, ...], ...]:
+        return bitboard_grid(
+            self.grid_size, self.first_player_stones, self.second_player_stones
+        )
+
+    @grid.setter
+    def grid(self, grid: Tuple[Tuple[CellState, ...], ...]) -> None:
+        cells = np.array(grid, dtype=np.int8).reshape(-1)
+        self.first_player_stones = array_to_mask(cells == CellState.FIRST_PLAYER)
+        self.second_player_stones = array_to_mask(cells == CellState.SECOND_PLAYER)
+
+    def stones(self) -> Tuple[int, int]:
+        # The stones of the player to move and of the opponent
+        if self.player == Player.FIRST:
+            return self.first_player_stones, self.second_player_stones
+        return self.second_player_stones, self.first_player_stones
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BitboardOthelloState):
+            return NotImplemented
+        return self.key == other.key and (
+            self.player,
+            self.grid_size,
+            self.first_player_stones,
+            self.second_player_stones,
+        ) == (
+            other.player,
+            other.grid_size,
+            other.first_player_stones,
+            other.second_player_stones,
+        )
+
+    def __hash__(self) -> int:
+        return self.key
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # The default pickling of slots would try to set the grid property
+        return (
+            BitboardOthelloState,
+            (
+                self.player,
+                self.grid_size,
+                self.first_player_stones,
+                self.second_player_stones,
+                self.key,
+            ),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"BitboardOthelloState(player={self.player!r}, "
+            f"grid_size={self.grid_size}, "
+            f"first_player_stones={self.first_player_stones:#x}, "
+            f"second_player_stones={self.second_player_stones:#x})"
+        )
+
+
+class BitboardOthelloManager(OthelloManager):
+    # Drop-in replacement for OthelloManager using BitboardOthelloState, with
+    # the same actions and pass move. Moves and flips are found for all
+    # cells at once by shifting the stones in each of the eight directions,
+    # so the methods are cheap enough to not be cached.
+    full_mask: int
+    # The shift of every direction, and the cells that can be reached by it
+    # without wrapping around the edge of the board
+    directions: List[Tuple[int, int]]
+
+    def __init__(self, grid_size: int) -> None:
+        super().__init__(grid_size)
+        self.full_mask = (1 << grid_size ** 2) - 1
+        column = sum(1 << (y * grid_size) for y in range(grid_size))
+        not_first_column = self.full_mask & ~column
+        not_last_column = self.full_mask & ~(column << (grid_size - 1))
+        self.directions = [
+            (x_shift + y_shift * grid_size, mask)
+            for x_shift, mask in [
+                (-1, not_last_column),
+                (0, self.full_mask),
+                (1, not_first_column),
+            ]
+            for y_shift in [-1, 0, 1]
+            if (x_shift, y_shift) != (0, 0)
+        ]
+
+    def initial_game_state(self) -> BitboardOthelloState:
+        x, y = self.grid_size // 2, self.grid_size // 2
+        return self._state(
+            Player.FIRST,
+            1 << (x - 1 + y * self.grid_size) | 1 << (x + (y - 1) * self.grid_size),
+            1 << (x + y * self.grid_size) | 1 << (x - 1 + (y - 1) * self.grid_size),
+        )
+
+    def _state(
+        self, player: Player, first_player_stones: int, second_player_stones: int
+    ) -> BitboardOthelloState:
+        # Create a state, computing its key from scratch
+        key = ZOBRIST_PLAYER_KEY if player == Player.FIRST else 0
+        for cell in bits(first_player_stones):
+            key ^= self.zobrist_table[cell][Player.FIRST]
+        for cell in bits(second_player_stones):
+            key ^= self.zobrist_table[cell][Player.SECOND]
+        return BitboardOthelloState(
+            player, self.grid_size, first_player_stones, second_player_stones, key
+        )
+
+    def generate_child_state(  # type: ignore[override]
+        self, state: BitboardOthelloState, action: Action
+    ) -> BitboardOthelloState:
+        own, opponent = state.stones()
+        if action == self.pass_move:
+            assert not self.legal_moves(own, opponent)
+            return BitboardOthelloState(
+                state.player.opposite(),
+                self.grid_size,
+                state.first_player_stones,
+                state.second_player_stones,
+                state.key ^ ZOBRIST_PLAYER_KEY,
+            )
+        # Actions can be NumPy integers, which would overflow
+        move = 1 << int(action)
+        assert self.legal_moves(own, opponent) & move
+        flips = self.flips(own, opponent, move)
+        own |= move | flips
+        opponent &= ~flips
+        key = state.key ^ self.zobrist_table[action][state.player] ^ ZOBRIST_PLAYER_KEY
+        for cell in bits(flips):
+            first_key, second_key = self.zobrist_table[cell]
+            key ^= first_key ^ second_key
+        if state.player == Player.FIRST:
+            return BitboardOthelloState(
+                Player.SECOND, self.grid_size, own, opponent, key
+            )
+        return BitboardOthelloState(Player.FIRST, self.grid_size, opponent, own, key)
+
+    def legal_moves(self, own: int, opponent: int) -> int:
+        # The empty cells ending a line of opponent stones that starts at one
+        # of our stones. A line is at most grid_size - 2 stones long.
+        empty = self.full_mask & ~(own | opponent)
+        moves = 0
+        for shift, mask in self.directions:
+            line = _shift(own, shift, mask) & opponent
+            for _ in range(self.grid_size - 3):
+                line |= _shift(line, shift, mask) & opponent
+            moves |= _shift(line, shift, mask) & empty
+        return moves
+
+    def flips(self, own: int, opponent: int, move: int) -> int:
+        # The opponent stones in lines from the move that end at our stones
+        flips = 0
+        for shift, mask in self.directions:
+            line = _shift(move, shift, mask) & opponent
+            for _ in range(self.grid_size - 3):
+                line |= _shift(line, shift, mask) & opponent
+            if _shift(line, shift, mask) & own:
+                flips |= line
+        return flips
+
+    def legal_actions(  # type: ignore[override]
+        self, state: BitboardOthelloState
+    ) -> List[Action]:
+        moves = self.legal_moves(*state.stones())
+        if not moves:
+            return [self.pass_move]
+        return list(bits(moves))
+
+    def is_final_state(  # type: ignore[override]
+        self, state: BitboardOthelloState
+    ) -> bool:
+        own, opponent = state.stones()
+        return not self.legal_moves(own, opponent) and not self.legal_moves(
+            opponent, own
+        )
+
+    def evaluate_final_state(  # type: ignore[override]
+        self, state: BitboardOthelloState
+    ) -> Outcome:
+        first_player_pieces = popcount(state.first_player_stones)
+        second_player_pieces = popcount(state.second_player_stones)
+        if first_player_pieces > second_player_pieces:
+            return Outcome.FIRST_PLAYER_WIN
+        elif second_player_pieces > first_player_pieces:
+            return Outcome.SECOND_PLAYER_WIN
+        else:
+            return Outcome.DRAW
+
+    def unstack_states(  # type: ignore[override]
+        self, states: StateBatch
+    ) -> List[BitboardOthelloState]:
+        cells = states.grids.reshape(len(states), self.grid_size ** 2)
+        return [
+            self._state(
+                Player(player),
+                sum(1 << int(i) for i in np.flatnonzero(row == CellState.FIRST_PLAYER)),
+                sum(
+                    1 << int(i) for i in np.flatnonzero(row == CellState.SECOND_PLAYER)
+                ),
+            )
+            for player, row in zip(states.players, cells)
+        ]
+
+
+def _shift(stones: int, shift: int, mask: int) -> int:
+    # Move every stone one cell in a direction, dropping the ones that leave
+    # the board. The mask removes stones that wrapped around to the other
+    # side and those shifted past the last row.
+    if shift > 0:
+        return stones << shift & mask
+    return stones >> -shift & mask
@@ -0,0 +1,120 @@
+import itertools
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from deep_mcts.bitboard import bits, popcount
+from deep_mcts.cache import Cache
+from deep_mcts.game import CellState, Outcome, PackedGridState
+from deep_mcts.othello.bitboard import BitboardOthelloManager, BitboardOthelloState
+from deep_mcts.othello.game import OthelloState
+
+# Results of the search, for the player to move
+LOSS, DRAW, WIN = -1, 0, 1
+
+
+class OthelloEndgameSolver:
+    # Exact solver for Othello positions with at most max_empty empty cells,
+    # to pass to MCTS as endgame_solver. It runs an alpha-beta search on
+    # bitboards that only decides between a win, a draw and a loss, which
+    # cuts off far more than searching for the final disc difference. Moves
+    # leaving the opponent the fewest replies are searched first while
+    # enough cells are empty for the ordering to pay off. Solved positions
+    # are kept in a cache, so MCTS can look them up on every visit.
+    manager: BitboardOthelloManager
+    max_empty: int
+    min_ordering_empty: int
+    cache: Cache
+    # Searched positions and seconds spent solving, for nodes_per_second
+    nodes: int
+    solve_time: float
+
+    def __init__(
+        self,
+        grid_size: int,
+        max_empty: int = 10,
+        min_ordering_empty: int = 5,
+        max_entries: int = 2 ** 16,
+    ) -> None:
+        self.manager = BitboardOthelloManager(grid_size)
+        self.max_empty = max_empty
+        self.min_ordering_empty = min_ordering_empty
+        self.cache = Cache(max_entries)
+        self.nodes = 0
+        self.solve_time = 0.0
+
+    def __call__(self, state: OthelloState) -> Optional[float]:
+        outcome = self.solve(state)
+        return outcome.value if outcome is not None else None
+
+    def solve(self, state: OthelloState) -> Optional[Outcome]:
+        # MCTS asks about every leaf, so positions with too many empty cells
+        # are turned away before the cache or the bitboards are touched
+        if self.num_empty(state) > self.max_empty:
+            return None
+        outcome: Optional[Outcome] = self.cache.get(state)
+        if outcome is not None:
+            return outcome
+        own, opponent = self.stones(state)
+        start = time.perf_counter()
+        result = self.search(own, opponent, LOSS, WIN)
+        self.solve_time += time.perf_counter() - start
+        if result == WIN:
+            outcome = state.player.win()
+        elif result == LOSS:
+            outcome = state.player.loss()
+        else:
+            outcome = Outcome.DRAW
+        self.cache.put(state, outcome)
+        return outcome
+
+    def num_empty(self, state: OthelloState) -> int:
+        if isinstance(state, BitboardOthelloState):
+            own, opponent = state.stones()
+            return popcount(self.manager.full_mask & ~(own | opponent))
+        if isinstance(state, PackedGridState):
+            return int(np.count_nonzero(state.array() == CellState.EMPTY))
+        return sum(row.count(CellState.EMPTY) for row in state.grid)
+
+    def stones(self, state: OthelloState) -> Tuple[int, int]:
+        # The stones of the player to move and of the opponent
+        if isinstance(state, BitboardOthelloState):
+            return state.stones()
+        stones = [0, 0]
+        for cell, cell_state in enumerate(itertools.chain.from_iterable(state.grid)):
+            if cell_state != CellState.EMPTY:
+                stones[cell_state] |= 1 << cell
+        return stones[state.player], stones[state.player.opposite()]
+
+    def search(self, own: int, opponent: int, alpha: int, beta: int) -> int:
+        # Negamax with alpha-beta pruning, returning WIN, DRAW or LOSS for
+        # the player to move, or a bound on it outside of (alpha, beta)
+        self.nodes += 1
+        manager = self.manager
+        moves = manager.legal_moves(own, opponent)
+        if not moves:
+            if not manager.legal_moves(opponent, own):
+                difference = popcount(own) - popcount(opponent)
+                return WIN if difference > 0 else LOSS if difference < 0 else DRAW
+            return -self.search(opponent, own, -beta, -alpha)
+        children: List[Tuple[int, int]] = []
+        for move in bits(moves):
+            bit = 1 << move
+            flips = manager.flips(own, opponent, bit)
+            children.append((opponent & ~flips, own | bit | flips))
+        if popcount(manager.full_mask & ~(own | opponent)) >= self.min_ordering_empty:
+            children.sort(key=lambda child: popcount(manager.legal_moves(*child)))
+        best = LOSS
+        for child_own, child_opponent in children:
+            value = -self.search(child_own, child_opponent, -beta, -alpha)
+            if value > best:
+                best = value
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        break
+        return best
+
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.solve_time if self.solve_time > 0 else 0.0
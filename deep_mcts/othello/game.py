@@ -1,19 +1,29 @@
 import itertools
 import string
-from functools import lru_cache
 from typing import Iterator, List, Tuple, Set, Sequence
 
-import dataclasses
-from dataclasses import dataclass
+import numpy as np
 
-from deep_mcts.game import CellState, GameManager, Outcome, Action, Player, State
+from deep_mcts.cache import cached
+from deep_mcts.game import (
+    CellState,
+    GameManager,
+    Outcome,
+    Action,
+    Player,
+    GridState,
+    PackedGridState,
+    StateBatch,
+    cell_grid,
+    grid_symmetries,
+    zobrist_table,
+    ZOBRIST_PLAYER_KEY,
+)
 from deep_mcts.mcts import play_random_mcts
 
 
-@dataclass(unsafe_hash=True)
-class OthelloState(State):
-    __slots__ = ["grid"]
-    grid: Tuple[Tuple[CellState, ...], ...]
+class OthelloState(GridState):
+    __slots__ = ()
 
     def __str__(self) -> str:
         symbol = {-1: ".", 0: "0", 1: "1"}
@@ -28,12 +38,18 @@ class OthelloState(State):
         return "\n".join(grid)
 
 
+class PackedOthelloState(PackedGridState, OthelloState):
+    __slots__ = ["cells"]
+
+
 class OthelloManager(GameManager[OthelloState]):
     pass_move: Action
+    zobrist_table: List[Tuple[int, int]]
 
     def __init__(self, grid_size: int) -> None:
         super().__init__(grid_size, num_actions=grid_size ** 2 + 1)
         self.pass_move = grid_size ** 2
+        self.zobrist_table = zobrist_table(grid_size ** 2)
 
     def initial_game_state(self) -> OthelloState:
         board = [
@@ -47,16 +63,19 @@ class OthelloManager(GameManager[OthelloState]):
         board[y - 1][x - 1] = CellState.SECOND_PLAYER
         return OthelloState(Player.FIRST, tuple(tuple(row) for row in board))
 
-    @lru_cache(maxsize=2 ** 20)
+    @cached
     def generate_child_state(  # type: ignore[override]
         self, state: OthelloState, action: Action
     ) -> OthelloState:
         assert action in self.legal_actions(state)
         if action == self.pass_move:
-            return dataclasses.replace(state, player=state.player.opposite())
+            return OthelloState(
+                state.player.opposite(), state.grid, state.key ^ ZOBRIST_PLAYER_KEY
+            )
         x, y = action % self.grid_size, action // self.grid_size
         grid = [[cell for cell in row] for row in state.grid]
         grid[y][x] = CellState(state.player)
+        key = state.key ^ self.zobrist_table[action][state.player] ^ ZOBRIST_PLAYER_KEY
         opposite_player = state.player.opposite()
         shifts = itertools.product([0, 1, -1], repeat=2)
         for x_shift, y_shift in shifts:
@@ -79,9 +98,13 @@ class OthelloManager(GameManager[OthelloState]):
             ):
                 for opposite_x, opposite_y in opposites:
                     grid[opposite_y][opposite_x] = CellState(state.player)
-        return OthelloState(opposite_player, tuple(tuple(row) for row in grid))
+                    first_key, second_key = self.zobrist_table[
+                        opposite_x + opposite_y * self.grid_size
+                    ]
+                    key ^= first_key ^ second_key
+        return OthelloState(opposite_player, tuple(tuple(row) for row in grid), key)
 
-    @lru_cache(maxsize=2 ** 20)
+    @cached
     def legal_actions(  # type: ignore[override]
         self, state: OthelloState
     ) -> List[Action]:
@@ -117,13 +140,13 @@ class OthelloManager(GameManager[OthelloState]):
             actions.add(self.pass_move)
         return list(actions)
 
-    @lru_cache(maxsize=2 ** 20)
+    @cached
     def is_final_state(self, state: OthelloState) -> bool:  # type: ignore[override]
         return self.legal_actions(state) == [self.pass_move] and self.legal_actions(
             self.generate_child_state(state, self.pass_move)
         ) == [self.pass_move]
 
-    @lru_cache(maxsize=2 ** 20)
+    @cached
     def evaluate_final_state(  # type: ignore[override]
         self, state: OthelloState
     ) -> Outcome:
@@ -140,6 +163,87 @@ class OthelloManager(GameManager[OthelloState]):
         else:
             return Outcome.DRAW
 
+    def initial_game_states(self, n: int) -> StateBatch:
+        return self.stack_states([self.initial_game_state()] * n)
+
+    def generate_child_states(
+        self, states: StateBatch, actions: np.ndarray
+    ) -> StateBatch:
+        assert np.all(self.legal_action_masks(states)[np.arange(len(states)), actions])
+        own = states.grids == states.players[:, np.newaxis, np.newaxis]
+        opponent = states.grids == (1 - states.players)[:, np.newaxis, np.newaxis]
+        # Passes place no stone, so they flip nothing
+        moves = np.zeros((len(states), self.grid_size ** 2 + 1), dtype=bool)
+        moves[np.arange(len(states)), actions] = True
+        moves = moves[:, :-1].reshape(own.shape)
+        flips = np.zeros_like(own)
+        for x_shift, y_shift in _directions:
+            line = shift_cells(moves, x_shift, y_shift) & opponent
+            for _ in range(self.grid_size - 3):
+                line |= shift_cells(line, x_shift, y_shift) & opponent
+            closed = (shift_cells(line, x_shift, y_shift) & own).any(axis=(1, 2))
+            flips |= line & closed[:, np.newaxis, np.newaxis]
+        grids = np.where(
+            moves | flips, states.players[:, np.newaxis, np.newaxis], states.grids
+        ).astype(np.int8)
+        return StateBatch(1 - states.players, grids)
+
+    def legal_action_masks(self, states: StateBatch) -> np.ndarray:
+        own = states.grids == states.players[:, np.newaxis, np.newaxis]
+        opponent = states.grids == (1 - states.players)[:, np.newaxis, np.newaxis]
+        moves = self._legal_moves(own, opponent).reshape(
+            len(states), self.grid_size ** 2
+        )
+        passes = ~moves.any(axis=1)
+        return np.concatenate([moves, passes[:, np.newaxis]], axis=1)
+
+    def _legal_moves(self, own: np.ndarray, opponent: np.ndarray) -> np.ndarray:
+        # The empty cells ending a line of opponent stones that starts at one
+        # of our stones, on all the boards at once
+        empty = ~(own | opponent)
+        moves = np.zeros_like(own)
+        for x_shift, y_shift in _directions:
+            line = shift_cells(own, x_shift, y_shift) & opponent
+            for _ in range(self.grid_size - 3):
+                line |= shift_cells(line, x_shift, y_shift) & opponent
+            moves |= shift_cells(line, x_shift, y_shift) & empty
+        return moves
+
+    def are_final(self, states: StateBatch) -> np.ndarray:
+        first_player = states.grids == CellState.FIRST_PLAYER
+        second_player = states.grids == CellState.SECOND_PLAYER
+        return ~self._legal_moves(first_player, second_player).any(
+            axis=(1, 2)
+        ) & ~self._legal_moves(second_player, first_player).any(axis=(1, 2))
+
+    def evaluate_final_states(self, states: StateBatch) -> np.ndarray:
+        first_player_pieces = (states.grids == CellState.FIRST_PLAYER).sum(axis=(1, 2))
+        second_player_pieces = (states.grids == CellState.SECOND_PLAYER).sum(
+            axis=(1, 2)
+        )
+        outcomes = np.full(len(states), Outcome.DRAW.value)
+        outcomes[
+            first_player_pieces > second_player_pieces
+        ] = Outcome.FIRST_PLAYER_WIN.value
+        outcomes[
+            second_player_pieces > first_player_pieces
+        ] = Outcome.SECOND_PLAYER_WIN.value
+        return outcomes
+
+    def unstack_states(self, states: StateBatch) -> List[OthelloState]:
+        return [
+            OthelloState(Player(player), cell_grid(grid))
+            for player, grid in zip(states.players, states.grids)
+        ]
+
+    def pack_state(self, state: OthelloState) -> OthelloState:
+        return PackedOthelloState.pack(state)
+
+    def symmetries(self) -> np.ndarray:
+        # The starting position only has two of these, but the rules have all
+        # of them, so transformed states have the same legal moves and outcome
+        return grid_symmetries(self.grid_size, dihedral=True)
+
     def probabilities_grid(self, action_probabilities: Sequence[float]) -> str:
         board = [[0.0 for _ in range(self.grid_size)] for _ in range(self.grid_size)]
         for action, probability in enumerate(action_probabilities[:-1]):
@@ -165,5 +269,29 @@ def player_positions(state: OthelloState) -> Iterator[Tuple[int, int]]:
                 yield x, y
 
 
+_directions = [
+    (x_shift, y_shift)
+    for x_shift, y_shift in itertools.product([0, 1, -1], repeat=2)
+    if (x_shift, y_shift) != (0, 0)
+]
+
+
+def shift_cells(cells: np.ndarray, x_shift: int, y_shift: int) -> np.ndarray:
+    # Move the cells of boolean (N, size, size) arrays one step in a
+    # direction, dropping the ones that leave the board
+    shifted = np.zeros_like(cells)
+    size = cells.shape[1]
+    shifted[
+        :,
+        max(y_shift, 0) : size + min(y_shift, 0),
+        max(x_shift, 0) : size + min(x_shift, 0),
+    ] = cells[
+        :,
+        max(-y_shift, 0) : size + min(-y_shift, 0),
+        max(-x_shift, 0) : size + min(-x_shift, 0),
+    ]
+    return shifted
+
+
 if __name__ == "__main__":
     play_random_mcts(OthelloManager(grid_size=6), num_simulations=100)
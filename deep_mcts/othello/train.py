@@ -2,6 +2,7 @@ import datetime
 from pathlib import Path
 
 from deep_mcts.othello.convolutionalnet import ConvolutionalOthelloNet
+from deep_mcts.othello.endgame import OthelloEndgameSolver
 from deep_mcts.othello.game import OthelloManager, OthelloState
 from deep_mcts.train import train, TrainingConfiguration
 
@@ -28,6 +29,7 @@ if __name__ == "__main__":
                 sample_move_cutoff=10,
                 dirichlet_alpha=1,
                 replay_buffer_max_size=5000,
+                endgame_solver=OthelloEndgameSolver(grid_size),
             ),
         )
         print("*" * 50)
@@ -0,0 +1,166 @@
+import multiprocessing
+import random
+from multiprocessing.connection import Connection
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from deep_mcts.game import Action, GameManager, State
+from deep_mcts.mcts import (
+    MCTS,
+    Node,
+    SimulationStats,
+    VISITS,
+    VALUE_SUM,
+    PROBABILITY,
+)
+
+_S = TypeVar("_S", bound=State)
+MCTSFactory = Callable[[], MCTS[_S]]
+# Actions, visits, value sums and priors of the root children, and the
+# simulation stats of the search
+RootStatistics = Tuple[
+    List[Action], np.ndarray, np.ndarray, np.ndarray, SimulationStats
+]
+
+
+class RootParallelMCTS(MCTS[_S]):
+    # Runs independent searches from the same root in a pool of worker
+    # processes and merges the statistics of the root children. Each worker
+    # keeps its own tree between moves, so only the moves made since the
+    # last search are sent to the workers. mcts_factory is called in the
+    # workers and must be picklable.
+    connections: List[Connection]
+    processes: List[multiprocessing.Process]
+    operations: List[Tuple[str, Tuple[Any, ...]]]
+
+    def __init__(
+        self,
+        game_manager: GameManager[_S],
+        mcts_factory: MCTSFactory[_S],
+        num_processes: int,
+        seed: Optional[int] = None,
+    ) -> None:
+        # The search itself happens in the workers, so none of the search
+        # parameters of MCTS are needed here
+        self.game_manager = game_manager
+        self.state = game_manager.initial_game_state()
+        self.root = Node()
+        self.sample_move_cutoff = 0
+        self.operations = []
+        if seed is None:
+            seed = random.randrange(2 ** 32 - num_processes)
+        context = multiprocessing.get_context("spawn")
+        self.connections = []
+        self.processes = []
+        for i in range(num_processes):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(
+                target=root_parallel_worker,
+                args=(worker_connection, mcts_factory, seed + i),
+                daemon=True,
+            )
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def step(self) -> Tuple[List[float], SimulationStats]:
+        for connection in self.connections:
+            connection.send((self.operations, self.state))
+        self.operations = []
+        results: List[RootStatistics] = [
+            connection.recv() for connection in self.connections
+        ]
+        num_actions = self.game_manager.num_actions
+        visits = np.zeros(num_actions)
+        value_sums = np.zeros(num_actions)
+        probabilities = np.zeros(num_actions)
+        simulations_with_expansion = 0
+        simulations_without_expansion = 0
+        simulations_saved = 0
+        for (
+            actions,
+            worker_visits,
+            worker_value_sums,
+            worker_probabilities,
+            (worker_with_expansion, worker_without_expansion, worker_saved),
+        ) in results:
+            visits[actions] += worker_visits
+            value_sums[actions] += worker_value_sums
+            probabilities[actions] += worker_probabilities / len(results)
+            simulations_with_expansion += worker_with_expansion
+            simulations_without_expansion += worker_without_expansion
+            simulations_saved += worker_saved
+        # Keep the merged statistics in the root for inspection
+        actions = results[0][0]
+        self.root = Node()
+        self.root.expand(actions, probabilities[actions])
+        self.root.visits = int(visits.sum()) + 1
+        self.root.child_statistics[VISITS] = visits[actions]  # type: ignore[index]
+        self.root.child_statistics[VALUE_SUM] = value_sums[  # type: ignore[index]
+            actions
+        ]
+        return (
+            (visits / visits.sum()).tolist(),
+            (
+                simulations_with_expansion,
+                simulations_without_expansion,
+                simulations_saved,
+            ),
+        )
+
+    def set_state(self, state: _S) -> None:
+        self.operations.append(("set_state", (state,)))
+        self.root = Node()
+        self.state = state
+
+    def make_move(self, action: Action) -> None:
+        self.operations.append(("make_move", (action,)))
+        self.root = self.root.children.get(action, Node())
+        self.state = self.game_manager.generate_child_state(self.state, action)
+
+    def reset(self) -> None:
+        self.operations.append(("reset", ()))
+        self.root = Node()
+        self.state = self.game_manager.initial_game_state()
+
+    def close(self) -> None:
+        for connection in self.connections:
+            connection.send(None)
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+
+def root_parallel_worker(
+    connection: Connection, mcts_factory: MCTSFactory[_S], seed: int
+) -> None:
+    # Different seeds give every worker its own Dirichlet noise and rollouts
+    random.seed(seed)
+    np.random.seed(seed)
+    mcts = mcts_factory()
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        operations, state = message
+        for name, args in operations:
+            getattr(mcts, name)(*args)
+        if mcts.state != state:
+            # The state was changed without a move, e.g. by the GTP
+            # interface changing the player to move, so start from scratch
+            mcts.reset()
+            mcts.state = state
+        _, simulation_stats = mcts.step()
+        statistics = mcts.root.child_statistics
+        assert statistics is not None
+        connection.send(
+            (
+                mcts.root.child_actions,
+                statistics[VISITS],
+                statistics[VALUE_SUM],
+                statistics[PROBABILITY],
+                simulation_stats,
+            )
+        )
@@ -1,5 +1,6 @@
 from typing import Tuple, Mapping, Sequence, Type, Any, Optional, Dict
 
+import numpy as np
 import torch
 import torch.optim
 import torch.optim.optimizer
@@ -50,7 +51,7 @@ class ConvolutionalTicTacToeNet(GameNet[TicTacToeState]):
 
     def states_to_tensor(self, states: Sequence[TicTacToeState]) -> torch.Tensor:
         players, opposite_players, grids = zip(
-            *[(state.player, state.player.opposite(), state.grid) for state in states]
+            *[(state.player, state.player.opposite(), state.array()) for state in states]
         )
         players = torch.tensor(players).reshape(-1, 1, 1)
         opposite_players = torch.tensor(opposite_players).reshape(-1, 1, 1)
@@ -59,7 +60,7 @@ class ConvolutionalTicTacToeNet(GameNet[TicTacToeState]):
         player_grids[:] = players
 
         # We want everything to be from the perspective of the current player.
-        grids = torch.tensor(grids)
+        grids = torch.from_numpy(np.stack(grids))
         current_player = (grids == players).float()
         other_player = (grids == opposite_players).float()
         #  assert np.all((first_player.sum(axis=1) - second_player.sum(axis=1)) <= 1)
@@ -1,5 +1,6 @@
 from typing import Tuple, Sequence, Mapping, TYPE_CHECKING, Type, Any, Optional, Dict
 
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -62,7 +63,7 @@ class FullyConnectedTicTacToeNet(GameNet[TicTacToeState]):
         players = torch.tensor([state.player for state in states]).reshape(
             (len(states), -1)
         )
-        grids = torch.tensor([state.grid for state in states]).reshape(
+        grids = torch.from_numpy(np.stack([state.array() for state in states])).reshape(
             (len(states), -1)
         )
         for i in range(len(states)):
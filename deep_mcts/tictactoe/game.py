@@ -1,16 +1,27 @@
-from functools import lru_cache
 from typing import List, Tuple, Sequence
 
-from dataclasses import dataclass
-
-from deep_mcts.game import CellState, GameManager, Player, State, Outcome, Action
+import numpy as np
+
+from deep_mcts.cache import cached
+from deep_mcts.game import (
+    CellState,
+    GameManager,
+    Player,
+    GridState,
+    PackedGridState,
+    StateBatch,
+    Outcome,
+    Action,
+    cell_grid,
+    grid_symmetries,
+    zobrist_table,
+    ZOBRIST_PLAYER_KEY,
+)
 from deep_mcts.mcts import play_random_mcts
 
 
-@dataclass(unsafe_hash=True)
-class TicTacToeState(State):
-    __slots__ = ["grid"]
-    grid: Tuple[Tuple[CellState, ...], ...]
+class TicTacToeState(GridState):
+    __slots__ = ()
 
     def __str__(self) -> str:
         cell_to_str = {
@@ -21,9 +32,16 @@ class TicTacToeState(State):
         return "\n".join("".join(cell_to_str[c] for c in row) for row in self.grid)
 
 
+class PackedTicTacToeState(PackedGridState, TicTacToeState):
+    __slots__ = ["cells"]
+
+
 class TicTacToeManager(GameManager[TicTacToeState]):
+    zobrist_table: List[Tuple[int, int]]
+
     def __init__(self) -> None:
         super().__init__(grid_size=9, num_actions=9)
+        self.zobrist_table = zobrist_table(9)
 
     def initial_game_state(self) -> TicTacToeState:
         return TicTacToeState(
@@ -31,7 +49,7 @@ class TicTacToeManager(GameManager[TicTacToeState]):
             tuple(tuple(CellState.EMPTY for _ in range(3)) for _ in range(3)),
         )
 
-    @lru_cache(maxsize=2 ** 20)
+    @cached
     def generate_child_state(  # type: ignore[override]
         self, state: TicTacToeState, action: Action
     ) -> TicTacToeState:
@@ -48,9 +66,10 @@ class TicTacToeManager(GameManager[TicTacToeState]):
                 else row
                 for i, row in enumerate(state.grid)
             ),
+            state.key ^ self.zobrist_table[action][state.player] ^ ZOBRIST_PLAYER_KEY,
         )
 
-    @lru_cache(maxsize=2 ** 20)
+    @cached
     def legal_actions(  # type: ignore[override]
         self, state: TicTacToeState
     ) -> List[Action]:
@@ -61,13 +80,13 @@ class TicTacToeManager(GameManager[TicTacToeState]):
             if state.grid[y][x] == CellState.EMPTY
         ]
 
-    @lru_cache(maxsize=2 ** 20)
+    @cached
     def is_final_state(self, state: TicTacToeState) -> bool:  # type: ignore[override]
         return self.evaluate_final_state(state) != Outcome.DRAW or all(
             all(p != CellState.EMPTY for p in row) for row in state.grid
         )
 
-    @lru_cache(maxsize=2 ** 20)
+    @cached
     def evaluate_final_state(  # type: ignore[override]
         self, state: TicTacToeState
     ) -> Outcome:
@@ -96,6 +115,55 @@ class TicTacToeManager(GameManager[TicTacToeState]):
                 return outcome
         return Outcome.DRAW
 
+    # The batched methods use 3x3 grids, even though grid_size is 9
+    def initial_game_states(self, n: int) -> StateBatch:
+        return StateBatch(
+            np.full(n, Player.FIRST, dtype=np.int8),
+            np.full((n, 3, 3), CellState.EMPTY, dtype=np.int8),
+        )
+
+    def generate_child_states(
+        self, states: StateBatch, actions: np.ndarray
+    ) -> StateBatch:
+        grids = states.grids.copy()
+        flat_grids = grids.reshape(len(states), 9)
+        indices = np.arange(len(states))
+        assert np.all(flat_grids[indices, actions] == CellState.EMPTY)
+        flat_grids[indices, actions] = states.players
+        return StateBatch(1 - states.players, grids)
+
+    def legal_action_masks(self, states: StateBatch) -> np.ndarray:
+        return states.grids.reshape(len(states), 9) == CellState.EMPTY
+
+    def are_final(self, states: StateBatch) -> np.ndarray:
+        return (self.evaluate_final_states(states) != Outcome.DRAW.value) | np.all(
+            states.grids != CellState.EMPTY, axis=(1, 2)
+        )
+
+    def evaluate_final_states(self, states: StateBatch) -> np.ndarray:
+        lines = states.grids.reshape(len(states), 9)[:, _lines]
+        outcomes = np.full(len(states), Outcome.DRAW.value)
+        # The second player is checked last, so it wins if both players have a
+        # line, like in evaluate_final_state
+        for player, outcome in [
+            (CellState.FIRST_PLAYER, Outcome.FIRST_PLAYER_WIN),
+            (CellState.SECOND_PLAYER, Outcome.SECOND_PLAYER_WIN),
+        ]:
+            outcomes[np.all(lines == player, axis=2).any(axis=1)] = outcome.value
+        return outcomes
+
+    def unstack_states(self, states: StateBatch) -> List[TicTacToeState]:
+        return [
+            TicTacToeState(Player(player), cell_grid(grid))
+            for player, grid in zip(states.players, states.grids)
+        ]
+
+    def pack_state(self, state: TicTacToeState) -> TicTacToeState:
+        return PackedTicTacToeState.pack(state)
+
+    def symmetries(self) -> np.ndarray:
+        return grid_symmetries(3, dihedral=True)
+
     def probabilities_grid(self, action_probabilities: Sequence[float]) -> str:
         board = [[0.0 for _ in range(3)] for _ in range(3)]
         for action, probability in enumerate(action_probabilities):
@@ -108,5 +176,13 @@ class TicTacToeManager(GameManager[TicTacToeState]):
         return "\n".join(grid)
 
 
+# The actions in every row, column and diagonal
+_lines = np.array(
+    [[x + y * 3 for x in range(3)] for y in range(3)]
+    + [[x + y * 3 for y in range(3)] for x in range(3)]
+    + [[0, 4, 8], [2, 4, 6]]
+)
+
+
 if __name__ == "__main__":
     play_random_mcts(TicTacToeManager(), num_simulations=1000)
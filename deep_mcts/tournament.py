@@ -1,3 +1,4 @@
+import asyncio
 import itertools
 import random
 from abc import ABC, abstractmethod
@@ -23,6 +24,16 @@ class Agent(ABC, Generic[_S]):
         ...
 
 
+class AsyncAgent(ABC, Generic[_S]):
+    @abstractmethod
+    async def play(self, state: _S) -> Action:
+        ...
+
+    @abstractmethod
+    def reset(self) -> None:
+        ...
+
+
 class RandomAgent(Agent[_S]):
     manager: "GameManager[_S]"
 
@@ -106,3 +117,57 @@ def play(
     for player in players:
         player.reset()
     return game_manager.evaluate_final_state(state)
+
+
+async def compare_agents_async(
+    player_pairs: Sequence[Tuple[AsyncAgent[_S], AsyncAgent[_S]]],
+    num_games: int,
+    game_manager: "GameManager[_S]",
+) -> AgentComparison:
+    # Like compare_agents, but with one game running concurrently for each
+    # pair of agents. All pairs should be equivalent, as each one plays an
+    # equal share of the games with both colors.
+    outcomes: List[Tuple[int, Outcome]] = []
+    games = iter(range(num_games))
+
+    async def play_games(players: Tuple[AsyncAgent[_S], AsyncAgent[_S]]) -> None:
+        for k in games:
+            if k % 2 == 0:
+                outcome = await play_async(players, game_manager)
+            else:
+                outcome = await play_async((players[1], players[0]), game_manager)
+            outcomes.append((k, outcome))
+
+    await asyncio.gather(*(play_games(players) for players in player_pairs))
+    wins = [0, 0]
+    draws = [0, 0]
+    losses = [0, 0]
+    for k, outcome in outcomes:
+        # The first agent plays first in the even games
+        first_agent_player = k % 2
+        if outcome == Outcome.DRAW:
+            draws[first_agent_player] += 1
+        elif (outcome == Outcome.FIRST_PLAYER_WIN) == (first_agent_player == 0):
+            wins[first_agent_player] += 1
+        else:
+            losses[first_agent_player] += 1
+    num_games //= 2
+    return (
+        (wins[0] / num_games, wins[1] / num_games),
+        (draws[0] / num_games, draws[1] / num_games),
+        (losses[0] / num_games, losses[1] / num_games),
+    )
+
+
+async def play_async(
+    players: Tuple[AsyncAgent[_S], AsyncAgent[_S]], game_manager: "GameManager[_S]"
+) -> Outcome:
+    state = game_manager.initial_game_state()
+    player = 0
+    while not game_manager.is_final_state(state):
+        action = await players[player].play(state)
+        state = game_manager.generate_child_state(state, action)
+        player = (player + 1) % 2
+    for player in players:
+        player.reset()
+    return game_manager.evaluate_final_state(state)
@@ -1,7 +1,9 @@
+import asyncio
 import queue
 import random
 import textwrap
 import time
+from collections import OrderedDict
 from functools import lru_cache
 import json
 from typing import (
@@ -10,6 +12,7 @@ from typing import (
     Optional,
     TypeVar,
     List,
+    Union,
     cast,
     Sequence,
     Generic,
@@ -17,15 +20,25 @@ from typing import (
     Any,
 )
 
+import numpy as np
 import pandas as pd
 import torch
 import torch.autograd
 from dataclasses import dataclass, asdict
 from torch import multiprocessing
 
+from deep_mcts.async_mcts import AsyncMCTS, BatchingStateEvaluator
 from deep_mcts.game import State, GameManager, Player
 from deep_mcts.gamenet import GameNet
-from deep_mcts.mcts import MCTS, MCTSAgent, StateEvaluator, RolloutPolicy
+from deep_mcts.inference_server import InferenceClient, InferenceServers
+from deep_mcts.mcts import (
+    MCTS,
+    MCTSAgent,
+    StateEvaluator,
+    RolloutPolicy,
+    BatchStateEvaluator,
+    EndgameSolver,
+)
 from deep_mcts.tournament import compare_agents, AgentComparison
 
 _S = TypeVar("_S", bound=State)
@@ -33,6 +46,8 @@ SelfPlayExample = Tuple[_S, Sequence[float], float]
 SelfPlayGame = List[SelfPlayExample[_S]]
 TensorSelfPlayExample = Tuple[torch.Tensor, torch.Tensor, torch.Tensor]
 TensorSelfPlayGame = List[TensorSelfPlayExample]
+# Anything evaluating states like GameNet.evaluate and GameNet.evaluate_states
+Evaluator = Union[GameNet[_S], InferenceClient[_S]]
 
 
 @dataclass(frozen=True)
@@ -54,11 +69,41 @@ class TrainingConfiguration(Generic[_S]):
     self_play_device: torch.device = torch.device("cuda")
     evaluation_games: int = 20
     transfer_interval: int = 1000
+    leaf_batch_size: int = 1
+    # Stopping early keeps the moves with the most visits, but it makes the
+    # visit distributions used as training targets less smooth
+    early_stopping: bool = False
+    # Self-play games played at the same time by each process, with the
+    # evaluations of all of them batched together
+    concurrent_games: int = 1
+    # Exact solver for the end of the game, used by every search except the
+    # one of the random baseline, see MCTS
+    endgame_solver: Optional[EndgameSolver[_S]] = None
+    # Propagate proven wins and losses through the search trees, see MCTS
+    solver: bool = False
+    # Evaluate the states of all self-play processes in this many inference
+    # server processes, in batches of up to inference_batch_size states
+    # collected for at most inference_max_delay seconds. With 0, every
+    # self-play process runs its own copy of the network.
+    inference_servers: int = 0
+    inference_batch_size: int = 256
+    inference_max_delay: float = 0.002
+    # Play the self-play games with int8 copies of the network on the CPU,
+    # see GameNet.to_quantized, while training stays in fp32. The copies are
+    # remade every transfer_interval training iterations, calibrated on
+    # quantization_calibration_size states sampled from the replay buffer.
+    quantize: bool = False
+    quantization_calibration_size: int = 256
+    # Share the cached evaluations of states that are symmetries of each
+    # other, see cached_state_evaluator
+    canonicalize_states: bool = False
 
     def to_json_dict(self) -> Dict[str, Any]:
         d = asdict(self)
         rollout_policy = d.pop("rollout_policy")
         d["has_rollout_policy"] = rollout_policy is not None
+        endgame_solver = d.pop("endgame_solver")
+        d["has_endgame_solver"] = endgame_solver is not None
         for device in ["train_device", "self_play_device"]:
             device_type = d[device].type
             device_index = d[device].index
@@ -129,8 +174,33 @@ def _train(
         multiprocessing.set_start_method("spawn")
     self_play_game_net = game_net.copy().to(config.self_play_device)
     last_trained_iteration = torch.tensor([-1])
+    # Shared with the self-play and inference server processes, which
+    # quantize their copies of the network with these states
+    calibration_states: Optional[torch.Tensor] = None
+    if config.quantize:
+        example = game_net.states_to_tensor([game_manager.initial_game_state()])
+        calibration_states = torch.zeros(
+            (config.quantization_calibration_size, *example.shape[1:]),
+            dtype=example.dtype,
+        ).share_memory_()
+    inference_servers: Optional[InferenceServers[_S]] = None
+    if config.inference_servers > 0:
+        # Only the servers run the network, so only they get the new weights
+        inference_servers = InferenceServers(
+            self_play_game_net,
+            config.inference_servers,
+            config.nprocs,
+            config.inference_batch_size,
+            config.inference_max_delay,
+            last_trained_iteration=last_trained_iteration,
+            calibration_states=calibration_states,
+        )
     self_playing_context, games_queue = spawn_self_play_example_creators(
-        self_play_game_net, last_trained_iteration, config
+        self_play_game_net,
+        last_trained_iteration,
+        config,
+        inference_servers.clients if inference_servers is not None else None,
+        calibration_states,
     )
     previous_game_net = game_net.copy().to(config.train_device)
     training_iterations = 0
@@ -167,7 +237,12 @@ def _train(
         accuracy += batch_accuracy
 
         if (training_iterations + 1) % config.transfer_interval == 0:
+            # With inference servers, this only updates the servers
             self_play_game_net.load_state_dict(game_net.net.state_dict())
+            if calibration_states is not None:
+                calibration_states[:] = sample_replay_buffer(
+                    replay_buffer, len(calibration_states), torch.device("cpu")
+                )[0]
             last_trained_iteration[0] = training_iterations
 
         if (
@@ -210,17 +285,31 @@ def _train(
             yield training_iterations, training_games_count, random_mcts_evaluation, previous_evaluation
 
         training_iterations += 1
+    if inference_servers is not None:
+        inference_servers.close()
 
 
 def spawn_self_play_example_creators(
     game_net: GameNet[_S],
     last_trained_iteration: torch.Tensor,
     config: TrainingConfiguration[_S],
+    inference_clients: Optional[List[InferenceClient[_S]]] = None,
+    calibration_states: Optional[torch.Tensor] = None,
 ) -> Tuple[multiprocessing.SpawnContext, "multiprocessing.Queue[SelfPlayGame[_S]]"]:
     games_queue: "multiprocessing.Queue[SelfPlayGame[_S]]" = multiprocessing.Queue()
+    if inference_clients is not None:
+        # The processes only use the network of game_net through the clients
+        game_net = inference_clients[0].game_net
     context = multiprocessing.spawn(
         create_self_play_examples,
-        (game_net, last_trained_iteration, config, games_queue),
+        (
+            game_net,
+            last_trained_iteration,
+            config,
+            games_queue,
+            inference_clients,
+            calibration_states,
+        ),
         nprocs=config.nprocs,
         join=False,
     )
@@ -233,8 +322,13 @@ def create_self_play_examples(
     last_trained_iteration: torch.Tensor,
     config: TrainingConfiguration[_S],
     games_queue: "multiprocessing.Queue[SelfPlayGame[_S]]",
+    inference_clients: Optional[List[InferenceClient[_S]]] = None,
+    calibration_states: Optional[torch.Tensor] = None,
 ) -> None:
     game_manager = game_net.manager
+    evaluator: Evaluator[_S] = game_net
+    if inference_clients is not None:
+        evaluator = inference_clients[process_number]
     last_cached_iteration = 0
     # Use a uniform evaluator as the starting point
     def uniform_state_evaluator(state: _S) -> Tuple[float, List[float]]:
@@ -247,13 +341,34 @@ def create_self_play_examples(
             ],
         )
 
+    if config.concurrent_games > 1:
+        asyncio.get_event_loop().run_until_complete(
+            create_self_play_examples_concurrently(
+                process_number,
+                game_net,
+                evaluator,
+                last_trained_iteration,
+                config,
+                games_queue,
+                uniform_state_evaluator,
+                calibration_states,
+            )
+        )
+        return
     state_evaluator: StateEvaluator[_S] = uniform_state_evaluator
+    batch_state_evaluator: Optional[BatchStateEvaluator[_S]] = None
     for i in range(config.num_games):
         # Recreate the cache if the network has been trained since
         # we last created the cache
         last_trained_iteration_value = cast(int, last_trained_iteration.item())
         if last_trained_iteration_value > last_cached_iteration:
-            state_evaluator = cached_state_evaluator(game_net)
+            inference_evaluator = to_inference(evaluator, calibration_states)
+            state_evaluator = cached_state_evaluator(
+                inference_evaluator, config.canonicalize_states
+            )
+            batch_state_evaluator = cached_batch_state_evaluator(
+                inference_evaluator, config.canonicalize_states
+            )
             last_cached_iteration = last_trained_iteration_value
         mcts = MCTS(
             game_manager,
@@ -263,36 +378,101 @@ def create_self_play_examples(
             config.sample_move_cutoff,
             config.dirichlet_alpha,
             config.dirichlet_factor,
+            batch_state_evaluator=batch_state_evaluator,
+            leaf_batch_size=config.leaf_batch_size,
+            early_stopping=config.early_stopping,
+            endgame_solver=config.endgame_solver,
+            solver=config.solver,
         )
         examples = []
         for state, next_state, action, visit_distribution in mcts.self_play():
             examples.append((state, visit_distribution))
-        # The network uses a range of [-1, 1]
-        outcome = (
-            cast(float, game_manager.evaluate_final_state(next_state).value) * 2 - 1
-        )
-        games_queue.put(
-            [
-                (
-                    state,
-                    visit_distribution,
-                    outcome if state.player == Player.max_player() else -outcome,
-                )
-                for state, visit_distribution in examples
-            ]
-        )
+        games_queue.put(self_play_game(game_manager, examples, next_state))
         if i % 100 == 0 and process_number == 0:
             print(f"{time.strftime('%H:%M:%S')} {i}")
-            # cached_methods = [
-            #     "generate_child_state",
-            #     "legal_actions",
-            #     "is_final_state",
-            #     "evaluate_final_state",
-            # ]
-            # for method in cached_methods:
-            #     cache_info = getattr(game_manager, method).cache_info()
-            #     hit_ratio = cache_info.hits / (cache_info.hits + cache_info.misses)
-            #     print(f"{method}: {hit_ratio * 100:.1f}%")
+            for method, stats in game_manager.cache_stats().items():
+                print(
+                    f"{method}: {stats.hit_ratio * 100:.1f}% hits, "
+                    f"{stats.entries} entries, {stats.evictions} evictions"
+                )
+            nodes_per_second = getattr(config.endgame_solver, "nodes_per_second", None)
+            if nodes_per_second is not None:
+                print(f"endgame solver: {nodes_per_second():.0f} nodes/s")
+
+
+async def create_self_play_examples_concurrently(
+    process_number: int,
+    game_net: GameNet[_S],
+    evaluator: Evaluator[_S],
+    last_trained_iteration: torch.Tensor,
+    config: TrainingConfiguration[_S],
+    games_queue: "multiprocessing.Queue[SelfPlayGame[_S]]",
+    uniform_state_evaluator: StateEvaluator[_S],
+    calibration_states: Optional[torch.Tensor] = None,
+) -> None:
+    game_manager = game_net.manager
+    last_cached_iteration = 0
+    state_evaluator = BatchingStateEvaluator(
+        lambda states: [uniform_state_evaluator(state) for state in states]
+    )
+    games_started = 0
+
+    async def play_games() -> None:
+        nonlocal last_cached_iteration, state_evaluator, games_started
+        while games_started < config.num_games:
+            i = games_started
+            games_started += 1
+            # Recreate the cache if the network has been trained since
+            # we last created the cache
+            last_trained_iteration_value = cast(int, last_trained_iteration.item())
+            if last_trained_iteration_value > last_cached_iteration:
+                state_evaluator = BatchingStateEvaluator(
+                    cached_batch_state_evaluator(
+                        to_inference(evaluator, calibration_states),
+                        config.canonicalize_states,
+                    )
+                )
+                last_cached_iteration = last_trained_iteration_value
+            mcts = AsyncMCTS(
+                game_manager,
+                config.num_simulations,
+                config.rollout_policy,
+                state_evaluator,
+                sample_move_cutoff=config.sample_move_cutoff,
+                dirichlet_alpha=config.dirichlet_alpha,
+                dirichlet_factor=config.dirichlet_factor,
+                leaf_batch_size=config.leaf_batch_size,
+                early_stopping=config.early_stopping,
+                endgame_solver=config.endgame_solver,
+                solver=config.solver,
+            )
+            examples = []
+            async for state, next_state, action, visit_distribution in mcts.self_play():
+                examples.append((state, visit_distribution))
+            games_queue.put(self_play_game(game_manager, examples, next_state))
+            if i % 100 == 0 and process_number == 0:
+                print(f"{time.strftime('%H:%M:%S')} {i}")
+
+    await asyncio.gather(*(play_games() for _ in range(config.concurrent_games)))
+
+
+def self_play_game(
+    game_manager: GameManager[_S],
+    examples: Sequence[Tuple[_S, Sequence[float]]],
+    final_state: _S,
+) -> SelfPlayGame[_S]:
+    # The network uses a range of [-1, 1]
+    outcome = cast(float, game_manager.evaluate_final_state(final_state).value) * 2 - 1
+    # The games are sent to the training process, so pack the states to make
+    # them cheaper to pickle
+    return [
+        (
+            game_manager.pack_state(state),
+            visit_distribution,
+            outcome if state.player == Player.max_player() else -outcome,
+        )
+        for state, visit_distribution in examples
+    ]
 
 
 def get_new_games(
@@ -354,8 +534,10 @@ def evaluate(
     game_manager: GameManager[_S],
     config: TrainingConfiguration[_S],
 ) -> Tuple[AgentComparison, AgentComparison]:
-    state_evaluator = cached_state_evaluator(game_net)
-    previous_state_evaluator = cached_state_evaluator(previous_game_net)
+    state_evaluator = cached_state_evaluator(game_net, config.canonicalize_states)
+    previous_state_evaluator = cached_state_evaluator(
+        previous_game_net, config.canonicalize_states
+    )
     random_mcts_evaluation = compare_agents(
         (
             MCTSAgent(
@@ -364,6 +546,9 @@ def evaluate(
                     config.num_simulations,
                     config.rollout_policy,
                     state_evaluator=state_evaluator,
+                    early_stopping=config.early_stopping,
+                    endgame_solver=config.endgame_solver,
+                    solver=config.solver,
                 )
             ),
             MCTSAgent(
@@ -372,6 +557,7 @@ def evaluate(
                     config.num_simulations * 2,
                     lambda s: random.choice(game_manager.legal_actions(s)),
                     state_evaluator=None,
+                    early_stopping=config.early_stopping,
                 )
             ),
         ),
@@ -386,6 +572,9 @@ def evaluate(
                     config.num_simulations,
                     config.rollout_policy,
                     state_evaluator,
+                    early_stopping=config.early_stopping,
+                    endgame_solver=config.endgame_solver,
+                    solver=config.solver,
                 ),
                 epsilon=config.epsilon,
             ),
@@ -395,6 +584,9 @@ def evaluate(
                     config.num_simulations,
                     config.rollout_policy,
                     previous_state_evaluator,
+                    early_stopping=config.early_stopping,
+                    endgame_solver=config.endgame_solver,
+                    solver=config.solver,
                 ),
                 epsilon=config.epsilon,
             ),
@@ -405,10 +597,90 @@ def evaluate(
     return random_mcts_evaluation, previous_evaluation
 
 
-def cached_state_evaluator(game_net: GameNet[_S]) -> StateEvaluator[_S]:
+def to_inference(
+    game_net: Evaluator[_S], calibration_states: Optional[torch.Tensor] = None
+) -> Evaluator[_S]:
+    # A quantized copy if there are calibration states. Inference clients are
+    # served by the inference copy of the servers.
+    if isinstance(game_net, GameNet):
+        if calibration_states is not None:
+            return game_net.to_quantized(calibration_states)
+        return game_net.to_inference()
+    return game_net
+
+
+def cached_state_evaluator(
+    game_net: Evaluator[_S], canonicalize: bool = False
+) -> StateEvaluator[_S]:
+    # The evaluators evaluate with an inference copy of game_net, made when
+    # they are created, so they have to be recreated after training it. With
+    # canonicalize, the cache has one entry for all states that are
+    # symmetries of each other, the evaluation of their canonical state, see
+    # GameManager.canonical_state, and the probabilities are mapped back
+    # through the transform of each state.
+    game_net = to_inference(game_net)
+    manager = game_net.manager
+
+    if canonicalize:
+
+        @lru_cache(2 ** 20)
+        def evaluate_canonical(state: _S) -> Tuple[float, np.ndarray]:
+            return game_net.evaluate(state)
+
+        def canonical_inner(state: _S) -> Tuple[float, Sequence[float]]:
+            canonical_state, transform = manager.canonical_state(state)
+            value, probabilities = evaluate_canonical(canonical_state)
+            return (
+                value,
+                manager.inverse_transform_probabilities(
+                    probabilities, transform
+                ).tolist(),
+            )
+
+        return canonical_inner
+
     @lru_cache(2 ** 20)
     def inner(state: _S) -> Tuple[float, Sequence[float]]:
         value, probabilities = game_net.evaluate(state)
         return value, probabilities.tolist()
 
     return inner
+
+
+def cached_batch_state_evaluator(
+    game_net: Evaluator[_S], canonicalize: bool = False
+) -> BatchStateEvaluator[_S]:
+    game_net = to_inference(game_net)
+    manager = game_net.manager
+    cache: "OrderedDict[_S, Tuple[float, Sequence[float]]]" = OrderedDict()
+
+    def inner(states: Sequence[_S]) -> List[Tuple[float, Sequence[float]]]:
+        keys: Sequence[_S] = states
+        transforms = [0] * len(states)
+        if canonicalize:
+            keys, transforms = zip(  # type: ignore[assignment]
+                *(manager.canonical_state(state) for state in states)
+            )
+        # Only the states missing from the cache are sent to the network,
+        # all in a single forward pass
+        missing = [key for key in dict.fromkeys(keys) if key not in cache]
+        if missing:
+            values, probabilities = game_net.evaluate_batch(missing)
+            for key, value, key_probabilities in zip(
+                missing, values.tolist(), probabilities.tolist()
+            ):
+                cache[key] = value, key_probabilities
+        evaluations = []
+        for key, transform in zip(keys, transforms):
+            cache.move_to_end(key)
+            value, probabilities = cache[key]
+            if transform != 0:
+                probabilities = manager.inverse_transform_probabilities(
+                    np.array(probabilities), transform
+                ).tolist()
+            evaluations.append((value, probabilities))
+        while len(cache) > 2 ** 20:
+            cache.popitem(last=False)
+        return evaluations
+
+    return inner